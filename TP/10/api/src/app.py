@@ -16,6 +16,7 @@ from utils.web3_utils import (
     get_account,
     load_contract,
     load_dynamic_contract,
+    batch_call,
     validate_address,
     verify_contract_signature,
     w3,
@@ -401,36 +402,52 @@ def get_proposal_data(call_id, proposal):
 # TODO docuementar los endpoints
 
 
+# Datos de cada llamado (creador, contrato CFP y closingTime), que no cambian
+# una vez creado: GET /calls sólo consulta al nodo por los llamados nuevos
+calls_cache = {}
+
+
 @app.route("/calls", methods=["GET"])
 def get_all_calls():
     call_ids = factory.functions.allCallIds().call()
 
-    calls = []
-    for call_id in call_ids:
-        call = factory.functions.calls(call_id).call()
-        cfp_address = call[1]
-        closing_time_iso = None
-        try:
-            # Cargar el contrato CFP y obtener el closingTime
-            cfp = load_dynamic_contract(w3, cfp_address, CFP_ABI)
-            closing_time = cfp.functions.closingTime().call()
-            closing_time_iso = datetime.fromtimestamp(
-                closing_time, timezone.utc
-            ).isoformat()
-        except Exception as e:
-            print(
-                f"[ERROR] get_all_calls: No se pudo obtener closingTime para {cfp_address}: {e}"
-            )
+    # Los llamados nuevos se resuelven con dos batches de JSON-RPC (calls(id) de
+    # todos y después closingTime() de sus CFP), en lugar de 2N llamadas
+    missing = [call_id for call_id in call_ids if call_id not in calls_cache]
+    fetched = {}
+    if missing:
+        found = batch_call(w3, [factory.functions.calls(call_id) for call_id in missing])
+        for call in found:
+            if isinstance(call, Exception):
+                raise call
+        closing_times = batch_call(
+            w3,
+            [load_dynamic_contract(w3, call[1], CFP_ABI).functions.closingTime() for call in found],
+        )
 
-        calls.append(
-            {
+        for call_id, call, closing_time in zip(missing, found, closing_times):
+            cfp_address = call[1]
+            closing_time_iso = None
+            if isinstance(closing_time, Exception):
+                print(
+                    f"[ERROR] get_all_calls: No se pudo obtener closingTime para {cfp_address}: {closing_time}"
+                )
+            else:
+                closing_time_iso = datetime.fromtimestamp(
+                    closing_time, timezone.utc
+                ).isoformat()
+
+            fetched[call_id] = {
                 "callId": "0x" + call_id.hex(),
                 "creator": call[0],
                 "cfpAddress": cfp_address,
                 "closingTime": closing_time_iso,
             }
-        )
+            # Si no se obtuvo el closingTime se vuelve a intentar en la próxima consulta
+            if closing_time_iso is not None:
+                calls_cache[call_id] = fetched[call_id]
 
+    calls = [fetched.get(call_id) or calls_cache[call_id] for call_id in call_ids]
     return jsonify(calls)
 
 
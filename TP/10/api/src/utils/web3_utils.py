@@ -1,6 +1,8 @@
 from web3 import Web3, Account
 from eth_account.messages import encode_defunct
+from eth_utils.abi import collapse_if_tuple
 import json
+import requests
 from flask import jsonify
 
 from config_loader import load_config
@@ -20,6 +22,13 @@ w3 = Web3(Web3.HTTPProvider(ganache_url))
 if not w3.is_connected():
     raise ConnectionError(f"No se pudo conectar al nodo Ethereum en {ganache_url}")
 
+# Llamadas eth_call por batch de JSON-RPC en batch_call
+RPC_BATCH_SIZE = 500
+RPC_BATCH_TIMEOUT = 10
+
+# Sesión HTTP reutilizada por los batches, para no abrir una conexión por batch
+rpc_session = requests.Session()
+
 
 def get_account(mnemonic, index):
     """
@@ -138,3 +147,115 @@ def verify_contract_signature(contract_address, call_id, signature):
     except Exception as e:
         print(f"Error verifying contract signature: {str(e)}")
         return None, jsonify({"message": MESSAGES["INVALID_SIGNATURE"]}), 400
+
+
+def batch_call(w3, functions):
+    """
+    Ejecuta varias llamadas de solo lectura (eth_call) con batches de JSON-RPC:
+    un único viaje al nodo por cada RPC_BATCH_SIZE llamadas, en lugar de uno por llamada.
+
+    web3 6 no tiene una API pública de batches, por lo que el batch se envía por
+    HTTP al endpoint del proveedor (con sus mismos encabezados y opciones, pero
+    sin pasar por sus middlewares). Los datos se codifican y decodifican sólo
+    con la API pública (encodeABI del contrato y w3.codec). Si el proveedor no
+    es HTTP, cada llamada se hace con .call().
+
+    Args:
+        w3 (Web3): Instancia de Web3 conectada a un nodo Ethereum.
+        functions (list): Funciones de contrato con sus argumentos, p. ej. factory.functions.calls(call_id).
+
+    Returns:
+        list: Por cada función, en el mismo orden, el valor que devolvería .call(),
+              o la excepción si esa llamada falló.
+    """
+    endpoint_uri = getattr(w3.provider, "endpoint_uri", None)
+    if not endpoint_uri:
+        results = []
+        for fn in functions:
+            try:
+                results.append(fn.call())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    request_kwargs = {"timeout": RPC_BATCH_TIMEOUT, **w3.provider.get_request_kwargs()}
+    encoders = {}  # id(ABI) -> contrato sin dirección, para codificar las llamadas
+    results = []
+    for start in range(0, len(functions), RPC_BATCH_SIZE):
+        chunk = functions[start : start + RPC_BATCH_SIZE]
+        payload = []
+        for i, fn in enumerate(chunk):
+            encoder = encoders.get(id(fn.contract_abi))
+            if encoder is None:
+                encoder = encoders[id(fn.contract_abi)] = w3.eth.contract(abi=fn.contract_abi)
+            data = encoder.encodeABI(fn.fn_name, args=fn.args, kwargs=fn.kwargs)
+            payload.append(
+                {
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": "eth_call",
+                    "params": [{"to": fn.address, "data": data}, "latest"],
+                }
+            )
+        response = rpc_session.post(endpoint_uri, json=payload, **request_kwargs)
+        response.raise_for_status()
+        replies = response.json()
+        if not isinstance(replies, list):
+            # Un error del batch completo llega como una única respuesta
+            raise ValueError(f"Error en el batch de JSON-RPC: {replies.get('error')}")
+
+        replies = {reply.get("id"): reply for reply in replies}
+        for i, fn in enumerate(chunk):
+            reply = replies.get(i, {"error": "sin respuesta"})
+            try:
+                if reply.get("error") is not None:
+                    raise ValueError(reply["error"])
+                results.append(decode_call_result(w3, fn, reply["result"]))
+            except Exception as e:
+                results.append(e)
+    return results
+
+
+def decode_call_result(w3, fn, result):
+    """
+    Decodifica el resultado de un eth_call como lo hace .call(): direcciones con
+    checksum, y el valor solo si la función devuelve un único valor.
+
+    Args:
+        w3 (Web3): Instancia de Web3.
+        fn: Función de contrato que se llamó.
+        result (str): Resultado hexadecimal del eth_call.
+
+    Returns:
+        El valor o la lista de valores que devuelve la función.
+    """
+    data = Web3.to_bytes(hexstr=result)
+    if not data:
+        raise ValueError(f"La llamada a {fn.fn_name} en {fn.address} no devolvió datos")
+    outputs = fn.abi["outputs"]
+    values = w3.codec.decode([collapse_if_tuple(output) for output in outputs], data)
+    decoded = [checksum_addresses(output, value) for output, value in zip(outputs, values)]
+    return decoded[0] if len(decoded) == 1 else decoded
+
+
+def checksum_addresses(abi_output, value):
+    """
+    Pasa a checksum las direcciones de un valor decodificado (también dentro de
+    arrays y structs), como las devuelve .call().
+
+    Args:
+        abi_output (dict): Salida del ABI que describe el valor.
+        value: Valor decodificado por w3.codec.
+
+    Returns:
+        El mismo valor, con las direcciones en formato checksum.
+    """
+    abi_type = abi_output["type"]
+    if abi_type.endswith("]"):
+        item = dict(abi_output, type=abi_type[: abi_type.rindex("[")])
+        return [checksum_addresses(item, v) for v in value]
+    if abi_type == "tuple":
+        return tuple(checksum_addresses(c, v) for c, v in zip(abi_output["components"], value))
+    if abi_type == "address":
+        return Web3.to_checksum_address(value)
+    return value
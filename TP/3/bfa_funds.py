@@ -4,13 +4,38 @@ Script para gestionar cuentas en una red Ethereum.
 Comandos disponibles:
 - balance: Consulta el saldo de una cuenta.
 - transfer: Envía fondos de una cuenta a otra.
-- accounts: Lista las cuentas disponibles en el nodo.
+- transfer-batch: Envía fondos desde una cuenta a todos los destinatarios de un CSV
+  (destino,monto). Los nonces se asignan localmente y las transacciones se envían
+  una detrás de otra sin esperar confirmaciones; los recibos se siguen en paralelo
+  recorriendo cada bloque nuevo una sola vez (receipt_tracker).
+  Con --progress el avance se guarda en un archivo y, si se vuelve a ejecutar con
+  el mismo archivo, sólo se envían las transferencias que faltan.
+- balance-history: Serie temporal del balance de varias cuentas cada --stride bloques
+  en un rango. Los balances se piden en batches JSON-RPC concurrentes y, con --cache,
+  los puntos (cuenta, bloque) ya consultados se guardan en disco (SQLite) y no se
+  vuelven a pedir. La salida es un CSV (una fila por bloque, una columna por cuenta)
+  o, con --format npy, un archivo .npz con los arrays de bloques y balances. Para
+  bloques antiguos el nodo debe conservar el estado histórico (nodo archive).
+- accounts: Lista las cuentas disponibles en el nodo (o las de un archivo) con su
+  balance. Todos los balances se toman de un mismo bloque y se piden en batches
+  JSON-RPC, por lo que el listado es una instantánea consistente.
+
+Con --keystore, transfer y transfer-batch firman las transacciones localmente con
+la clave del keystore (descifrada una vez y guardada en memoria durante --key-ttl
+segundos) y las envían ya firmadas, sin desbloquear la cuenta en el nodo.
 
 Ejemplo de uso:
 - Consultar balance de cuenta: python3 bfa_funds.py balance --account {0x123... / indice de cuenta en el nodo} --unit ether
 - Transferencia de ether: python3 bfa_funds.py transfer --from {0x123... / indice de cuenta en el nodo} --to {0x123... / indice de cuenta en el nodo}
     --amount 1 --unit ether --password "password de cuenta origen"  # Usa índices
+- Pago masivo: python3 bfa_funds.py transfer-batch --from 0 --file pagos.csv --unit ether
+    --password "password de cuenta origen" --progress pagos.progress
+- Pago masivo firmando localmente: agregar --keystore blockchain-iua/bfatest/node/keystore
 - Consultar todas las cuentas en el nodo: python3 bfa_funds.py accounts
+- Balance de dos cuentas cada 100 bloques: python3 bfa_funds.py balance-history -a 0 -a 0x123...
+    --from-block 1000000 --to-block 1100000 --stride 100 --unit ether --output balances.csv --cache balances.db
+- Consultar las cuentas de un archivo (una dirección por línea) en un bloque dado:
+    python3 bfa_funds.py accounts --file cuentas.txt --block 1234567 --batch-size 1000
 
 """
 
@@ -21,27 +46,48 @@ Ejemplo de uso:
 
 
 import argparse
+import concurrent.futures
+import csv
+import itertools
+import json
+import os
+import sqlite3
 import sys
+import threading
+import time
 from web3 import Web3
-from web3.middleware import geth_poa_middleware
+from web3.exceptions import TransactionNotFound
+
+from connection import connect
+from keystore_cache import DEFAULT_KEY_TTL, KEY_CACHE, sign_and_send
+from receipt_tracker import ReceiptTracker
 
 # Configuración por defecto
 DEFAULT_IPC_PATH = "/home/simonll4/Desktop/blockchain-testnets/bfatest/node/geth.ipc"
 DEFAULT_UNIT = "wei"
 
+# Cantidad de consultas por batch JSON-RPC (geth limita por defecto a 1000)
+DEFAULT_BATCH_SIZE = 1000
+
+# balance-history
+DEFAULT_HISTORY_CONCURRENCY = 4
+VALUE_WORDS = 4  # Balances de 256 bits como cuatro palabras uint64 (formato npy)
+WORD_MASK = (1 << 64) - 1
+BALANCE_CACHE_CHUNK = 500  # Direcciones por consulta a la caché de balances
+
+# transfer-batch
+TRANSFER_GAS = 21000  # Gas de una transferencia simple entre cuentas
+RECEIPT_REPORT_INTERVAL = 2.0
+DEFAULT_RECEIPT_TIMEOUT = 300
+
+# transfer: mismo tiempo de espera que wait_for_transaction_receipt
+RECEIPT_TIMEOUT = 120
+
 
 def init_web3_connection(uri):
     """Inicializa y valida la conexión con el nodo Ethereum"""
     try:
-        w3 = Web3(Web3.IPCProvider(uri))
-        w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-
-        if not w3.is_connected():
-            raise ConnectionError(
-                f"No se pudo conectar al nodo Ethereum mediante {uri}"
-            )
-
-        return w3
+        return connect(uri)
     except Exception as e:
         raise ConnectionError(f"Error de conexión: {str(e)}")
 
@@ -58,7 +104,7 @@ def balance(w3, account_ref, unit):
         sys.exit(1)
 
 
-def transfer(w3, src_ref, dst_ref, amount, unit, password):
+def transfer(w3, src_ref, dst_ref, amount, unit, password, keystore=None):
     """Transfiere ether de una cuenta a otra."""
     try:
         # Obtener las cuentas
@@ -79,24 +125,39 @@ def transfer(w3, src_ref, dst_ref, amount, unit, password):
             )
             sys.exit(1)
 
-        # Desbloquear cuenta origen si está en el nodo
-        if src in w3.eth.accounts:
-            if not unlock_account(w3, src, password):
-                print("No se pudo desbloquear la cuenta origen", file=sys.stderr)
-                sys.exit(1)
+        # Se crea antes de enviar para no perder el bloque de la transacción
+        tracker = ReceiptTracker(w3)
 
-        # Construir y enviar transacción
-        tx_hash = w3.eth.send_transaction(
-            {
-                "from": src,
-                "to": dst,
-                "value": amount_wei,
-                # calculo de gas automatico
-            }
-        )
+        if keystore:
+            # Firma local con la clave del keystore: no se desbloquea la cuenta en el nodo
+            tx = {"from": src, "to": dst, "value": amount_wei}
+            tx["gas"] = w3.eth.estimate_gas(tx)
+            tx.update(
+                nonce=w3.eth.get_transaction_count(src, "pending"),
+                gasPrice=w3.eth.gas_price,
+                chainId=w3.eth.chain_id,
+            )
+            tx_hash = sign_and_send(w3, KEY_CACHE.get(src, keystore, password), tx)
+        else:
+            # Desbloquear cuenta origen si está en el nodo
+            if src in w3.eth.accounts:
+                if not unlock_account(w3, src, password):
+                    print("No se pudo desbloquear la cuenta origen", file=sys.stderr)
+                    sys.exit(1)
+
+            # Construir y enviar transacción
+            tx_hash = w3.eth.send_transaction(
+                {
+                    "from": src,
+                    "to": dst,
+                    "value": amount_wei,
+                    # calculo de gas automatico
+                }
+            )
 
         # Esperar por la confirmación de la transacción
-        tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        tx_receipt = tracker.wait(tx_hash, RECEIPT_TIMEOUT)
+        tracker.stop()
 
         if tx_receipt.status == 1:
             print(f"Transferencia exitosa. TX Hash: {tx_hash.hex()}")
@@ -111,18 +172,549 @@ def transfer(w3, src_ref, dst_ref, amount, unit, password):
         sys.exit(1)
 
 
-def accounts(w3):
-    """Lista las cuentas asociadas con un nodo y su balance"""
+def read_transfer_file(path, unit):
+    """
+    Lee un CSV de transferencias (destino,monto) y devuelve una lista de
+    (destino, monto en wei). Admite una fila de cabecera y líneas que empiezan con '#'.
+    """
+    transfers = []
+    with open(path, newline="") as f:
+        for line_number, row in enumerate(csv.reader(f), 1):
+            if not row or not row[0].strip() or row[0].lstrip().startswith("#"):
+                continue
+            if not transfers and not Web3.is_address(row[0].strip()) and line_number == 1:
+                continue  # Cabecera
+            try:
+                to = Web3.to_checksum_address(row[0].strip())
+                amount_wei = Web3.to_wei(row[1].strip(), unit)
+            except Exception:
+                raise ValueError(f"Línea inválida en {path}:{line_number}: {','.join(row)}")
+            transfers.append((to, amount_wei))
+    return transfers
+
+
+class TransferProgress:
+    """
+    Avance de un transfer-batch, guardado como JSON lines para poder reanudarlo.
+
+    Cada línea actualiza el estado de una fila del CSV: antes de enviarla se
+    registra su destino, monto y nonce; una vez enviada, su hash; al
+    confirmarse, su estado final y bloque.
+    """
+
+    def __init__(self, path=None):
+        self.rows = {}
+        self.lock = threading.Lock()
+        self.file = None
+        if path is None:
+            return
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Línea incompleta si el proceso se interrumpió
+                    self.rows.setdefault(entry["row"], {}).update(entry)
+        self.file = open(path, "a")
+
+    def record(self, **entry):
+        with self.lock:
+            self.rows.setdefault(entry["row"], {}).update(entry)
+            if self.file:
+                self.file.write(json.dumps(entry) + "\n")
+                self.file.flush()
+
+    def count(self, status):
+        with self.lock:
+            return sum(1 for entry in self.rows.values() if entry.get("status") == status)
+
+    def close(self):
+        """Cierra el archivo; los recibos que lleguen después ya no se guardan."""
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+
+def fetch_receipts(w3, tx_hashes):
+    """
+    Devuelve {hash: (status, bloque)} de las transacciones ya minadas. Las
+    consultas se envían en batches JSON-RPC si el proveedor los admite.
+    """
+    receipts = {}
+    make_batch_request = getattr(w3.provider, "make_batch_request", None)
+    if make_batch_request is None:
+        for tx_hash in tx_hashes:
+            try:
+                receipt = w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+            receipts[tx_hash] = (receipt.status, receipt.blockNumber)
+        return receipts
+
+    for start in range(0, len(tx_hashes), DEFAULT_BATCH_SIZE):
+        chunk = tx_hashes[start : start + DEFAULT_BATCH_SIZE]
+        responses = make_batch_request(
+            [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in chunk]
+        )
+        for tx_hash, response in zip(chunk, responses):
+            receipt = response.get("result")
+            if receipt:
+                receipts[tx_hash] = (int(receipt["status"], 16), int(receipt["blockNumber"], 16))
+    return receipts
+
+
+def record_receipt(progress, row, future):
+    """Registra el resultado de una transferencia cuando se resuelve su recibo."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    receipt = future.result()
+    progress.record(
+        row=row,
+        status="confirmed" if receipt.status == 1 else "failed",
+        block=receipt.blockNumber,
+    )
+
+
+def wait_receipts(progress, futures, timeout):
+    """Espera los recibos hasta `timeout` segundos, informando el avance por stderr."""
+    deadline = time.monotonic() + timeout
+    remaining = list(futures)
+    while remaining:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return
+        _, not_done = concurrent.futures.wait(
+            remaining, timeout=min(RECEIPT_REPORT_INTERVAL, left)
+        )
+        if len(not_done) != len(remaining):
+            print(
+                f"Confirmadas: {progress.count('confirmed')}, fallidas: {progress.count('failed')}, "
+                f"pendientes: {len(not_done)}",
+                file=sys.stderr,
+            )
+        remaining = list(not_done)
+
+
+def transfer_batch(
+    w3,
+    src_ref,
+    path,
+    unit,
+    password,
+    progress_path=None,
+    gas=TRANSFER_GAS,
+    timeout=DEFAULT_RECEIPT_TIMEOUT,
+    keystore=None,
+):
+    """Envía fondos desde una cuenta a todos los destinatarios de un CSV."""
+    progress = None
+    try:
+        src = get_account(w3, src_ref)
+        transfers = read_transfer_file(path, unit)
+        progress = TransferProgress(progress_path)
+
+        # El archivo de progreso debe corresponder al mismo CSV
+        for row, entry in progress.rows.items():
+            if row >= len(transfers) or (entry.get("to"), entry.get("value")) != transfers[row]:
+                print(
+                    f"El archivo de progreso '{progress_path}' no corresponde a '{path}' (fila {row})",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+
+        # Transacciones enviadas en una ejecución anterior que aún no se confirmaron
+        pending = {
+            entry["tx"]: row
+            for row, entry in progress.rows.items()
+            if "tx" in entry and "status" not in entry
+        }
+        to_send = [row for row in range(len(transfers)) if "tx" not in progress.rows.get(row, {})]
+
+        # Filas cuyo nonce se registró pero no su hash: si ese nonce ya se usó, la
+        # transacción pudo haberse enviado y reenviarla pagaría dos veces
+        next_nonce = w3.eth.get_transaction_count(src, "pending")
+        uncertain = [
+            row
+            for row in to_send
+            if "nonce" in progress.rows.get(row, {}) and progress.rows[row]["nonce"] < next_nonce
+        ]
+        if uncertain:
+            print(
+                f"No se puede reanudar: las filas {uncertain} pudieron haberse enviado. "
+                f"Verifique las transacciones de {src} y corrija '{progress_path}'",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+        gas_price = w3.eth.gas_price
+        if to_send:
+            # sirve para evitar enviar transacciones que van a fallar
+            needed = sum(transfers[row][1] for row in to_send) + len(to_send) * gas * gas_price
+            balance_src = w3.eth.get_balance(src)
+            if balance_src < needed:
+                print(
+                    f"Saldo insuficiente en la cuenta origen. Balance: {Web3.from_wei(balance_src, 'ether')} ETH, "
+                    f"Necesario (montos + gas): {Web3.from_wei(needed, 'ether')} ETH",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+
+            if keystore:
+                # Descifrar la clave antes de empezar, para detectar una contraseña incorrecta
+                KEY_CACHE.get(src, keystore, password)
+            # Desbloquear cuenta origen si está en el nodo, con margen para todo el envío
+            elif src in w3.eth.accounts:
+                if not unlock_account(w3, src, password, 30 + len(to_send)):
+                    print("No se pudo desbloquear la cuenta origen", file=sys.stderr)
+                    sys.exit(1)
+
+        print(
+            f"Transferencias: {len(transfers)}, a enviar: {len(to_send)}, "
+            f"pendientes de una ejecución anterior: {len(pending)}"
+        )
+
+        # Un único tracker resuelve los recibos recorriendo cada bloque nuevo; se crea
+        # antes de consultar y enviar para no perder ningún bloque
+        tracker = ReceiptTracker(w3)
+        futures = {}  # fila -> future del recibo
+
+        def watch(row, tx_hash):
+            future = tracker.track(tx_hash)
+            future.add_done_callback(lambda f: record_receipt(progress, row, f))
+            futures[row] = future
+
+        # Las transacciones de una ejecución anterior ya minadas se resuelven en un batch
+        for tx_hash, (status, block_number) in fetch_receipts(w3, list(pending)).items():
+            progress.record(
+                row=pending.pop(tx_hash),
+                status="confirmed" if status == 1 else "failed",
+                block=block_number,
+            )
+        for tx_hash, row in pending.items():
+            watch(row, tx_hash)
+
+        try:
+            # Nonces asignados localmente: las transacciones se envían sin esperar confirmación
+            nonce = next_nonce
+            chain_id = w3.eth.chain_id if keystore else None
+            for row in to_send:
+                to, value = transfers[row]
+                progress.record(row=row, to=to, value=value, nonce=nonce)
+                tx = {
+                    "from": src,
+                    "to": to,
+                    "value": value,
+                    "nonce": nonce,
+                    "gas": gas,
+                    "gasPrice": gas_price,
+                }
+                try:
+                    if keystore:
+                        tx["chainId"] = chain_id
+                        tx_hash = sign_and_send(w3, KEY_CACHE.get(src, keystore, password), tx)
+                    else:
+                        tx_hash = w3.eth.send_transaction(tx)
+                    tx_hash = tx_hash.hex()
+                except Exception as e:
+                    # El estado del nonce es incierto: se detiene el envío y se puede reanudar
+                    print(f"Error al enviar la fila {row} ({to}): {str(e)}", file=sys.stderr)
+                    break
+                progress.record(row=row, tx=tx_hash)
+                watch(row, tx_hash)
+                nonce += 1
+        finally:
+            KEY_CACHE.clear()
+
+        wait_receipts(progress, futures.values(), timeout)
+        tracker.stop()
+
+        confirmed = progress.count("confirmed")
+        failed = [row for row, entry in sorted(progress.rows.items()) if entry.get("status") == "failed"]
+        waiting = sorted(row for row, entry in progress.rows.items() if "tx" in entry and "status" not in entry)
+        unsent = [row for row in range(len(transfers)) if "tx" not in progress.rows.get(row, {})]
+
+        print(
+            f"Confirmadas: {confirmed}, fallidas: {len(failed)}, "
+            f"pendientes: {len(waiting)}, sin enviar: {len(unsent)}"
+        )
+        for label, rows in (("Fallida", failed), ("Pendiente", waiting), ("Sin enviar", unsent)):
+            for row in rows:
+                tx_hash = progress.rows.get(row, {}).get("tx", "-")
+                print(f"{label}: fila {row} -> {transfers[row][0]} (TX {tx_hash})", file=sys.stderr)
+
+        if failed or waiting or unsent:
+            if progress_path and (waiting or unsent):
+                print(f"Para reanudar, ejecute nuevamente con --progress {progress_path}", file=sys.stderr)
+            sys.exit(1)
+    except ValueError as e:
+        print(f"Error en los parámetros de la transferencia: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error en transferencia masiva: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if progress:
+            progress.close()
+
+
+def fetch_balances(w3, addresses, block_number, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Genera (dirección, balance en wei, error) para cada dirección, con todos los
+    balances tomados del bloque `block_number`.
+
+    Las consultas se envían en batches JSON-RPC de `batch_size` direcciones y los
+    resultados se entregan a medida que llega cada batch. Si el proveedor no
+    admite batches se consulta dirección por dirección.
+    """
+    make_batch_request = getattr(w3.provider, "make_batch_request", None)
+    addresses = iter(addresses)
+    while True:
+        chunk = list(itertools.islice(addresses, batch_size))
+        if not chunk:
+            return
+
+        if make_batch_request is None:
+            for addr in chunk:
+                try:
+                    yield addr, w3.eth.get_balance(addr, block_number), None
+                except Exception as e:
+                    yield addr, None, str(e)
+            continue
+
+        responses = make_batch_request(
+            [("eth_getBalance", [addr, hex(block_number)]) for addr in chunk]
+        )
+        for addr, response in zip(chunk, responses):
+            if "error" in response:
+                yield addr, None, response["error"].get("message", str(response["error"]))
+            else:
+                yield addr, int(response["result"], 16), None
+
+
+class BalanceCache:
+    """Caché en disco (SQLite) de los balances ya consultados, por (dirección, bloque)."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS balances "
+            "(address TEXT, block INTEGER, balance TEXT, PRIMARY KEY (address, block))"
+        )
+
+    def lookup(self, addresses, first_block, last_block):
+        """
+        Devuelve {(dirección, bloque): balance} de los puntos guardados en el rango.
+        Se filtra por dirección y bloque para recorrer la clave primaria (un rango
+        por dirección) en lugar de toda la tabla.
+        """
+        addresses = list(dict.fromkeys(addresses))
+        found = {}
+        # SQLite limita los parámetros por consulta (999 en versiones antiguas)
+        for i in range(0, len(addresses), BALANCE_CACHE_CHUNK):
+            chunk = addresses[i : i + BALANCE_CACHE_CHUNK]
+            rows = self.db.execute(
+                "SELECT address, block, balance FROM balances "
+                f"WHERE address IN ({', '.join('?' * len(chunk))}) AND block BETWEEN ? AND ?",
+                (*chunk, first_block, last_block),
+            )
+            found.update(((addr, block), int(value)) for addr, block, value in rows)
+        return found
+
+    def store(self, points):
+        """Guarda {(dirección, bloque): balance}; el balance se guarda como texto (256 bits)."""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO balances VALUES (?, ?, ?)",
+            [(addr, block, str(value)) for (addr, block), value in points.items()],
+        )
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+def fetch_balance_points(w3, points):
+    """Consulta el balance de cada (dirección, bloque) en un único batch JSON-RPC."""
+    make_batch_request = getattr(w3.provider, "make_batch_request", None)
+    if make_batch_request is None:
+        return [w3.eth.get_balance(addr, block) for addr, block in points]
+
+    responses = make_batch_request(
+        [("eth_getBalance", [addr, hex(block)]) for addr, block in points]
+    )
+    balances = []
+    for (addr, block), response in zip(points, responses):
+        if "error" in response:
+            raise ValueError(
+                f"No se pudo obtener el balance de {addr} en el bloque {block}: "
+                f"{response['error'].get('message', response['error'])}"
+            )
+        balances.append(int(response["result"], 16))
+    return balances
+
+
+def balance_history(
+    w3,
+    account_refs,
+    address_file,
+    first_block,
+    last_block,
+    stride,
+    unit,
+    fmt="csv",
+    output=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    concurrency=DEFAULT_HISTORY_CONCURRENCY,
+    cache_path=None,
+):
+    """Imprime o guarda el balance de varias cuentas cada `stride` bloques de un rango."""
+    try:
+        addresses = [get_account(w3, ref) for ref in account_refs or []]
+        if address_file:
+            addresses += list(read_address_file(address_file))
+        if not addresses:
+            print("Debe indicar al menos una cuenta (--account o --file)", file=sys.stderr)
+            sys.exit(1)
+        if stride < 1:
+            print("El paso entre bloques (--stride) debe ser positivo", file=sys.stderr)
+            sys.exit(1)
+        if fmt == "npy" and not output:
+            print("El formato npy requiere un archivo de salida (--output)", file=sys.stderr)
+            sys.exit(1)
+
+        last_block = w3.eth.block_number if last_block == "latest" else int(last_block)
+        blocks = range(first_block, last_block + 1, stride)
+        cache = BalanceCache(cache_path) if cache_path else None
+
+        # Los bloques se procesan por ventanas que ocupan `concurrency` batches, para
+        # escribir la salida a medida que avanza sin guardar todo en memoria
+        window = max(1, batch_size * concurrency // len(addresses))
+        cached = fetched = 0
+
+        if fmt == "csv":
+            out = open(output, "w", newline="") if output else sys.stdout
+            writer = csv.writer(out)
+            writer.writerow(["block"] + addresses)
+        else:
+            rows = []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for start in range(0, len(blocks), window):
+                window_blocks = blocks[start : start + window]
+                values = (
+                    cache.lookup(addresses, window_blocks[0], window_blocks[-1]) if cache else {}
+                )
+                missing = [
+                    (addr, block)
+                    for block in window_blocks
+                    for addr in addresses
+                    if (addr, block) not in values
+                ]
+                cached += len(window_blocks) * len(addresses) - len(missing)
+
+                chunks = [missing[i : i + batch_size] for i in range(0, len(missing), batch_size)]
+                for chunk, balances in zip(
+                    chunks, executor.map(lambda c: fetch_balance_points(w3, c), chunks)
+                ):
+                    points = dict(zip(chunk, balances))
+                    values.update(points)
+                    if cache:
+                        cache.store(points)
+                    fetched += len(points)
+
+                for block in window_blocks:
+                    balances = [values[(addr, block)] for addr in addresses]
+                    if fmt == "csv":
+                        writer.writerow(
+                            [block]
+                            + [b if unit == "wei" else Web3.from_wei(b, unit) for b in balances]
+                        )
+                    else:
+                        rows.append(balances)
+                if fmt == "csv":
+                    out.flush()
+
+        if fmt == "csv":
+            if output:
+                out.close()
+        else:
+            save_balance_history(output, blocks, addresses, rows)
+        if cache:
+            cache.close()
+
+        print(
+            f"{len(blocks)} bloques x {len(addresses)} cuentas: "
+            f"{fetched} puntos consultados, {cached} desde la caché",
+            file=sys.stderr,
+        )
+    except ValueError as e:
+        print(f"Error en los parámetros de la consulta: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error al obtener el historial de balances: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+def save_balance_history(path, blocks, addresses, rows):
+    """
+    Guarda la serie en un .npz: `blocks` (uint64), `addresses` y los balances en wei
+    como `value_w0` .. `value_w3` (uint64, bloques x cuentas), de la palabra menos
+    significativa a la más significativa (balance = sum(value_wi << 64*i)).
+    """
     try:
-        accs = w3.eth.accounts
-        if accs:
-            print("Cuentas disponibles en el nodo:")
-            for i, acc in enumerate(accs):
-                balance_wei = w3.eth.get_balance(acc)
-                balance_eth = Web3.from_wei(balance_wei, "ether")
-                print(f"{i}. {acc} - Balance: {balance_eth} ETH")
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("El formato npy requiere numpy (pip install numpy)")
+
+    arrays = {
+        "blocks": np.array(blocks, dtype=np.uint64),
+        "addresses": np.array(addresses),
+    }
+    for i in range(VALUE_WORDS):
+        arrays[f"value_w{i}"] = np.array(
+            [[(b >> (64 * i)) & WORD_MASK for b in row] for row in rows], dtype=np.uint64
+        ).reshape(len(rows), len(addresses))
+    np.savez(path, **arrays)
+
+
+def read_address_file(path):
+    """Genera las direcciones de un archivo (una por línea; se ignoran líneas vacías y '#')."""
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                yield Web3.to_checksum_address(line)
+            except ValueError:
+                raise ValueError(f"Dirección inválida en {path}:{line_number}: '{line}'")
+
+
+def accounts(w3, address_file=None, block="latest", batch_size=DEFAULT_BATCH_SIZE):
+    """Lista las cuentas del nodo (o de un archivo) y su balance en un mismo bloque"""
+    try:
+        # Fijar el bloque para que todos los balances sean consistentes
+        block_number = w3.eth.block_number if block == "latest" else int(block)
+
+        if address_file:
+            accs = read_address_file(address_file)
+            print(f"Cuentas de '{address_file}' (bloque {block_number}):")
         else:
-            print("No hay cuentas en este nodo.")
+            accs = w3.eth.accounts
+            if not accs:
+                print("No hay cuentas en este nodo.")
+                return
+            print(f"Cuentas disponibles en el nodo (bloque {block_number}):")
+
+        for i, (acc, balance_wei, error) in enumerate(
+            fetch_balances(w3, accs, block_number, batch_size)
+        ):
+            if error is not None:
+                print(f"{i}. {acc} - Error: {error}")
+                continue
+            balance_eth = Web3.from_wei(balance_wei, "ether")
+            print(f"{i}. {acc} - Balance: {balance_eth} ETH")
     except Exception as e:
         print(f"Error al listar cuentas: {str(e)}", file=sys.stderr)
         sys.exit(1)
@@ -180,7 +772,7 @@ def get_account(w3, account_ref):
         sys.exit(1)
 
 
-def unlock_account(w3, account, password):
+def unlock_account(w3, account, password, duration=30):
     """Desbloquea una cuenta temporalmente para realizar transacciones"""
     if account not in w3.eth.accounts:
         print(
@@ -191,8 +783,8 @@ def unlock_account(w3, account, password):
 
     try:
         return w3.geth.personal.unlock_account(
-            account, password, 30
-        )  # desbloquea por 30 segundos
+            account, password, duration
+        )  # desbloquea por `duration` segundos (30 por defecto)
     except Exception as e:
         print(f"Error al desbloquear cuenta: {str(e)}", file=sys.stderr)
         sys.exit(1)
@@ -208,7 +800,9 @@ if __name__ == "__main__":
     )
 
     parser.add_argument(
-        "--uri", help="URI para la conexión con geth", default=DEFAULT_IPC_PATH
+        "--uri",
+        help="URI para la conexión con geth (ruta IPC, ipc://, http:// o ws://)",
+        default=DEFAULT_IPC_PATH,
     )
 
     # Añadimos manualmente el parámetro de ayuda
@@ -280,8 +874,127 @@ if __name__ == "__main__":
         help="Contraseña para desbloquear la cuenta origen",
         required=True,
     )
-    # Comando accounts (sin parámetros)
-    create_subparser("accounts", help="Lista las cuentas disponibles en el nodo")
+    # Comando transfer-batch
+    transfer_batch_parser = create_subparser(
+        "transfer-batch", help="Envía fondos a los destinatarios de un CSV (destino,monto)"
+    )
+    transfer_batch_parser.add_argument(
+        "--from",
+        help="Cuenta origen (dirección o índice)",
+        dest="src",
+        type=address_or_index,
+        required=True,
+    )
+    transfer_batch_parser.add_argument(
+        "--file", help="CSV con una transferencia por línea: destino,monto", required=True
+    )
+    transfer_batch_parser.add_argument(
+        "--unit",
+        help="Unidades de los montos del CSV",
+        choices=["wei", "Kwei", "Mwei", "Gwei", "microether", "milliether", "ether"],
+        default=DEFAULT_UNIT,
+    )
+    transfer_batch_parser.add_argument(
+        "-p",
+        "--password",
+        help="Contraseña para desbloquear la cuenta origen",
+        required=True,
+    )
+    transfer_batch_parser.add_argument(
+        "--progress",
+        help="Archivo donde se guarda el avance; si existe, se reanuda el envío",
+    )
+    transfer_batch_parser.add_argument(
+        "--gas", help="Gas por transacción", type=int, default=TRANSFER_GAS
+    )
+    transfer_batch_parser.add_argument(
+        "--timeout",
+        help="Segundos a esperar las confirmaciones una vez enviado todo",
+        type=float,
+        default=DEFAULT_RECEIPT_TIMEOUT,
+    )
+    # Firma local (transfer y transfer-batch)
+    for signing_parser in (transfer_parser, transfer_batch_parser):
+        signing_parser.add_argument(
+            "--keystore",
+            help="Archivo o directorio keystore para firmar localmente (la contraseña es la del keystore)",
+        )
+        signing_parser.add_argument(
+            "--key-ttl",
+            help="Segundos que la clave descifrada se mantiene en memoria",
+            type=float,
+            default=DEFAULT_KEY_TTL,
+        )
+
+    # Comando balance-history
+    history_parser = create_subparser(
+        "balance-history", help="Balance de varias cuentas cada N bloques de un rango"
+    )
+    history_parser.add_argument(
+        "-a",
+        "--account",
+        help="Dirección de la cuenta o índice numérico (puede repetirse)",
+        dest="accounts",
+        type=address_or_index,
+        action="append",
+    )
+    history_parser.add_argument(
+        "--file", help="Archivo con más direcciones, una por línea"
+    )
+    history_parser.add_argument(
+        "--from-block", help="Primer bloque del rango", type=int, required=True
+    )
+    history_parser.add_argument(
+        "--to-block", help="Último bloque del rango", default="latest"
+    )
+    history_parser.add_argument(
+        "--stride", help="Cantidad de bloques entre puntos de la serie", type=int, default=1
+    )
+    history_parser.add_argument(
+        "--unit",
+        help="Unidades de los balances en CSV (en npy siempre son wei)",
+        choices=["wei", "Kwei", "Mwei", "Gwei", "microether", "milliether", "ether"],
+        default=DEFAULT_UNIT,
+    )
+    history_parser.add_argument(
+        "--format", help="Formato de salida", choices=["csv", "npy"], default="csv"
+    )
+    history_parser.add_argument(
+        "--output", help="Archivo de salida (por defecto, CSV por la salida estándar)"
+    )
+    history_parser.add_argument(
+        "--batch-size",
+        help="Consultas por batch JSON-RPC",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+    )
+    history_parser.add_argument(
+        "--concurrency",
+        help="Batches en curso a la vez",
+        type=int,
+        default=DEFAULT_HISTORY_CONCURRENCY,
+    )
+    history_parser.add_argument(
+        "--cache", help="Archivo SQLite donde se guardan los balances ya consultados"
+    )
+
+    # Comando accounts
+    accounts_parser = create_subparser(
+        "accounts", help="Lista las cuentas disponibles en el nodo y su balance"
+    )
+    accounts_parser.add_argument(
+        "--file",
+        help="Archivo con las direcciones a consultar, una por línea (por defecto, las cuentas del nodo)",
+    )
+    accounts_parser.add_argument(
+        "--block", help="Bloque en el que se consultan los balances", default="latest"
+    )
+    accounts_parser.add_argument(
+        "--batch-size",
+        help="Consultas por batch JSON-RPC",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+    )
 
     # Manejo personalizado de la ayuda
     if len(sys.argv) == 1 or "-h" in sys.argv or "--help" in sys.argv:
@@ -300,13 +1013,45 @@ if __name__ == "__main__":
         # Inicializar conexión con el nodo
         w3 = init_web3_connection(args.uri)
 
+        if args.command in ("transfer", "transfer-batch"):
+            KEY_CACHE.ttl = args.key_ttl
+
         # Ejecutar comando
         if args.command == "balance":
             balance(w3, args.account, args.unit)
         elif args.command == "transfer":
-            transfer(w3, args.src, args.dst, args.amount, args.unit, args.password)
+            transfer(
+                w3, args.src, args.dst, args.amount, args.unit, args.password, args.keystore
+            )
+        elif args.command == "transfer-batch":
+            transfer_batch(
+                w3,
+                args.src,
+                args.file,
+                args.unit,
+                args.password,
+                args.progress,
+                args.gas,
+                args.timeout,
+                args.keystore,
+            )
+        elif args.command == "balance-history":
+            balance_history(
+                w3,
+                args.accounts,
+                args.file,
+                args.from_block,
+                args.to_block,
+                args.stride,
+                args.unit,
+                args.format,
+                args.output,
+                args.batch_size,
+                args.concurrency,
+                args.cache,
+            )
         elif args.command == "accounts":
-            accounts(w3)
+            accounts(w3, args.file, args.block, args.batch_size)
         else:
             print(f"Comando desconocido: {args.command}", file=sys.stderr)
             sys.exit(1)
@@ -0,0 +1,174 @@
+"""
+Exportación columnar de las transferencias encontradas por show_transactions.
+
+Cada transferencia (src, dst, value, block) se guarda en columnas tipadas,
+listas para abrirse con mmap sin volver a parsear texto:
+
+- src, dst: direcciones como 20 bytes fijos (uint8[20]; ceros si no hay destino).
+- value_w0 .. value_w3: el valor de 256 bits en cuatro palabras uint64,
+  de la menos significativa (w0) a la más significativa (w3).
+- block: número de bloque (uint64).
+
+Formatos:
+- npy: un archivo `<columna>.npy` por columna dentro del directorio destino.
+  Se leen con `numpy.load(path, mmap_mode="r")`.
+- arrow: un único archivo `transfers.arrow` en formato Arrow IPC (file),
+  con src/dst como fixed_size_binary(20). Se lee con `pyarrow.memory_map`.
+
+Las transferencias se procesan en bloques de `chunk_size` filas, por lo que la
+memoria usada no depende del tamaño del resultado. NumPy (y pyarrow para el
+formato arrow) son dependencias opcionales que sólo se importan al exportar.
+"""
+
+import os
+import shutil
+
+DEFAULT_CHUNK_SIZE = 65536
+ADDRESS_SIZE = 20
+VALUE_WORDS = 4
+WORD_MASK = (1 << 64) - 1
+
+COLUMNS = ["src", "dst"] + [f"value_w{i}" for i in range(VALUE_WORDS)] + ["block"]
+ARROW_FILENAME = "transfers.arrow"
+
+
+def _import_numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("La exportación columnar requiere numpy (pip install numpy)")
+    return np
+
+
+def _address_bytes(addr):
+    """Convierte una dirección hexadecimal ('' si no hay destino) a 20 bytes."""
+    return bytes.fromhex(addr[2:]) if addr else bytes(ADDRESS_SIZE)
+
+
+def _build_chunk(np, rows):
+    """Convierte una lista de transferencias en un diccionario de columnas NumPy."""
+    n = len(rows)
+    chunk = {
+        "src": np.frombuffer(
+            b"".join(_address_bytes(src) for src, _, _, _ in rows), dtype=np.uint8
+        ).reshape(n, ADDRESS_SIZE),
+        "dst": np.frombuffer(
+            b"".join(_address_bytes(dst) for _, dst, _, _ in rows), dtype=np.uint8
+        ).reshape(n, ADDRESS_SIZE),
+        "block": np.fromiter((block for _, _, _, block in rows), dtype=np.uint64, count=n),
+    }
+    for i in range(VALUE_WORDS):
+        chunk[f"value_w{i}"] = np.fromiter(
+            ((value >> (64 * i)) & WORD_MASK for _, _, value, _ in rows),
+            dtype=np.uint64,
+            count=n,
+        )
+    return chunk
+
+
+class NpyColumnsWriter:
+    """
+    Escribe cada columna en su propio archivo .npy.
+
+    Como la cabecera .npy incluye la cantidad de filas, los datos se vuelcan
+    primero a archivos temporales y la cabecera se escribe al cerrar.
+    """
+
+    def __init__(self, directory):
+        self.np = _import_numpy()
+        self.directory = directory
+        self.rows = 0
+        self.dtypes = {}
+        self.files = {
+            name: open(os.path.join(directory, f"{name}.npy.part"), "wb")
+            for name in COLUMNS
+        }
+
+    def write_chunk(self, chunk):
+        for name, array in chunk.items():
+            self.dtypes[name] = array.dtype
+            self.files[name].write(array.tobytes())
+        self.rows += len(chunk["block"])
+
+    def close(self):
+        np = self.np
+        for name, part in self.files.items():
+            part.close()
+            shape = (self.rows, ADDRESS_SIZE) if name in ("src", "dst") else (self.rows,)
+            dtype = self.dtypes.get(name, np.uint8 if name in ("src", "dst") else np.uint64)
+            path = os.path.join(self.directory, f"{name}.npy")
+            with open(path, "wb") as out, open(part.name, "rb") as data:
+                np.lib.format.write_array_header_1_0(
+                    out, {"descr": np.dtype(dtype).str, "fortran_order": False, "shape": shape}
+                )
+                shutil.copyfileobj(data, out)
+            os.remove(part.name)
+
+
+class ArrowWriter:
+    """Escribe las columnas como record batches en un archivo Arrow IPC."""
+
+    def __init__(self, directory):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise RuntimeError("La exportación Arrow requiere pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.rows = 0
+        self.schema = pa.schema(
+            [
+                ("src", pa.binary(ADDRESS_SIZE)),
+                ("dst", pa.binary(ADDRESS_SIZE)),
+            ]
+            + [(f"value_w{i}", pa.uint64()) for i in range(VALUE_WORDS)]
+            + [("block", pa.uint64())]
+        )
+        self.sink = pa.OSFile(os.path.join(directory, ARROW_FILENAME), "wb")
+        self.writer = pa.ipc.new_file(self.sink, self.schema)
+
+    def write_chunk(self, chunk):
+        pa = self.pa
+        n = len(chunk["block"])
+        arrays = []
+        for field in self.schema:
+            array = chunk[field.name]
+            if field.name in ("src", "dst"):
+                arrays.append(
+                    pa.FixedSizeBinaryArray.from_buffers(
+                        field.type, n, [None, pa.py_buffer(array.tobytes())]
+                    )
+                )
+            else:
+                arrays.append(pa.array(array, type=field.type))
+        self.writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        self.rows += n
+
+    def close(self):
+        self.writer.close()
+        self.sink.close()
+
+
+WRITERS = {"npy": NpyColumnsWriter, "arrow": ArrowWriter}
+
+
+def export_transactions(transactions, directory, fmt="npy", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Exporta un flujo de transferencias (src, dst, value, block) en formato columnar.
+
+    Devuelve la cantidad de filas escritas.
+    """
+    np = _import_numpy()
+    os.makedirs(directory, exist_ok=True)
+    writer = WRITERS[fmt](directory)
+    try:
+        rows = []
+        for transaction in transactions:
+            rows.append(transaction)
+            if len(rows) >= chunk_size:
+                writer.write_chunk(_build_chunk(np, rows))
+                rows = []
+        if rows:
+            writer.write_chunk(_build_chunk(np, rows))
+    finally:
+        writer.close()
+    return writer.rows
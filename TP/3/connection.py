@@ -0,0 +1,270 @@
+"""
+Conexión con el nodo Ethereum a partir de una URI, compartida por los scripts del TP.
+
+URIs aceptadas:
+- ipc:///ruta/al/geth.ipc o directamente /ruta/al/geth.ipc
+- http://host:puerto o https://...: sesión HTTP con un pool de conexiones
+  keep-alive, que se reutilizan entre requerimientos (y entre hilos).
+- ws://host:puerto o wss://...: una única conexión WebSocket persistente y
+  multiplexada: varios hilos pueden tener requerimientos en curso a la vez y
+  las respuestas se asocian a cada uno por su `id` JSON-RPC. Además admite
+  suscripciones (`eth_subscribe`), cuyas notificaciones se entregan en una cola.
+
+Todos los proveedores creados por make_provider admiten además
+`make_batch_request(calls)`, que envía una lista de (método, parámetros) en un
+único batch JSON-RPC y devuelve las respuestas en el mismo orden.
+
+Ejemplo:
+    w3 = connect("ws://localhost:8546")
+"""
+
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import queue
+import socket
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from web3._utils.encoding import Web3JsonEncoder
+from web3._utils.request import make_post_request
+from web3._utils.threads import Timeout
+from web3.middleware import geth_poa_middleware
+from web3.providers.base import JSONBaseProvider
+from web3.providers.ipc import has_valid_json_rpc_ending
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_POOL_SIZE = 16
+
+
+def encode_batch(provider, calls):
+    """Codifica una lista de (método, parámetros) como batch JSON-RPC; devuelve (ids, datos)."""
+    batch = [
+        {"jsonrpc": "2.0", "method": method, "params": params, "id": next(provider.request_counter)}
+        for method, params in calls
+    ]
+    return [request["id"] for request in batch], json.dumps(batch, cls=Web3JsonEncoder)
+
+
+def order_batch_response(ids, responses):
+    """Ordena las respuestas de un batch según los ids de los requerimientos."""
+    if not isinstance(responses, list):
+        # El nodo rechazó el batch completo (p. ej. por exceder su límite)
+        raise ValueError(f"Batch rechazado por el nodo: {responses.get('error', responses)}")
+    by_id = {response.get("id"): response for response in responses}
+    return [
+        by_id.get(request_id, {"error": {"message": "Respuesta faltante en el batch"}})
+        for request_id in ids
+    ]
+
+
+class BatchHTTPProvider(Web3.HTTPProvider):
+    """HTTPProvider con soporte de batches JSON-RPC."""
+
+    def make_batch_request(self, calls):
+        ids, data = encode_batch(self, calls)
+        raw_response = make_post_request(
+            self.endpoint_uri, data.encode(), **self.get_request_kwargs()
+        )
+        return order_batch_response(ids, self.decode_rpc_response(raw_response))
+
+
+class BatchIPCProvider(Web3.IPCProvider):
+    """IPCProvider con soporte de batches JSON-RPC."""
+
+    def make_batch_request(self, calls):
+        ids, data = encode_batch(self, calls)
+        request = data.encode()
+
+        with self._lock, self._socket as sock:
+            try:
+                sock.sendall(request)
+            except BrokenPipeError:
+                sock = self._socket.reset()
+                sock.sendall(request)
+
+            raw_response = b""
+            with Timeout(self.timeout) as timeout:
+                while True:
+                    try:
+                        raw_response += sock.recv(65536)
+                    except socket.timeout:
+                        timeout.sleep(0)
+                        continue
+                    if raw_response and has_valid_json_rpc_ending(raw_response):
+                        try:
+                            responses = self.decode_rpc_response(raw_response)
+                        except ValueError:
+                            # Respuesta incompleta: seguir leyendo
+                            timeout.sleep(0)
+                            continue
+                        return order_batch_response(ids, responses)
+                    timeout.sleep(0)
+
+
+class MultiplexedWebsocketProvider(JSONBaseProvider):
+    """
+    Proveedor WebSocket que mantiene una conexión persistente en un hilo propio.
+
+    Los requerimientos se envían sin esperar a que termine el anterior; una
+    tarea lectora entrega cada respuesta al requerimiento con el mismo `id`.
+    Si la conexión se cae, los requerimientos pendientes fallan y el siguiente
+    requerimiento vuelve a conectar.
+    """
+
+    def __init__(self, endpoint_uri, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.endpoint_uri = endpoint_uri
+        self.timeout = timeout
+        self.request_counter = itertools.count()
+        self._ws = None
+        self._pending = {}
+        self._subscriptions = {}
+        self._loop = asyncio.new_event_loop()
+        self._connect_lock = None
+        threading.Thread(
+            target=self._loop.run_forever, name="ws-multiplexer", daemon=True
+        ).start()
+
+    def __str__(self):
+        return f"WS multiplexed connection {self.endpoint_uri}"
+
+    async def _connection(self):
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._ws is None:
+                import websockets
+
+                self._ws = await websockets.connect(self.endpoint_uri, max_size=None)
+                self._loop.create_task(self._read_responses(self._ws))
+        return self._ws
+
+    async def _read_responses(self, ws):
+        error = ConnectionError(f"Conexión WebSocket cerrada: {self.endpoint_uri}")
+        try:
+            async for raw in ws:
+                if isinstance(raw, str):
+                    raw = raw.encode()
+                response = self.decode_rpc_response(raw)
+                if isinstance(response, list):
+                    # Respuesta a un batch: cada elemento tiene su propio id
+                    for item in response:
+                        future = self._pending.pop(item.get("id"), None)
+                        if future is not None and not future.done():
+                            future.set_result(item)
+                    continue
+                if response.get("method") == "eth_subscription":
+                    params = response["params"]
+                    self._subscription_queue(params["subscription"]).put(params["result"])
+                    continue
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except Exception as e:
+            error = ConnectionError(f"Error en la conexión WebSocket: {e}")
+        finally:
+            if self._ws is ws:
+                self._ws = None
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+
+    async def _request(self, request_id, request_data):
+        ws = await self._connection()
+        future = self._loop.create_future()
+        self._pending[request_id] = future
+        await ws.send(request_data)
+        return await future
+
+    def make_request(self, method, params):
+        request_id = next(self.request_counter)
+        request_data = json.dumps(
+            {"jsonrpc": "2.0", "method": method, "params": params or [], "id": request_id},
+            cls=Web3JsonEncoder,
+        )
+        future = asyncio.run_coroutine_threadsafe(
+            self._request(request_id, request_data), self._loop
+        )
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            self._loop.call_soon_threadsafe(self._pending.pop, request_id, None)
+            raise
+
+    async def _request_batch(self, ids, request_data):
+        ws = await self._connection()
+        futures = [self._loop.create_future() for _ in ids]
+        self._pending.update(zip(ids, futures))
+        await ws.send(request_data)
+        return await asyncio.gather(*futures)
+
+    def make_batch_request(self, calls):
+        ids, request_data = encode_batch(self, calls)
+        future = asyncio.run_coroutine_threadsafe(
+            self._request_batch(ids, request_data), self._loop
+        )
+        try:
+            return list(future.result(self.timeout))
+        except concurrent.futures.TimeoutError:
+            for request_id in ids:
+                self._loop.call_soon_threadsafe(self._pending.pop, request_id, None)
+            raise
+
+    def _subscription_queue(self, subscription_id):
+        return self._subscriptions.setdefault(subscription_id, queue.Queue())
+
+    def subscribe(self, *params):
+        """
+        Crea una suscripción (p. ej. subscribe("newHeads")) y devuelve la cola
+        donde se reciben sus notificaciones. Las suscripciones no sobreviven a
+        una reconexión.
+        """
+        response = self.make_request("eth_subscribe", list(params))
+        if "error" in response:
+            raise ValueError(f"No se pudo crear la suscripción: {response['error']}")
+        return self._subscription_queue(response["result"])
+
+
+def http_session(pool_size=DEFAULT_POOL_SIZE):
+    """Crea una sesión HTTP con un pool de hasta `pool_size` conexiones keep-alive."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def make_provider(uri, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+    """Crea el proveedor web3 correspondiente al esquema de la URI."""
+    if not uri:
+        raise ValueError("La URI del nodo no puede ser vacía")
+
+    scheme = urlparse(uri).scheme.lower()
+    if scheme in ("http", "https"):
+        return BatchHTTPProvider(
+            uri, request_kwargs={"timeout": timeout}, session=http_session(pool_size)
+        )
+    if scheme in ("ws", "wss"):
+        return MultiplexedWebsocketProvider(uri, timeout=timeout)
+    if scheme == "ipc":
+        return BatchIPCProvider(uri[len("ipc://"):], timeout=timeout)
+    if scheme == "":
+        return BatchIPCProvider(uri, timeout=timeout)
+    raise ValueError(f"Esquema de URI no soportado: '{scheme}' (use ipc://, http:// o ws://)")
+
+
+def connect(uri, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+    """Conecta con el nodo indicado por la URI y verifica la conexión."""
+    w3 = Web3(make_provider(uri, timeout, pool_size))
+    w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+
+    if not w3.is_connected():
+        raise ConnectionError(f"No se pudo conectar al nodo Ethereum mediante {uri}")
+
+    return w3
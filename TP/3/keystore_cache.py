@@ -0,0 +1,93 @@
+"""
+Firma local de transacciones con claves de un keystore de geth.
+
+Descifrar un keystore implica derivar la clave con scrypt, que es deliberadamente
+lento. KeyCache descifra cada cuenta una sola vez y mantiene la clave en memoria
+durante `ttl` segundos; pasado ese tiempo (o al llamar a clear) la descarta y la
+próxima firma vuelve a descifrar el keystore. El acceso está protegido por un
+lock, por lo que varios hilos pueden firmar a la vez sin descifrar dos veces.
+
+Las transacciones se firman con eth_account y se envían con
+`eth_sendRawTransaction`, sin desbloquear la cuenta en el nodo.
+
+Ejemplo:
+    account = KEY_CACHE.get(address, "node/keystore", password)
+    tx_hash = sign_and_send(w3, account, {"to": dst, "value": 1, "nonce": 0, ...})
+"""
+
+import json
+import os
+import threading
+import time
+
+from eth_account import Account
+from web3 import Web3
+
+DEFAULT_KEY_TTL = 300
+
+
+def find_keystore_file(keystore, address):
+    """
+    Devuelve el archivo de keystore de `address`. `keystore` puede ser el archivo
+    mismo o un directorio de keystore de geth (p. ej. node/keystore).
+    """
+    if not os.path.isdir(keystore):
+        return keystore
+
+    wanted = address.lower().removeprefix("0x")
+    for name in sorted(os.listdir(keystore)):
+        path = os.path.join(keystore, name)
+        try:
+            with open(path) as f:
+                if json.load(f).get("address", "").lower() == wanted:
+                    return path
+        except (OSError, ValueError, AttributeError):
+            continue
+    raise ValueError(f"No se encontró la clave de {address} en el keystore '{keystore}'")
+
+
+class KeyCache:
+    """Claves descifradas en memoria, por dirección, durante `ttl` segundos."""
+
+    def __init__(self, ttl=DEFAULT_KEY_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.accounts = {}  # dirección -> (LocalAccount, vencimiento)
+
+    def get(self, address, keystore, password):
+        """Devuelve la cuenta local de `address`, descifrando el keystore si hace falta."""
+        address = Web3.to_checksum_address(address)
+        with self.lock:
+            now = time.monotonic()
+            cached = self.accounts.get(address)
+            if cached is not None and cached[1] > now:
+                return cached[0]
+
+            with open(find_keystore_file(keystore, address)) as f:
+                encrypted = json.load(f)
+            try:
+                account = Account.from_key(Account.decrypt(encrypted, password))
+            except ValueError:
+                raise ValueError(f"Contraseña incorrecta para la cuenta {address}")
+            if account.address != address:
+                raise ValueError(
+                    f"El keystore corresponde a {account.address}, no a {address}"
+                )
+
+            self.accounts[address] = (account, now + self.ttl)
+            return account
+
+    def clear(self):
+        """Descarta todas las claves descifradas."""
+        with self.lock:
+            self.accounts.clear()
+
+
+# Caché compartida por los comandos de un mismo proceso
+KEY_CACHE = KeyCache()
+
+
+def sign_and_send(w3, account, transaction):
+    """Firma la transacción con la cuenta local y la envía; devuelve el hash."""
+    signed = account.sign_transaction(transaction)
+    return w3.eth.send_raw_transaction(signed.rawTransaction)
@@ -0,0 +1,173 @@
+"""
+Seguimiento compartido de los recibos de muchas transacciones pendientes.
+
+En lugar de consultar el recibo de cada transacción por separado (como hace
+`wait_for_transaction_receipt`), un único hilo recorre cada bloque nuevo una
+sola vez y resuelve las transacciones pendientes que aparecen en su lista de
+transacciones. El costo en llamadas RPC es proporcional a la cantidad de
+bloques, más un `eth_getTransactionReceipt` por cada transacción encontrada.
+
+Cada transacción seguida tiene un `concurrent.futures.Future` que se resuelve
+con su recibo; se puede esperar con `result(timeout)` o registrar callbacks con
+`add_done_callback`. Si se cancela el future, la transacción deja de seguirse.
+Si la consulta del recibo de una transacción ya minada falla (timeout, nodo
+reiniciándose), el future no se da por fallido: se reintenta en la próxima vuelta.
+
+Si el proveedor admite suscripciones (conexión WebSocket de connection.py), el
+hilo se despierta con cada `newHeads`; si no, consulta el último bloque cada
+`poll_interval` segundos.
+
+El tracker recorre los bloques desde el último al momento de iniciarse, por lo
+que debe crearse antes de enviar las transacciones. Los hashes de los últimos
+RECENT_BLOCKS bloques se recuerdan, de modo que una transacción minada antes
+de llamar a `track` igualmente se resuelve.
+
+Ejemplo:
+    tracker = ReceiptTracker(w3)
+    tx_hash = w3.eth.send_transaction(tx)
+    receipt = tracker.wait(tx_hash, timeout=120)
+"""
+
+import collections
+import concurrent.futures
+import queue
+import threading
+
+from web3 import Web3
+
+DEFAULT_POLL_INTERVAL = 1.0
+RECENT_BLOCKS = 256
+
+
+def normalize_hash(tx_hash):
+    """Representa un hash (bytes o str) como texto hexadecimal en minúsculas con 0x."""
+    if isinstance(tx_hash, str):
+        return Web3.to_hex(hexstr=tx_hash).lower()
+    return Web3.to_hex(tx_hash).lower()
+
+
+class ReceiptTracker:
+    """Resuelve las transacciones pendientes recorriendo cada bloque nuevo una sola vez."""
+
+    def __init__(self, w3, poll_interval=DEFAULT_POLL_INTERVAL, from_block=None):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.next_block = w3.eth.block_number if from_block is None else from_block
+        self.lock = threading.Lock()
+        self.pending = {}  # hash -> Future
+        self.recent = {}  # hash -> bloque, de los últimos RECENT_BLOCKS bloques
+        self.recent_blocks = collections.deque()  # (bloque, hashes) en orden
+        self.mined = {}  # hash -> Future, minadas cuyo recibo no se pudo obtener (se reintenta)
+        self.stopped = threading.Event()
+        self.error = None  # Último error al recorrer bloques (se reintenta)
+        self.thread = threading.Thread(target=self._run, name="receipt-tracker", daemon=True)
+        self.thread.start()
+
+    def track(self, tx_hash):
+        """Devuelve el future del recibo de `tx_hash`."""
+        tx_hash = normalize_hash(tx_hash)
+        with self.lock:
+            future = self.pending.get(tx_hash) or self.mined.get(tx_hash)
+            if future is not None:
+                return future
+            future = concurrent.futures.Future()
+            if tx_hash not in self.recent:
+                self.pending[tx_hash] = future
+                return future
+        # Ya minada en un bloque recorrido
+        self._resolve(tx_hash, future)
+        return future
+
+    def wait(self, tx_hash, timeout=None):
+        """Espera el recibo de `tx_hash`; lanza TimeoutError si no llega a tiempo."""
+        future = self.track(tx_hash)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"La transacción {normalize_hash(tx_hash)} no se confirmó en {timeout}s")
+
+    def stop(self):
+        """Detiene el hilo; los futures pendientes quedan sin resolver."""
+        self.stopped.set()
+        self.thread.join()
+
+    def _resolve(self, tx_hash, future):
+        """
+        Resuelve el future de una transacción ya minada con su recibo. Si la
+        consulta falla (timeout, nodo reiniciándose) la transacción no se da
+        por fallida: queda en self.mined y se reintenta en la próxima vuelta.
+        """
+        if future.cancelled():
+            return
+        try:
+            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+        except Exception:
+            with self.lock:
+                self.mined[tx_hash] = future
+            return
+        if future.set_running_or_notify_cancel():
+            future.set_result(receipt)
+
+    def _retry_receipts(self):
+        with self.lock:
+            mined, self.mined = self.mined, {}
+        for tx_hash, future in mined.items():
+            self._resolve(tx_hash, future)
+
+    def _scan(self, block_number):
+        block = self.w3.eth.get_block(block_number)
+        hashes = [normalize_hash(tx_hash) for tx_hash in block["transactions"]]
+
+        found = []
+        with self.lock:
+            for tx_hash in hashes:
+                self.recent[tx_hash] = block_number
+                future = self.pending.pop(tx_hash, None)
+                if future is not None:
+                    found.append((tx_hash, future))
+            self.recent_blocks.append((block_number, hashes))
+            while len(self.recent_blocks) > RECENT_BLOCKS:
+                _, old = self.recent_blocks.popleft()
+                for tx_hash in old:
+                    self.recent.pop(tx_hash, None)
+            # Descartar las transacciones cuyo future se canceló
+            for tx_hash in [h for h, f in self.pending.items() if f.cancelled()]:
+                del self.pending[tx_hash]
+
+        for tx_hash, future in found:
+            self._resolve(tx_hash, future)
+
+    def _new_heads(self):
+        """Devuelve la cola de notificaciones newHeads, o None si no hay suscripciones."""
+        subscribe = getattr(self.w3.provider, "subscribe", None)
+        if subscribe is None:
+            return None
+        try:
+            return subscribe("newHeads")
+        except ValueError:
+            return None
+
+    def _run(self):
+        heads = self._new_heads()
+        while not self.stopped.is_set():
+            try:
+                self._retry_receipts()
+                head = self.w3.eth.block_number
+                while self.next_block <= head and not self.stopped.is_set():
+                    self._scan(self.next_block)
+                    self.next_block += 1
+                self.error = None
+            except Exception as e:
+                self.error = e
+
+            if heads is None:
+                self.stopped.wait(self.poll_interval)
+                continue
+            try:
+                heads.get(timeout=self.poll_interval)
+                # Vaciar las notificaciones acumuladas: se recorre hasta el último bloque
+                while True:
+                    heads.get_nowait()
+            except queue.Empty:
+                pass
@@ -0,0 +1,206 @@
+"""
+Métricas de rendimiento para los escaneos de la blockchain.
+
+Registra bloques y transacciones procesadas por segundo, latencia de cada
+llamada RPC agrupada por método (histograma con percentiles p50/p95/p99),
+bytes de respuesta decodificados y el reparto del tiempo entre la obtención
+de los bloques (fetch), la decodificación de las respuestas JSON (decode) y
+el filtrado de transacciones (filter).
+
+Uso:
+    metrics = ScanMetrics(report_interval=5)
+    metrics.instrument(w3)
+    ...
+    metrics.report(final=True)
+    metrics.dump_json("metrics.json")
+"""
+
+import json
+import math
+import sys
+import threading
+import time
+
+# Histograma logarítmico: el primer bucket cubre hasta 50 µs y cada bucket
+# siguiente es un 25% más ancho. 80 buckets alcanzan ~2 minutos.
+HISTOGRAM_BASE = 50e-6
+HISTOGRAM_FACTOR = 1.25
+HISTOGRAM_BUCKETS = 80
+
+
+class LatencyHistogram:
+    """Histograma de latencias de memoria constante con percentiles aproximados."""
+
+    def __init__(self):
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Registra una latencia expresada en segundos."""
+        if seconds <= HISTOGRAM_BASE:
+            bucket = 0
+        else:
+            bucket = math.ceil(math.log(seconds / HISTOGRAM_BASE, HISTOGRAM_FACTOR))
+        self.counts[min(bucket, HISTOGRAM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """Devuelve el límite superior del bucket que contiene el percentil p (0-100)."""
+        if not self.count:
+            return 0.0
+        target = math.ceil(self.count * p / 100)
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(HISTOGRAM_BASE * HISTOGRAM_FACTOR**bucket, self.max)
+        return self.max
+
+    def summary(self):
+        """Resumen del histograma, con tiempos en milisegundos."""
+        return {
+            "count": self.count,
+            "mean_ms": 1000 * self.total / self.count if self.count else 0.0,
+            "p50_ms": 1000 * self.percentile(50),
+            "p95_ms": 1000 * self.percentile(95),
+            "p99_ms": 1000 * self.percentile(99),
+            "max_ms": 1000 * self.max,
+        }
+
+
+class ScanMetrics:
+    """
+    Acumula las métricas de un escaneo y las informa periódicamente por stderr.
+
+    Puede compartirse entre varias conexiones y entre hilos (escaneo por shards).
+    """
+
+    def __init__(self, report_interval=None, out=None):
+        self.report_interval = report_interval
+        self.out = out or sys.stderr
+        self.start = time.perf_counter()
+        self.last_report = self.start
+        self.blocks = 0
+        self.transactions = 0
+        self.matches = 0
+        self.bytes_decoded = 0
+        self.fetch_time = 0.0
+        self.decode_time = 0.0
+        self.filter_time = 0.0
+        self.rpc = {}
+        self.lock = threading.Lock()
+
+    def instrument(self, w3):
+        """
+        Agrega a w3 un middleware que mide cada llamada RPC y envuelve la
+        decodificación del proveedor para contar bytes y tiempo de decodificación.
+        """
+        w3.middleware_onion.add(self._rpc_middleware, name="scan_metrics")
+
+        provider = w3.provider
+        decode = getattr(provider, "decode_rpc_response", None)
+        if decode is None:
+            return
+
+        def timed_decode(raw_response):
+            start = time.perf_counter()
+            try:
+                return decode(raw_response)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    self.decode_time += elapsed
+                    self.bytes_decoded += len(raw_response)
+
+        provider.decode_rpc_response = timed_decode
+
+    def _rpc_middleware(self, make_request, w3):
+        def middleware(method, params):
+            start = time.perf_counter()
+            try:
+                return make_request(method, params)
+            finally:
+                self.record_rpc(method, time.perf_counter() - start)
+
+        return middleware
+
+    def record_rpc(self, method, seconds):
+        """Registra la latencia de una llamada RPC."""
+        with self.lock:
+            histogram = self.rpc.get(method)
+            if histogram is None:
+                histogram = self.rpc[method] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def record_block(self, transactions, fetch_seconds, filter_seconds, matches):
+        """Registra un bloque procesado e informa por stderr si corresponde."""
+        with self.lock:
+            self.blocks += 1
+            self.transactions += transactions
+            self.matches += matches
+            self.fetch_time += fetch_seconds
+            self.filter_time += filter_seconds
+            due = (
+                self.report_interval is not None
+                and time.perf_counter() - self.last_report >= self.report_interval
+            )
+            if due:
+                self.last_report = time.perf_counter()
+        if due:
+            self.report()
+
+    def snapshot(self):
+        """Devuelve las métricas acumuladas como un diccionario serializable."""
+        with self.lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        elapsed = time.perf_counter() - self.start
+        # get_block incluye la decodificación de la respuesta; se separan
+        fetch = max(self.fetch_time - self.decode_time, 0.0)
+        return {
+            "elapsed_s": elapsed,
+            "blocks": self.blocks,
+            "transactions": self.transactions,
+            "matches": self.matches,
+            "blocks_per_s": self.blocks / elapsed if elapsed else 0.0,
+            "transactions_per_s": self.transactions / elapsed if elapsed else 0.0,
+            "bytes_decoded": self.bytes_decoded,
+            "time_split_s": {
+                "fetch": fetch,
+                "decode": self.decode_time,
+                "filter": self.filter_time,
+                "other": max(elapsed - fetch - self.decode_time - self.filter_time, 0.0),
+            },
+            "rpc": {method: h.summary() for method, h in sorted(self.rpc.items())},
+        }
+
+    def report(self, final=False):
+        """Imprime un resumen de las métricas por stderr."""
+        snap = self.snapshot()
+        split = snap["time_split_s"]
+        print(
+            f"[métricas{' finales' if final else ''}] {snap['elapsed_s']:.1f}s "
+            f"bloques={snap['blocks']} ({snap['blocks_per_s']:.1f}/s) "
+            f"txs={snap['transactions']} ({snap['transactions_per_s']:.1f}/s) "
+            f"bytes={snap['bytes_decoded']} "
+            f"fetch={split['fetch']:.2f}s decode={split['decode']:.2f}s "
+            f"filter={split['filter']:.2f}s other={split['other']:.2f}s",
+            file=self.out,
+        )
+        for method, s in snap["rpc"].items():
+            print(
+                f"    {method}: n={s['count']} p50={s['p50_ms']:.2f}ms "
+                f"p95={s['p95_ms']:.2f}ms p99={s['p99_ms']:.2f}ms max={s['max_ms']:.2f}ms",
+                file=self.out,
+            )
+        self.out.flush()
+
+    def dump_json(self, path):
+        """Guarda las métricas acumuladas en un archivo JSON."""
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
@@ -0,0 +1,170 @@
+"""
+Escaneo de un rango de bloques repartido entre varios nodos réplica.
+
+El rango se divide en shards consecutivos de `shard_size` bloques. Cada nodo
+tiene un hilo que toma el siguiente shard libre de una cola compartida, por
+lo que un nodo lento simplemente procesa menos shards. Además:
+
+- Si un nodo falla, su shard vuelve a la cola y lo toma otro nodo; tras
+  MAX_NODE_FAILURES fallas consecutivas el nodo se descarta.
+- Si un nodo queda ocioso y hay un shard demorado (más del doble del tiempo
+  medio por shard), lo procesa también y se usa el primer resultado.
+
+Los resultados se entregan en orden de bloque. Para acotar la memoria, los
+hilos no se adelantan más de `max_ahead` shards al último entregado.
+"""
+
+import heapq
+import threading
+import time
+
+DEFAULT_SHARD_SIZE = 500
+MAX_NODE_FAILURES = 3
+MIN_STRAGGLER_SECONDS = 1.0
+
+
+class ShardScheduler:
+    """Asigna shards a los nodos y ordena sus resultados."""
+
+    def __init__(self, first_block, last_block, shard_size, nodes, max_ahead):
+        self.shards = [
+            (lo, min(lo + shard_size - 1, last_block))
+            for lo in range(first_block, last_block + 1, shard_size)
+        ]
+        self.max_ahead = max_ahead
+        self.cond = threading.Condition()
+        self.next_index = 0  # Primer shard nunca asignado
+        self.retry = []  # Heap de shards a reasignar tras una falla
+        self.running = {}  # índice -> [inicio, cantidad de nodos procesándolo]
+        self.results = {}  # índice -> resultado, pendiente de entregar
+        self.emitted = 0  # Cantidad de shards ya entregados
+        self.alive = len(nodes)
+        self.errors = []
+        self.stopped = False
+        self.shard_time = 0.0
+        self.completed = 0
+
+    def _done(self, index):
+        return index < self.emitted or index in self.results
+
+    def _finished(self):
+        return self.stopped or self.emitted == len(self.shards) or self.alive == 0
+
+    def _straggler(self):
+        """Devuelve el shard en curso más antiguo que está demorado, si lo hay."""
+        mean = self.shard_time / self.completed if self.completed else 0.0
+        threshold = max(2 * mean, MIN_STRAGGLER_SECONDS)
+        now = time.monotonic()
+        for index in sorted(self.running):
+            start, runners = self.running[index]
+            # Un shard ya entregado puede seguir en curso en otro nodo: no se repite
+            if runners == 1 and now - start > threshold and not self._done(index):
+                return index
+        return None
+
+    def _take(self):
+        """Elige el próximo shard para un nodo ocioso (debe llamarse con el lock tomado)."""
+        index = None
+        while self.retry and index is None:
+            candidate = heapq.heappop(self.retry)
+            if not self._done(candidate):
+                index = candidate
+        if (
+            index is None
+            and self.next_index < len(self.shards)
+            and self.next_index < self.emitted + self.max_ahead
+        ):
+            index = self.next_index
+            self.next_index += 1
+        if index is None:
+            index = self._straggler()
+        if index is None:
+            return None
+
+        entry = self.running.setdefault(index, [time.monotonic(), 0])
+        entry[1] += 1
+        return index
+
+    def _release(self, index):
+        """Descuenta un nodo del shard en curso; lo quita cuando no queda ninguno."""
+        entry = self.running.get(index)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if not entry[1]:
+            del self.running[index]
+
+    def worker(self, w3, scan):
+        """Procesa shards con un nodo hasta terminar o hasta que el nodo se descarte."""
+        failures = 0
+        while True:
+            with self.cond:
+                index = self._take()
+                while index is None and not self._finished():
+                    self.cond.wait(MIN_STRAGGLER_SECONDS)
+                    index = self._take()
+                if index is None:
+                    return
+
+            lo, hi = self.shards[index]
+            start = time.monotonic()
+            try:
+                result = scan(w3, lo, hi)
+            except Exception as e:
+                failures += 1
+                with self.cond:
+                    self._release(index)
+                    if index not in self.running and not self._done(index):
+                        heapq.heappush(self.retry, index)
+                    if failures >= MAX_NODE_FAILURES:
+                        self.alive -= 1
+                        self.errors.append(e)
+                    self.cond.notify_all()
+                if failures >= MAX_NODE_FAILURES:
+                    return
+                continue
+
+            failures = 0
+            with self.cond:
+                self._release(index)
+                if not self._done(index):
+                    self.results[index] = result
+                    self.shard_time += time.monotonic() - start
+                    self.completed += 1
+                self.cond.notify_all()
+
+    def ordered_results(self):
+        """Genera los resultados de cada shard en orden de bloque."""
+        while self.emitted < len(self.shards):
+            with self.cond:
+                while self.emitted not in self.results and self.alive > 0:
+                    self.cond.wait()
+                if self.emitted not in self.results:
+                    raise ConnectionError(
+                        f"Todos los nodos fallaron; último error: {self.errors[-1]}"
+                    )
+                result = self.results.pop(self.emitted)
+                self.emitted += 1
+                self.cond.notify_all()
+            yield result
+
+
+def sharded_scan(nodes, first_block, last_block, scan, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Aplica `scan(w3, lo, hi)` a cada shard del rango, repartiendo los shards
+    entre los nodos, y genera los elementos de los resultados en orden de bloque.
+    """
+    scheduler = ShardScheduler(
+        first_block, last_block, shard_size, nodes, max_ahead=4 * len(nodes)
+    )
+    for w3 in nodes:
+        threading.Thread(
+            target=scheduler.worker, args=(w3, scan), daemon=True
+        ).start()
+    try:
+        for result in scheduler.ordered_results():
+            yield from result
+    finally:
+        with scheduler.cond:
+            scheduler.stopped = True
+            scheduler.cond.notify_all()
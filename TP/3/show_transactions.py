@@ -6,90 +6,452 @@ Parámetros:
 - --add: Agrega las direcciones encontradas a la búsqueda.
 - --first-block, -f: Bloque inicial del rango de búsqueda (por defecto 0).
 - --last-block, -l: Bloque final del rango de búsqueda (por defecto 'latest').
-- --format: Formato de salida ('plain' o 'graphviz').
+- --format: Formato de salida ('plain', 'graphviz', 'graphml' o 'csv').
+- --aggregate: Agrupa las transferencias en una arista por par (origen, destino),
+  con monto total, cantidad y primer/último bloque. Requerido por 'graphml' y 'csv'.
+- --bisect: Localiza por bisección (consultando balance y nonce históricos) los
+  sub-rangos donde cambió el estado de las direcciones y sólo lee esos bloques.
+  Requiere un nodo archivo y no es compatible con --add.
+- --bisect-leaf: Tamaño de rango a partir del cual se dejan de bisecar y se leen
+  los bloques completos (por defecto 16).
+- --metrics: Informa periódicamente por stderr bloques/s, transacciones/s,
+  latencias RPC (p50/p95/p99), bytes decodificados y reparto de tiempo.
+- --metrics-interval: Segundos entre reportes de métricas (por defecto 5).
+- --metrics-json: Guarda las métricas finales en un archivo JSON.
+- --export: Directorio donde exportar las transferencias en columnas tipadas
+  (ver columnar_export.py) en lugar de imprimirlas.
+- --export-format: Formato de la exportación ('npy' o 'arrow', por defecto 'npy').
 - --short: Muestra direcciones truncadas (8 caracteres).
-- --uri: Especifica la conexión con el nodo Geth (IPC o HTTP).
+- --uri: Especifica la conexión con el nodo Geth (ruta IPC, ipc://, http:// o ws://).
+  Puede repetirse para repartir el rango en shards entre varios nodos réplica
+  (ver sharding.py); no es compatible con --add.
+- --shard-size: Bloques por shard al usar varios nodos (por defecto 500).
+- --follow: Tras llegar al último bloque sigue esperando bloques nuevos (por
+  suscripción WebSocket o consultando eth_newBlockFilter). Detecta reorgs y
+  marca con [reorg] las transferencias revertidas. Sólo formato 'plain'.
+- --reorg-window: Bloques recientes que se conservan para detectar reorgs (por defecto 12).
+- --poll-interval: Segundos entre consultas del filtro de bloques (por defecto 2).
 - --unit: Unidad para mostrar los montos (wei, Kwei, Mwei, Gwei, microether, milliether, ether)
 
 Ejemplo de uso:
     python script.py 0x123... 0x456... 0x789... --first-block 100 --last-block 200 --unit ether
     python script.py --add --short --format graphviz --unit Gwei
+    python script.py 0x123... --add --aggregate --format csv --unit ether
+    python script.py 0x123... --bisect --first-block 0 --last-block latest
+    python script.py 0x123... --metrics --metrics-json metrics.json > /dev/null
+    python script.py 0x123... --add --export salida/ --export-format arrow
+    python script.py 0x123... --uri http://nodo1:8545 --uri http://nodo2:8545 --shard-size 1000
+    python script.py 0x123... --uri ws://localhost:8546 --first-block 5000000 --follow
 """
 
 import argparse
+import csv
+import queue
+from collections import deque
 from web3 import Web3
-from web3.middleware import geth_poa_middleware
+from web3.exceptions import BlockNotFound
 import time
 import sys
 
+from columnar_export import export_transactions
+from connection import connect
+from scan_metrics import ScanMetrics
+from sharding import DEFAULT_SHARD_SIZE, sharded_scan
+
 DEFAULT_IPC_PATH = "/home/simonll4/Desktop/blockchain-testnets/bfatest/node/geth.ipc"
 DEFAULT_UNIT = "wei"
 
+# Frecuencia con la que se vacía la salida durante el escaneo
+FLUSH_EVERY_LINES = 100
+FLUSH_EVERY_SECONDS = 1.0
+
+# Tamaño de rango por debajo del cual la bisección lee los bloques completos
+DEFAULT_BISECT_LEAF = 16
+
+# Segundos entre reportes periódicos de métricas
+DEFAULT_METRICS_INTERVAL = 5.0
+
+# Modo --follow: bloques recientes conservados para detectar reorgs, intervalo
+# de consulta del filtro de bloques y espera máxima entre revisiones del head
+DEFAULT_REORG_WINDOW = 12
+DEFAULT_POLL_INTERVAL = 2.0
+HEAD_TIMEOUT = 30.0
+
 
 def init_web3_connection(uri):
     """Inicializa y valida la conexión con el nodo Ethereum"""
     try:
-        w3 = Web3(Web3.IPCProvider(uri))
-        w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-
-        if not w3.is_connected():
-            raise ConnectionError(
-                f"No se pudo conectar al nodo Ethereum mediante {uri}"
-            )
-
-        return w3
+        return connect(uri)
     except Exception as e:
         raise ConnectionError(f"Error de conexión: {str(e)}")
 
 
-def fetch_transactions(w3, first_block, last_block, addresses, add):
-    """Busca transacciones que transfieren ETH en los bloques especificados."""
+def fetch_transactions(
+    w3,
+    first_block,
+    last_block,
+    addresses,
+    add,
+    bisect=False,
+    leaf_size=DEFAULT_BISECT_LEAF,
+    metrics=None,
+):
+    """
+    Genera las transacciones que transfieren ETH en los bloques especificados.
+
+    Es un generador: cada transacción se entrega apenas se procesa su bloque,
+    sin acumular el resultado completo en memoria. Con `bisect` sólo se leen
+    los bloques que find_touched_blocks señala como candidatos. Si se pasa un
+    ScanMetrics, se registra el tiempo de obtención y de filtrado de cada bloque.
+    """
 
     # Normalizar direcciones
     tracked_addresses = set(addr.lower() for addr in addresses)
-    transactions = []
 
     if last_block == "latest":
         last_block = w3.eth.block_number
     else:
         last_block = int(last_block)
 
-    for block_number in range(first_block, last_block + 1):
+    if bisect:
+        block_numbers = find_touched_blocks(
+            w3, first_block, last_block, addresses, leaf_size
+        )
+    else:
+        block_numbers = range(first_block, last_block + 1)
+
+    for block_number in block_numbers:
         # Obtener el bloque con transacciones completas
+        fetch_start = time.perf_counter()
         block = w3.eth.get_block(block_number, full_transactions=True)
+        filter_start = time.perf_counter()
+
+        # Las coincidencias del bloque se entregan juntas, fuera del tiempo de filtrado
+        matches = match_transactions(block, block_number, tracked_addresses, add)
+
+        if metrics is not None:
+            metrics.record_block(
+                len(block.transactions),
+                filter_start - fetch_start,
+                time.perf_counter() - filter_start,
+                len(matches),
+            )
+        yield from matches
+
+
+def match_transactions(block, block_number, tracked_addresses, add):
+    """
+    Devuelve las transferencias de ETH del bloque que involucran alguna dirección
+    seguida. Con `add`, agrega a `tracked_addresses` las direcciones encontradas.
+    """
+    matches = []
+    for tx in block.transactions:
+        if tx["value"] > 0:  # Solo transacciones con transferencia de Ether
+            src, dst = tx["from"].lower(), (tx["to"] or "").lower()  # Normalizar
+            if src in tracked_addresses or dst in tracked_addresses:
+                matches.append((src, dst, tx["value"], block_number))
+                if add:
+                    tracked_addresses.add(src)
+                    if dst:
+                        tracked_addresses.add(dst)
+    return matches
+
+
+def watch_new_heads(w3, poll_interval):
+    """
+    Generador que avanza cada vez que puede haber bloques nuevos.
+
+    Con un proveedor que admite suscripciones (WebSocket) espera notificaciones
+    `newHeads`; en otro caso (o si el nodo la rechaza) consulta un filtro `eth_newBlockFilter` cada
+    `poll_interval` segundos, recreándolo si el nodo lo descarta. En ambos
+    casos avanza igualmente tras HEAD_TIMEOUT segundos sin novedades.
+    """
+    heads = None
+    subscribe = getattr(w3.provider, "subscribe", None)
+    if subscribe is not None:
+        try:
+            heads = subscribe("newHeads")
+        except ValueError as e:
+            print(f"Suscripción no disponible, se usa un filtro de bloques: {e}", file=sys.stderr)
+
+    if heads is not None:
+        while True:
+            try:
+                heads.get(timeout=HEAD_TIMEOUT)
+                while not heads.empty():
+                    heads.get_nowait()
+            except queue.Empty:
+                pass
+            yield
+
+    block_filter = w3.eth.filter("latest")
+    last_check = time.monotonic()
+    while True:
+        try:
+            new_entries = block_filter.get_new_entries()
+        except Exception:
+            # El nodo descarta los filtros que no se consultan a tiempo
+            block_filter = w3.eth.filter("latest")
+            new_entries = True
+        if new_entries or time.monotonic() - last_check >= HEAD_TIMEOUT:
+            last_check = time.monotonic()
+            yield
+        else:
+            time.sleep(poll_interval)
+
+
+def follow_transactions(
+    w3,
+    first_block,
+    addresses,
+    add,
+    reorg_window=DEFAULT_REORG_WINDOW,
+    poll_interval=DEFAULT_POLL_INTERVAL,
+):
+    """
+    Genera indefinidamente eventos ("add", tx) y ("retract", tx) con las
+    transferencias de los bloques a partir de `first_block`, incluidos los nuevos.
+
+    Se conservan número, hash y transferencias de los últimos `reorg_window`
+    bloques procesados. Si el `parentHash` de un bloque nuevo no coincide con el
+    hash del último procesado hubo un reorg: se retractan las transferencias de
+    los bloques que dejaron de ser canónicos y se vuelven a procesar. Un reorg
+    más profundo que la ventana no puede retractarse y se informa por stderr.
+    """
+    tracked_addresses = set(addr.lower() for addr in addresses)
+    window = deque()  # (número, hash, transferencias) de los últimos bloques
+    next_block = first_block
+    heads = watch_new_heads(w3, poll_interval)
+
+    while True:
+        head = w3.eth.block_number
+        while next_block <= head:
+            try:
+                block = w3.eth.get_block(next_block, full_transactions=True)
+            except BlockNotFound:
+                break  # La cadena se acortó por un reorg; esperar al nuevo head
+
+            if window and block.parentHash != window[-1][1]:
+                # Reorg: el último bloque procesado dejó de ser canónico
+                number, _, matches = window.pop()
+                for transaction in reversed(matches):
+                    yield ("retract", transaction)
+                if not window:
+                    print(
+                        f"Advertencia: reorg más profundo que la ventana de {reorg_window} bloques "
+                        f"(bloque {number}); las transferencias anteriores no se revisan",
+                        file=sys.stderr,
+                    )
+                next_block = number
+                continue
+
+            matches = match_transactions(block, next_block, tracked_addresses, add)
+            window.append((next_block, block.hash, matches))
+            if len(window) > reorg_window:
+                window.popleft()
+            for transaction in matches:
+                yield ("add", transaction)
+            next_block += 1
+
+        next(heads)
+
+
+def print_followed_transactions(events, short, unit, out=None):
+    """Imprime los eventos del modo --follow; las retractadas se marcan con [reorg]."""
+    out = out or sys.stdout
+    for event, transaction in events:
+        line = format_transaction(transaction, "plain", short, unit)
+        if event == "retract":
+            line = f"[reorg] revertida: {line}"
+        print(line, file=out, flush=True)
+
+
+def fetch_transactions_sharded(
+    nodes,
+    first_block,
+    last_block,
+    addresses,
+    bisect=False,
+    leaf_size=DEFAULT_BISECT_LEAF,
+    metrics=None,
+    shard_size=DEFAULT_SHARD_SIZE,
+):
+    """
+    Igual que fetch_transactions, pero reparte el rango en shards entre varios nodos.
+
+    Las transacciones se generan en orden de bloque. `latest` se resuelve como
+    el menor de los últimos bloques de los nodos, para que todos puedan servirlo.
+    """
+    if last_block == "latest":
+        last_block = min(w3.eth.block_number for w3 in nodes)
+    else:
+        last_block = int(last_block)
+
+    def scan(w3, lo, hi):
+        return list(
+            fetch_transactions(
+                w3, lo, hi, addresses, False, bisect, leaf_size, metrics
+            )
+        )
+
+    return sharded_scan(nodes, first_block, last_block, scan, shard_size)
+
+
+def find_touched_blocks(w3, first_block, last_block, addresses, leaf_size):
+    """
+    Genera, en orden, los bloques del rango donde pudo cambiar el estado de las direcciones.
+
+    Compara balance y nonce de cada dirección en los extremos de un rango
+    (consultas históricas, requieren un nodo archivo). Si no cambiaron, el rango
+    se descarta; si cambiaron, se divide a la mitad y se repite. Los rangos de
+    hasta `leaf_size` bloques se entregan completos para leerlos con get_block.
+    Un cambio que se compensa dentro de un rango (mismo balance y nonce en ambos
+    extremos) no es detectable, lo que en la práctica sólo ocurre con
+    transferencias internas de contratos.
+    """
+    addresses = [Web3.to_checksum_address(addr) for addr in addresses]
+
+    def state(block_number):
+        return tuple(
+            (
+                w3.eth.get_balance(addr, block_number),
+                w3.eth.get_transaction_count(addr, block_number),
+            )
+            for addr in addresses
+        )
+
+    def search(lo, hi, state_lo, state_hi):
+        # Rango (lo, hi]: los cambios del bloque lo ya están reflejados en state_lo
+        if state_lo == state_hi:
+            return
+        if hi - lo <= leaf_size:
+            yield from range(lo + 1, hi + 1)
+            return
+        mid = (lo + hi) // 2
+        state_mid = state(mid)
+        yield from search(lo, mid, state_lo, state_mid)
+        yield from search(mid, hi, state_mid, state_hi)
+
+    # El bloque génesis no contiene transacciones, por lo que se parte de él
+    lo = max(first_block - 1, 0)
+    if lo >= last_block:
+        return
+    yield from search(lo, last_block, state(lo), state(last_block))
+
+
+def format_transaction(transaction, output_format, short, unit):
+    """Devuelve la línea de salida de una transacción en el formato deseado."""
+    src, dst, value_wei, block = transaction
+    value = Web3.from_wei(value_wei, unit)
+    if output_format == "graphviz":
+        return f'  "{format_address(src, short)}" -> "{format_address(dst, short)}" [label="{value} {unit} ({block})"]'
+    return f"{format_address(src, short)} -> {format_address(dst, short)}: {value} {unit} (bloque {block})"
+
 
-        # Verificar si el bloque tiene transacciones
-        if not block.transactions:
-            continue
-
-        for tx in block.transactions:
-            if tx["value"] > 0:  # Solo transacciones con transferencia de Ether
-                src, dst = tx["from"].lower(), (tx["to"] or "").lower()  # Normalizar
-                if src in tracked_addresses or dst in tracked_addresses:
-                    transactions.append((src, dst, tx["value"], block_number))
-                    if add:
-                        tracked_addresses.add(src)
-                        if dst:
-                            tracked_addresses.add(dst)
-    return transactions
-
-
-def print_transactions(transactions, output_format, short, unit):
-    """Imprime las transacciones en el formato deseado."""
-    if output_format == "plain":
-        for src, dst, value_wei, block in transactions:
+def print_transactions(transactions, output_format, short, unit, out=None):
+    """
+    Imprime las transacciones en el formato deseado a medida que se generan.
+
+    La salida se vacía periódicamente (cada FLUSH_EVERY_LINES líneas o
+    FLUSH_EVERY_SECONDS segundos) para que un consumidor conectado por tubería
+    (`dot`, `grep`, ...) reciba los resultados sin esperar al final del escaneo.
+    En formato graphviz el `digraph` se cierra aun si el escaneo se interrumpe.
+    """
+    out = out or sys.stdout
+    pending_lines = 0
+    last_flush = time.monotonic()
+
+    if output_format == "graphviz":
+        print("digraph Transfers {", file=out)
+    try:
+        for transaction in transactions:
+            print(format_transaction(transaction, output_format, short, unit), file=out)
+            pending_lines += 1
+            now = time.monotonic()
+            if (
+                pending_lines >= FLUSH_EVERY_LINES
+                or now - last_flush >= FLUSH_EVERY_SECONDS
+            ):
+                out.flush()
+                pending_lines, last_flush = 0, now
+    finally:
+        if output_format == "graphviz":
+            print("}", file=out)
+        out.flush()
+
+
+def aggregate_transactions(transactions):
+    """
+    Agrupa las transferencias en una arista por par (origen, destino).
+
+    Se recorre el flujo de transacciones una sola vez; la memoria crece con la
+    cantidad de pares distintos y no con la cantidad de transferencias.
+    Devuelve un diccionario {(src, dst): [valor_total, cantidad, primer_bloque, ultimo_bloque]}.
+    """
+    edges = {}
+    for src, dst, value_wei, block in transactions:
+        edge = edges.get((src, dst))
+        if edge is None:
+            edges[(src, dst)] = [value_wei, 1, block, block]
+        else:
+            edge[0] += value_wei
+            edge[1] += 1
+            edge[3] = block  # Los bloques se recorren en orden creciente
+    return edges
+
+
+def print_aggregated_transactions(edges, output_format, short, unit, out=None):
+    """Imprime las aristas agregadas en formato plain, graphviz, graphml o csv."""
+    out = out or sys.stdout
+
+    if output_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(["src", "dst", f"value_{unit}", "count", "first_block", "last_block"])
+        for (src, dst), (value_wei, count, first, last) in edges.items():
+            value = Web3.from_wei(value_wei, unit)
+            writer.writerow([format_address(src, short), format_address(dst, short), value, count, first, last])
+
+    elif output_format == "graphml":
+        print('<?xml version="1.0" encoding="UTF-8"?>', file=out)
+        print('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">', file=out)
+        print(f'  <key id="value" for="edge" attr.name="value_{unit}" attr.type="string"/>', file=out)
+        print('  <key id="count" for="edge" attr.name="count" attr.type="long"/>', file=out)
+        print('  <key id="first_block" for="edge" attr.name="first_block" attr.type="long"/>', file=out)
+        print('  <key id="last_block" for="edge" attr.name="last_block" attr.type="long"/>', file=out)
+        print('  <graph id="Transfers" edgedefault="directed">', file=out)
+        nodes = dict.fromkeys(addr for pair in edges for addr in pair)
+        for node in nodes:
+            print(f'    <node id="{format_address(node, short)}"/>', file=out)
+        for (src, dst), (value_wei, count, first, last) in edges.items():
+            value = Web3.from_wei(value_wei, unit)
+            print(f'    <edge source="{format_address(src, short)}" target="{format_address(dst, short)}">', file=out)
+            print(f'      <data key="value">{value}</data>', file=out)
+            print(f'      <data key="count">{count}</data>', file=out)
+            print(f'      <data key="first_block">{first}</data>', file=out)
+            print(f'      <data key="last_block">{last}</data>', file=out)
+            print("    </edge>", file=out)
+        print("  </graph>", file=out)
+        print("</graphml>", file=out)
+
+    elif output_format == "graphviz":
+        print("digraph Transfers {", file=out)
+        for (src, dst), (value_wei, count, first, last) in edges.items():
             value = Web3.from_wei(value_wei, unit)
             print(
-                f"{format_address(src, short)} -> {format_address(dst, short)}: {value} {unit} (bloque {block})"
+                f'  "{format_address(src, short)}" -> "{format_address(dst, short)}" [label="{value} {unit} ({count} tx, {first}-{last})"]',
+                file=out,
             )
-    elif output_format == "graphviz":
-        print("digraph Transfers {")
-        for src, dst, value_wei, block in transactions:
+        print("}", file=out)
+
+    else:
+        for (src, dst), (value_wei, count, first, last) in edges.items():
             value = Web3.from_wei(value_wei, unit)
             print(
-                f'  "{format_address(src, short)}" -> "{format_address(dst, short)}" [label="{value} {unit} ({block})"]'
+                f"{format_address(src, short)} -> {format_address(dst, short)}: {value} {unit} en {count} transacciones (bloques {first}-{last})",
+                file=out,
             )
-        print("}")
+
+    out.flush()
 
 
 def address(x):
@@ -118,7 +480,16 @@ if __name__ == "__main__":
     )
 
     parser.add_argument(
-        "--uri", help="URI para la conexión con geth", default=DEFAULT_IPC_PATH
+        "--uri",
+        help="URI para la conexión con geth (ruta IPC, ipc://, http:// o ws://). Puede repetirse",
+        action="append",
+        dest="uris",
+    )
+    parser.add_argument(
+        "--shard-size",
+        help="Bloques por shard al repartir el rango entre varios nodos",
+        type=int,
+        default=DEFAULT_SHARD_SIZE,
     )
 
     parser.add_argument(
@@ -142,9 +513,65 @@ if __name__ == "__main__":
     parser.add_argument(
         "--format",
         help="Formato de salida",
-        choices=["plain", "graphviz"],
+        choices=["plain", "graphviz", "graphml", "csv"],
         default="plain",
     )
+    parser.add_argument(
+        "--aggregate",
+        help="Agrupa las transferencias en una arista por par (origen, destino)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--bisect",
+        help="Localiza por bisección los bloques que modifican las direcciones (requiere nodo archivo)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--bisect-leaf",
+        help="Tamaño de rango a partir del cual se leen los bloques completos",
+        type=int,
+        default=DEFAULT_BISECT_LEAF,
+    )
+    parser.add_argument(
+        "--metrics",
+        help="Informa periódicamente métricas de rendimiento por stderr",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        help="Segundos entre reportes de métricas",
+        type=float,
+        default=DEFAULT_METRICS_INTERVAL,
+    )
+    parser.add_argument(
+        "--metrics-json", help="Archivo donde guardar las métricas finales en JSON"
+    )
+    parser.add_argument(
+        "--export", help="Directorio donde exportar las transferencias en formato columnar"
+    )
+    parser.add_argument(
+        "--export-format",
+        help="Formato de la exportación columnar",
+        choices=["npy", "arrow"],
+        default="npy",
+    )
+    parser.add_argument(
+        "--follow",
+        help="Sigue procesando los bloques nuevos a medida que llegan",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--reorg-window",
+        help="Bloques recientes que se conservan para detectar reorgs",
+        type=int,
+        default=DEFAULT_REORG_WINDOW,
+    )
+    parser.add_argument(
+        "--poll-interval",
+        help="Segundos entre consultas del filtro de bloques nuevos",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+    )
     parser.add_argument(
         "--short", help="Trunca las direcciones a 10 caracteres", action="store_true"
     )
@@ -156,20 +583,101 @@ if __name__ == "__main__":
     )
     
     args = parser.parse_args()
-    
-    try:
-        # Conexión con el nodo Geth usando IPC
-        w3 = init_web3_connection(args.uri)
 
-        # Buscar transacciones
-        transactions = fetch_transactions(
-            w3, args.first_block, args.last_block, args.addresses, args.add
+    if args.format in ("graphml", "csv") and not args.aggregate:
+        parser.error(f"el formato '{args.format}' requiere --aggregate")
+    if args.bisect and (args.add or not args.addresses):
+        parser.error("--bisect requiere al menos una dirección y no admite --add")
+    if args.export and args.aggregate:
+        parser.error("--export no admite --aggregate")
+    if args.bisect_leaf < 1:
+        parser.error("--bisect-leaf debe ser mayor o igual a 1")
+    if args.shard_size < 1:
+        parser.error("--shard-size debe ser mayor o igual a 1")
+    uris = args.uris or [DEFAULT_IPC_PATH]
+    if len(uris) > 1 and args.add:
+        parser.error("--add no admite varios --uri: la búsqueda debe ser secuencial")
+    if args.follow and (
+        args.format != "plain"
+        or args.aggregate
+        or args.export
+        or args.bisect
+        or len(uris) > 1
+        or args.last_block != "latest"
+    ):
+        parser.error(
+            "--follow sólo admite formato 'plain' con un único --uri, "
+            "sin --aggregate, --export, --bisect ni --last-block"
         )
-        print_transactions(transactions, args.format, args.short, args.unit)
+    if args.reorg_window < 1:
+        parser.error("--reorg-window debe ser mayor o igual a 1")
 
+    try:
+        # Conexión con el nodo Geth (o con cada nodo réplica)
+        nodes = [init_web3_connection(uri) for uri in uris]
+
+        metrics = None
+        if args.metrics or args.metrics_json:
+            metrics = ScanMetrics(args.metrics_interval if args.metrics else None)
+            for w3 in nodes:
+                metrics.instrument(w3)
+
+        if args.follow:
+            events = follow_transactions(
+                nodes[0],
+                args.first_block,
+                args.addresses,
+                args.add,
+                reorg_window=args.reorg_window,
+                poll_interval=args.poll_interval,
+            )
+            print_followed_transactions(events, args.short, args.unit)
+        else:
+            # Buscar transacciones e imprimirlas a medida que se encuentran
+            if len(nodes) > 1:
+                transactions = fetch_transactions_sharded(
+                    nodes,
+                    args.first_block,
+                    args.last_block,
+                    args.addresses,
+                    bisect=args.bisect,
+                    leaf_size=args.bisect_leaf,
+                    metrics=metrics,
+                    shard_size=args.shard_size,
+                )
+            else:
+                transactions = fetch_transactions(
+                    nodes[0],
+                    args.first_block,
+                    args.last_block,
+                    args.addresses,
+                    args.add,
+                    bisect=args.bisect,
+                    leaf_size=args.bisect_leaf,
+                    metrics=metrics,
+                )
+
+            if args.export:
+                rows = export_transactions(transactions, args.export, args.export_format)
+                print(f"{rows} transferencias exportadas en '{args.export}'", file=sys.stderr)
+            elif args.aggregate:
+                edges = aggregate_transactions(transactions)
+                print_aggregated_transactions(edges, args.format, args.short, args.unit)
+            else:
+                print_transactions(transactions, args.format, args.short, args.unit)
+
+        # El tiempo va por stderr para no contaminar la salida (p. ej. al usar `dot`)
         elapsed_time = time.time() - start_time
-        print(f"Tiempo de ejecución: {elapsed_time:.2f} segundos")
+        print(f"Tiempo de ejecución: {elapsed_time:.2f} segundos", file=sys.stderr)
+
+        if metrics is not None:
+            if args.metrics:
+                metrics.report(final=True)
+            if args.metrics_json:
+                metrics.dump_json(args.metrics_json)
 
+    except KeyboardInterrupt:
+        sys.exit(130)
     except Exception as e:
         print(f"Error al procesar las transacciones: {str(e)}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,50 @@
+"""
+Pruebas del reparto de shards entre nodos (sharding.py), con funciones de
+escaneo falsas en lugar de nodos:
+
+-   test_straggler_fails_after_success: Un shard procesado por dos nodos, donde uno
+    termina bien y el otro falla después, se entrega una sola vez y ningún hilo muere.
+"""
+
+import threading
+import time
+
+import sharding
+from sharding import ShardScheduler
+
+
+def test_straggler_fails_after_success(monkeypatch):
+    monkeypatch.setattr(sharding, "MIN_STRAGGLER_SECONDS", 0.05)
+    thread_errors = []
+    monkeypatch.setattr(threading, "excepthook", thread_errors.append)
+
+    scheduler = ShardScheduler(0, 9, 10, ["lento", "rapido"], max_ahead=4)
+    slow_started = threading.Event()
+
+    def scan(node, lo, hi):
+        if node == "lento":
+            # Falla recién después de que el otro nodo entregó el shard
+            slow_started.set()
+            while 0 not in scheduler.results and scheduler.emitted == 0:
+                time.sleep(0.01)
+            raise ConnectionError("nodo caído")
+        slow_started.wait()
+        return [(lo, hi)]
+
+    threads = [
+        threading.Thread(target=scheduler.worker, args=(node, scan), daemon=True)
+        for node in ("lento", "rapido")
+    ]
+    threads[0].start()
+    slow_started.wait()
+    threads[1].start()
+
+    assert list(scheduler.ordered_results()) == [[(0, 9)]]
+    for thread in threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+    assert thread_errors == []
+    assert scheduler.running == {}
+    assert scheduler.retry == []
+    assert scheduler.alive == 2
@@ -0,0 +1,124 @@
+"""
+Micro-benchmark de los transportes de conexión con el nodo (IPC, HTTP y WebSocket).
+
+Para cada URI mide:
+- Latencia de ida y vuelta de `eth_blockNumber` con un único cliente
+  (p50/p95/p99, usando el histograma de scan_metrics).
+- Throughput de `eth_getBlockByNumber` con varios hilos compartiendo la misma
+  conexión (pool HTTP o conexión WebSocket multiplexada).
+
+Parámetros:
+- URI: Una o más URIs (ruta IPC, ipc://, http:// o ws://) de un nodo de desarrollo local.
+- --requests, -n: Requerimientos por medición (por defecto 1000).
+- --concurrency, -c: Hilos para la medición de throughput (por defecto 8).
+- --json: Imprime los resultados en JSON.
+
+Ejemplo de uso:
+    python transport_benchmark.py ipc:///tmp/geth.ipc http://localhost:8545 ws://localhost:8546 -n 2000 -c 16
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from connection import connect
+from scan_metrics import LatencyHistogram
+
+DEFAULT_REQUESTS = 1000
+DEFAULT_CONCURRENCY = 8
+WARMUP_REQUESTS = 20
+
+
+def measure_latency(w3, requests):
+    """Mide la latencia de `eth_blockNumber` con un único cliente."""
+    histogram = LatencyHistogram()
+    for _ in range(requests):
+        start = time.perf_counter()
+        w3.eth.block_number
+        histogram.record(time.perf_counter() - start)
+    return histogram.summary()
+
+
+def measure_throughput(w3, requests, concurrency):
+    """Mide cuántos `eth_getBlockByNumber` por segundo se completan con varios hilos."""
+    head = w3.eth.block_number
+    histogram = LatencyHistogram()
+
+    def fetch(i):
+        start = time.perf_counter()
+        w3.eth.get_block(head - i % (head + 1))
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for latency in executor.map(fetch, range(requests)):
+            histogram.record(latency)
+    elapsed = time.perf_counter() - start
+
+    summary = histogram.summary()
+    summary["requests_per_s"] = requests / elapsed if elapsed else 0.0
+    return summary
+
+
+def benchmark(uri, requests, concurrency):
+    """Ejecuta ambas mediciones sobre una conexión nueva con la URI dada."""
+    connect_start = time.perf_counter()
+    w3 = connect(uri, pool_size=concurrency)
+    connect_ms = 1000 * (time.perf_counter() - connect_start)
+
+    for _ in range(WARMUP_REQUESTS):
+        w3.eth.block_number
+
+    return {
+        "uri": uri,
+        "connect_ms": connect_ms,
+        "latency": measure_latency(w3, requests),
+        "throughput": measure_throughput(w3, requests, concurrency),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara latencia y throughput de los transportes IPC, HTTP y WebSocket"
+    )
+    parser.add_argument("uris", metavar="URI", nargs="+", help="URIs de conexión con el nodo")
+    parser.add_argument(
+        "--requests", "-n", help="Requerimientos por medición", type=int, default=DEFAULT_REQUESTS
+    )
+    parser.add_argument(
+        "--concurrency",
+        "-c",
+        help="Hilos para la medición de throughput",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+    )
+    parser.add_argument("--json", help="Imprime los resultados en JSON", action="store_true")
+    args = parser.parse_args()
+
+    results = []
+    for uri in args.uris:
+        try:
+            results.append(benchmark(uri, args.requests, args.concurrency))
+        except Exception as e:
+            print(f"Error al medir '{uri}': {str(e)}", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            lat, thr = r["latency"], r["throughput"]
+            print(f"{r['uri']}")
+            print(f"  conexión: {r['connect_ms']:.2f} ms")
+            print(
+                f"  latencia eth_blockNumber: p50={lat['p50_ms']:.3f} ms "
+                f"p95={lat['p95_ms']:.3f} ms p99={lat['p99_ms']:.3f} ms"
+            )
+            print(
+                f"  throughput eth_getBlockByNumber ({args.concurrency} hilos): "
+                f"{thr['requests_per_s']:.1f} req/s, p50={thr['p50_ms']:.3f} ms p99={thr['p99_ms']:.3f} ms"
+            )
+
+    if len(results) < len(args.uris):
+        sys.exit(1)
@@ -1,5 +1,9 @@
-from flask import Flask, jsonify, request
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Flask, g, jsonify, request
+from web3 import Web3
 import logging
+import threading
+import time
 
 #observacion:
 # el unico inconviente es que me obliga a definir todas las variables. se podrian poner valores default
@@ -10,38 +14,320 @@ from config import (
     NETWORK_ID,
     KEYSTORE_DIR,
     PASSWORD_FILE,
+    STAMP_CACHE_SIZE,
+    STAMP_CACHE_NEGATIVE_TTL,
+    INDEX_DB_PATH,
+    STAMP_MODE,
+    BATCH_SIZE,
+    BATCH_WAIT,
+    PROOF_DB_PATH,
+    BULK_MAX_HASHES,
 )
 
 # obsevacion: hay funciones que no corresponde al modulo ethereum_utils para que sea reutilizable
 
 from ethereum_utils import (
     connect_to_node,
+    get_keystore_address,
     get_local_account,
-    build_and_sign_transaction,
+    send_stamp_transaction,
     load_contract,
     is_valid_format_hash,
     is_valid_signature,
+    stamp_from_contract,
 )
+from async_stamper import SUBMIT_TIMEOUT, AsyncStamper
+from merkle_batcher import MerkleBatcher
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, observe_request, render as render_metrics
+from receipt_tracker import ReceiptTracker
+from signatures import cache_stats as signature_cache_stats, matches_signer
+from stamp_cache import NOT_FOUND, StampCache
+from stamp_indexer import StampIndexer, get_deployment_block, stamp_signer
+from transaction_params import TransactionParams
+
+# Tiempo máximo de espera del recibo de una transacción (el de wait_for_transaction_receipt)
+RECEIPT_TIMEOUT = 120
+
+# Llamadas stamped(hash) por batch de JSON-RPC en POST /stamped/batch
+CALLS_PER_BATCH = 100
 
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+api = Blueprint("api", __name__)
+
+# Caché de las consultas stamped(hash) al contrato
+stamp_cache = StampCache(STAMP_CACHE_SIZE, STAMP_CACHE_NEGATIVE_TTL)
+
+# Los batches de JSON-RPC de las consultas masivas se arman de a uno por vez
+bulk_lock = threading.Lock()
+
+# Se inicializan en segundo plano (ver startup); hasta que ready se activa, la
+# API responde 503 salvo en /health/live, /health/ready y /metrics
+w3 = None
+contract = None
+account_address = None
+private_key = None
+tx_params = None
+receipt_tracker = None
+indexer = None
+bulk_w3 = None
+bulk_contract = None
+async_stamper = None
+batcher = None
+
+ready = threading.Event()
+startup_error = None
+startup_thread = None
+
+UNGATED_ENDPOINTS = {"api.get_liveness", "api.get_readiness", "api.get_metrics"}
+
+
+def connect_stamper():
+    """
+    Conexión principal: contrato, chainId, gasPrice y nonce de la cuenta, y el
+    seguimiento de recibos. El nonce se pide con la dirección del keystore, que
+    no está cifrada, sin esperar a descifrar la clave.
+    """
+    node = connect_to_node(NODE_URI)
+    params = TransactionParams(node, get_keystore_address(KEYSTORE_DIR))
+    return node, load_contract(node, CONTRACT_PATH, NETWORK_ID), params, ReceiptTracker(node)
+
+
+def connect_indexer():
+    """
+    Índice local de sellos, que reemplaza a las consultas al contrato una vez que está al día.
+    Usa su propia conexión: mientras arma un batch de JSON-RPC, web3 encola en él
+    cualquier llamada hecha por el mismo proveedor, incluso desde otros hilos
+    """
+    index_w3 = connect_to_node(NODE_URI)
+    return StampIndexer(
+        index_w3,
+        load_contract(index_w3, CONTRACT_PATH, NETWORK_ID),
+        INDEX_DB_PATH,
+        get_deployment_block(index_w3, CONTRACT_PATH, NETWORK_ID),
+    )
+
+
+def connect_bulk():
+    """Conexión propia para los batches de POST /stamped/batch (por lo mismo que el índice)"""
+    node = connect_to_node(NODE_URI)
+    return node, load_contract(node, CONTRACT_PATH, NETWORK_ID)
+
+
+def startup():
+    """
+    Inicializa la conexión, la cuenta y los componentes de la API. El descifrado
+    del keystore (scrypt, lo más lento del arranque) corre en paralelo con las
+    conexiones al nodo y la carga del nonce. Si algo falla, la API queda sin
+    atender y /health/live responde 503 para que se reinicie el proceso.
+    """
+    global w3, contract, account_address, private_key, tx_params, receipt_tracker
+    global indexer, bulk_w3, bulk_contract, async_stamper, batcher, startup_error
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix="startup") as executor:
+            account = executor.submit(get_local_account, KEYSTORE_DIR, PASSWORD_FILE)
+            stamper = executor.submit(connect_stamper)
+            index = executor.submit(connect_indexer)
+            bulk = executor.submit(connect_bulk)
+
+            w3, contract, tx_params, receipt_tracker = stamper.result()
+            account_address, private_key = account.result()
+            if account_address != tx_params.account_address:
+                raise ValueError("La cuenta descifrada no coincide con la dirección del keystore")
+            indexer = index.result()
+            bulk_w3, bulk_contract = bulk.result()
+
+        indexer.start()
+
+        # En modo asíncrono POST /stamp responde 202 y el sello se completa en segundo plano
+        if STAMP_MODE == "async":
+            async_stamper = AsyncStamper(
+                w3,
+                contract,
+                tx_params,
+                private_key,
+                receipt_tracker,
+                on_mined=lambda hash_value, signature, receipt: register_stamp(
+                    hash_value, signature, receipt.blockNumber
+                ),
+            )
+
+        # En modo batch los hashes sin firma se sellan en lotes, a través de la raíz de Merkle
+        if STAMP_MODE == "batch":
+            batcher = MerkleBatcher(
+                w3,
+                contract,
+                tx_params,
+                private_key,
+                receipt_tracker,
+                PROOF_DB_PATH,
+                BATCH_SIZE,
+                BATCH_WAIT,
+            )
+            batcher.start()
+    except Exception as e:
+        logger.error("Error inicializando la conexión con el nodo: %s", e)
+        startup_error = str(e)
+        return
+
+    ready.set()
+    logger.info("API lista en %.2f s", time.perf_counter() - started)
+
 
-# Inicializar conexión y cuenta
-try:
-    w3 = connect_to_node(NODE_URI)
-    account_address, private_key = get_local_account(KEYSTORE_DIR, PASSWORD_FILE)
+def create_app():
+    """Crea la aplicación; la inicialización corre en segundo plano (una vez por proceso)"""
+    global startup_thread
+    app = Flask(__name__)
+    app.register_blueprint(api)
+    if startup_thread is None:
+        startup_thread = threading.Thread(target=startup, name="startup", daemon=True)
+        startup_thread.start()
+    return app
 
-    contract = load_contract(w3, CONTRACT_PATH, NETWORK_ID)
-except Exception as e:
-    logger.error("Error inicializando la conexión con el nodo: %s", e)
-    contract = None
 
+@api.before_app_request
+def start_timer():
+    g.started = time.perf_counter()
 
-@app.route("/stamped/<hash_value>", methods=["GET"])
+
+@api.before_app_request
+def require_ready():
+    """Hasta que la inicialización termina, sólo se atienden los endpoints de estado"""
+    if not ready.is_set() and request.endpoint not in UNGATED_ENDPOINTS:
+        return jsonify(message="Service unavailable"), 503
+
+
+@api.after_app_request
+def record_request(response):
+    """Registra la latencia del requerimiento por ruta y código de respuesta"""
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    observe_request(route, request.method, response.status_code, g.started)
+    return response
+
+
+def lookup_stamp(hash_value, use_negative=True):
+    """
+    Devuelve (signer, blockNumber) del hash, o None si no está sellado, pasando
+    por la caché. Se lee del índice local si está al día y, si no (p. ej.
+    durante la sincronización inicial), del contrato.
+
+    El índice va SYNC_LAG bloques (más el intervalo de consulta) detrás de la
+    cabeza, y no maneja reorganizaciones más profundas que ese atraso: un sello
+    de un bloque que después se descarta puede quedar en el índice. Por eso con
+    use_negative=False (la verificación antes de sellar) un "no encontrado",
+    cacheado o del índice, se confirma con stamped() en el contrato.
+    """
+    cached = stamp_cache.get(hash_value)
+    if cached is NOT_FOUND and use_negative:
+        return None
+    if cached is not None and cached is not NOT_FOUND:
+        return cached
+
+    from_index = indexer is not None and indexer.synced
+    stamp = indexer.lookup(hash_value) if from_index else None
+    if stamp is None and (not from_index or not use_negative):
+        stamp = stamp_from_contract(contract.functions.stamped(hash_value).call())
+
+    stamp_cache.put(hash_value, stamp if stamp is not None else NOT_FOUND)
+    return stamp
+
+
+def lookup_stamps(hash_values, use_negative=True):
+    """
+    Como lookup_stamp, para varios hashes a la vez. Los que no están en la
+    caché se leen del índice local o, si no está al día (o con use_negative=False
+    para los que el índice no tiene), del contrato con batches de JSON-RPC de
+    CALLS_PER_BATCH llamadas.
+    """
+    stamps = {}
+    missing = []
+    for hash_value in hash_values:
+        cached = stamp_cache.get(hash_value)
+        if cached is NOT_FOUND and use_negative:
+            stamps[hash_value] = None
+        elif cached is not None and cached is not NOT_FOUND:
+            stamps[hash_value] = cached
+        else:
+            missing.append(hash_value)
+
+    found = {}
+    from_index = indexer is not None and indexer.synced
+    if from_index:
+        found = {hash_value: indexer.lookup(hash_value) for hash_value in missing}
+    unresolved = [h for h in missing if not from_index or (found[h] is None and not use_negative)]
+    with bulk_lock:
+        for i in range(0, len(unresolved), CALLS_PER_BATCH):
+            with bulk_w3.batch_requests() as batch:
+                chunk = unresolved[i : i + CALLS_PER_BATCH]
+                for hash_value in chunk:
+                    batch.add(bulk_contract.functions.stamped(hash_value))
+                for hash_value, data in zip(chunk, batch.execute()):
+                    found[hash_value] = stamp_from_contract(data)
+
+    for hash_value, stamp in found.items():
+        stamp_cache.put(hash_value, stamp if stamp is not None else NOT_FOUND)
+        stamps[hash_value] = stamp
+    return [stamps[hash_value] for hash_value in hash_values]
+
+
+def read_bulk_request(field):
+    """
+    Lee la lista `field` del cuerpo JSON de un requerimiento masivo. Devuelve
+    (lista, None), o (None, respuesta de error).
+    """
+    if request.mimetype != "application/json":
+        return None, (jsonify(message="Invalid Content-Type"), 400)
+    try:
+        items = request.get_json().get(field)
+    except Exception as e:
+        logger.error("Error parsing request: %s", e)
+        items = None
+    if not isinstance(items, list) or not items:
+        return None, (jsonify(message="Invalid request format"), 400)
+    if len(items) > BULK_MAX_HASHES:
+        return None, (jsonify(message=f"Too many hashes (max {BULK_MAX_HASHES})"), 400)
+    return items, None
+
+
+def register_stamp(hash_value, signature, block_number):
+    """
+    Registra en el índice un sello hecho por esta API sin esperar al indexador,
+    y descarta el "no encontrado" cacheado en la verificación.
+    """
+    if indexer is not None:
+        signer = stamp_signer(
+            "stampSigned" if signature else "stamp",
+            {"hash": Web3.to_bytes(hexstr=hash_value), "signature": signature},
+            account_address,
+        )
+        indexer.record(hash_value, signer, block_number)
+    stamp_cache.invalidate(hash_value)
+
+
+def submit_batched(hash_value):
+    """
+    Agrega un hash sin firma al lote abierto (modo batch) y devuelve (código,
+    datos): 403 si ya está en un lote minado o 202 con su estado. Lo usan
+    POST /stamp y POST /stamp/batch, para que un hash reciba la misma respuesta
+    por las dos rutas.
+    """
+    batched = batcher.proof(hash_value)
+    if batched is not None and batched["status"] == "mined":
+        return 403, {
+            "message": "Hash already stamped",
+            "signer": account_address,
+            "blockNumber": batched["blockNumber"],
+            "root": batched["root"],
+        }
+    batched = batcher.add(hash_value)
+    return 202, {"hash": hash_value, "status": batched["status"]}
+
+
+@api.route("/stamped/<hash_value>", methods=["GET"])
 def get_stamped(hash_value):
     """Devuelve el registro de un hash"""
 
@@ -49,17 +335,16 @@ def get_stamped(hash_value):
         return jsonify(message="Invalid hash format"), 400
 
     try:
-        stamped_data = contract.functions.stamped(hash_value).call()
-        # observacion: aca es preferible comparar el bloque, mas eficiente
-        if stamped_data[0] != "0x0000000000000000000000000000000000000000":
-            return jsonify(signer=stamped_data[0], blockNumber=stamped_data[1]), 200
+        stamp = lookup_stamp(hash_value)
+        if stamp is not None:
+            return jsonify(signer=stamp[0], blockNumber=stamp[1]), 200
         return jsonify(message="Hash not found"), 404
     except Exception as e:
         logger.error("Error en stamped: %s", e)
         return jsonify(message="Internal server error"), 500
 
 
-@app.route("/stamp", methods=["POST"])
+@api.route("/stamp", methods=["POST"])
 def post_stamp():
     """Registra un hash en la blockchain"""
     if request.mimetype != "application/json":
@@ -79,37 +364,56 @@ def post_stamp():
             if not is_valid_signature(hash_value, signature):
                 return jsonify(message="Invalid signature format"), 400
 
+            # Si se indica el firmante esperado, la firma debe ser suya
+            signer = req.get("signer")
+            if signer is not None and not matches_signer(hash_value, signature, signer):
+                return jsonify(message="Signature does not match signer"), 400
+
     except Exception as e:
         logger.error("Error parsing request: %s", e)
         return jsonify(message="Invalid request format"), 400
 
     try:
         # Verificar si el hash ya está registrado
-        stamped_data = contract.functions.stamped(hash_value).call()
-        if stamped_data[0] != "0x0000000000000000000000000000000000000000":
+        stamp = lookup_stamp(hash_value, use_negative=False)
+        if stamp is not None:
             return (
                 jsonify(
                     message="Hash already stamped",
-                    signer=stamped_data[0],
-                    blockNumber=stamped_data[1],
+                    signer=stamp[0],
+                    blockNumber=stamp[1],
                 ),
                 403,
             )
 
-        # Construir y firmar transacción
-        signed_tx = build_and_sign_transaction(
-            w3, contract, account_address, private_key, hash_value, signature
-        )
+        # Los sellos firmados registran a su firmante, por lo que no se agrupan
+        if batcher is not None and not signature:
+            code, body = submit_batched(hash_value)
+            return jsonify(body), code
+
+        if async_stamper is not None:
+            job, _ = async_stamper.submit(hash_value, signature)
+            if job is None:
+                # El envío está atrasado: que el cliente reintente más tarde
+                return jsonify(message="Service busy"), 503, {"Retry-After": str(SUBMIT_TIMEOUT)}
+            if job["status"] == "failed":
+                return jsonify(message="Transaction failed"), 500
+            return jsonify(transaction=job["transaction"], status=job["status"]), 202
 
-        # Enviar la transacción
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        # Construir, firmar y enviar la transacción
+        tx_hash = send_stamp_transaction(
+            w3, contract, tx_params, private_key, hash_value, signature
+        )
 
         # Esperar el recibo de la transacción
-        tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        tx_receipt = receipt_tracker.wait(tx_hash, RECEIPT_TIMEOUT)
 
         if tx_receipt.status != 1:
+            stamp_cache.invalidate(hash_value)
             return jsonify(message="Transaction failed"), 500
 
+        register_stamp(hash_value, signature, tx_receipt.blockNumber)
+
         return (
             jsonify(transaction=tx_hash.hex(), blockNumber=tx_receipt.blockNumber),
             201,
@@ -120,5 +424,222 @@ def post_stamp():
         return jsonify(message="Internal server error"), 500
 
 
+@api.route("/stamped/batch", methods=["POST"])
+def post_stamped_batch():
+    """Devuelve el registro de varios hashes; cada resultado lleva el código que tendría en GET /stamped"""
+    hashes, error = read_bulk_request("hashes")
+    if error:
+        return error
+
+    try:
+        valid = [h for h in hashes if isinstance(h, str) and is_valid_format_hash(h)]
+        stamps = dict(zip(valid, lookup_stamps(valid)))
+    except Exception as e:
+        logger.error("Error en stamped batch: %s", e)
+        return jsonify(message="Internal server error"), 500
+
+    results = []
+    for hash_value in hashes:
+        if not isinstance(hash_value, str) or hash_value not in stamps:
+            results.append({"hash": hash_value, "code": 400, "message": "Invalid hash format"})
+        elif stamps[hash_value] is None:
+            results.append({"hash": hash_value, "code": 404, "message": "Hash not found"})
+        else:
+            signer, block_number = stamps[hash_value]
+            results.append(
+                {"hash": hash_value, "code": 200, "signer": signer, "blockNumber": block_number}
+            )
+    return jsonify(results=results), 200
+
+
+@api.route("/stamp/batch", methods=["POST"])
+def post_stamp_batch():
+    """
+    Registra varios hashes. Se validan todos antes de enviar, y los válidos se
+    envían con nonces consecutivos; cada resultado lleva el código que tendría
+    en POST /stamp.
+    """
+    items, error = read_bulk_request("stamps")
+    if error:
+        return error
+
+    results = [None] * len(items)
+    valid = []  # (posición, hash, firma)
+    seen = set()
+    for i, item in enumerate(items):
+        hash_value = item.get("hash") if isinstance(item, dict) else None
+        signature = item.get("signature") if isinstance(item, dict) else None
+        if not isinstance(hash_value, str) or not is_valid_format_hash(hash_value):
+            results[i] = {"hash": hash_value, "code": 400, "message": "Invalid hash format"}
+        elif signature is not None and not is_valid_signature(hash_value, signature):
+            results[i] = {"hash": hash_value, "code": 400, "message": "Invalid signature format"}
+        elif (
+            signature is not None
+            and item.get("signer") is not None
+            and not matches_signer(hash_value, signature, item["signer"])
+        ):
+            results[i] = {"hash": hash_value, "code": 400, "message": "Signature does not match signer"}
+        elif hash_value.lower() in seen:
+            results[i] = {"hash": hash_value, "code": 400, "message": "Duplicate hash in request"}
+        else:
+            seen.add(hash_value.lower())
+            valid.append((i, hash_value, signature))
+
+    try:
+        stamps = lookup_stamps([hash_value for _, hash_value, _ in valid], use_negative=False)
+    except Exception as e:
+        logger.error("Error en stamp batch: %s", e)
+        return jsonify(message="Internal server error"), 500
+
+    to_send = []
+    busy = False
+    for (i, hash_value, signature), stamp in zip(valid, stamps):
+        if stamp is not None:
+            results[i] = {
+                "hash": hash_value,
+                "code": 403,
+                "message": "Hash already stamped",
+                "signer": stamp[0],
+                "blockNumber": stamp[1],
+            }
+        elif batcher is not None and not signature:
+            code, body = submit_batched(hash_value)
+            results[i] = {"hash": hash_value, "code": code, **body}
+        elif async_stamper is not None:
+            # Con el envío atrasado, el resto del pedido no se encola
+            job = async_stamper.submit(hash_value, signature)[0] if not busy else None
+            if job is None:
+                busy = True
+                results[i] = {"hash": hash_value, "code": 503, "message": "Service busy"}
+            elif job["status"] == "failed":
+                results[i] = {"hash": hash_value, "code": 500, "message": "Transaction failed"}
+            else:
+                results[i] = {
+                    "hash": hash_value,
+                    "code": 202,
+                    "transaction": job["transaction"],
+                    "status": job["status"],
+                }
+        else:
+            to_send.append((i, hash_value, signature))
+
+    # Modo sync: se envían todas las transacciones sin soltar el nonce y
+    # después se esperan los recibos, que se minan en paralelo
+    sent = []
+    with tx_params.lock:
+        for i, hash_value, signature in to_send:
+            try:
+                tx_hash = send_stamp_transaction(
+                    w3, contract, tx_params, private_key, hash_value, signature
+                )
+                sent.append((i, hash_value, signature, tx_hash))
+            except Exception as e:
+                logger.error("Error in stamp batch (%s): %s", hash_value, e)
+                results[i] = {"hash": hash_value, "code": 500, "message": "Transaction failed"}
+
+    for i, hash_value, signature, tx_hash in sent:
+        try:
+            tx_receipt = receipt_tracker.wait(tx_hash, RECEIPT_TIMEOUT)
+        except Exception as e:
+            logger.error("Error in stamp batch (%s): %s", hash_value, e)
+            tx_receipt = None
+        if tx_receipt is None or tx_receipt.status != 1:
+            stamp_cache.invalidate(hash_value)
+            results[i] = {"hash": hash_value, "code": 500, "message": "Transaction failed"}
+            continue
+        register_stamp(hash_value, signature, tx_receipt.blockNumber)
+        results[i] = {
+            "hash": hash_value,
+            "code": 201,
+            "transaction": Web3.to_hex(tx_hash),
+            "blockNumber": tx_receipt.blockNumber,
+        }
+
+    return jsonify(results=results), 200
+
+
+@api.route("/stamp/status/<hash_value>", methods=["GET"])
+def get_stamp_status(hash_value):
+    """Devuelve el estado de un sellado: queued, pending, mined o failed"""
+
+    if not is_valid_format_hash(hash_value):
+        return jsonify(message="Invalid hash format"), 400
+
+    try:
+        job = async_stamper.status(hash_value) if async_stamper is not None else None
+        if job is None and batcher is not None:
+            job = batcher.proof(hash_value)
+        if job is not None:
+            return jsonify(job), 200
+
+        # Sellos hechos por otro proceso, o antes de reiniciar la API
+        stamp = lookup_stamp(hash_value)
+        if stamp is not None:
+            return jsonify(hash=hash_value, status="mined", blockNumber=stamp[1]), 200
+        return jsonify(message="Hash not found"), 404
+    except Exception as e:
+        logger.error("Error en stamp status: %s", e)
+        return jsonify(message="Internal server error"), 500
+
+
+@api.route("/proof/<hash_value>", methods=["GET"])
+def get_proof(hash_value):
+    """Devuelve la prueba de inclusión de un hash sellado en lote"""
+
+    if not is_valid_format_hash(hash_value):
+        return jsonify(message="Invalid hash format"), 400
+
+    try:
+        batched = batcher.proof(hash_value) if batcher is not None else None
+        if batched is None:
+            return jsonify(message="Hash not found"), 404
+        return jsonify(batched), 200
+    except Exception as e:
+        logger.error("Error en proof: %s", e)
+        return jsonify(message="Internal server error"), 500
+
+
+@api.route("/cache/stats", methods=["GET"])
+def get_cache_stats():
+    """Devuelve los contadores de la caché de sellos y de la de firmantes"""
+    stats = stamp_cache.stats()
+    stats["signatures"] = signature_cache_stats()
+    return jsonify(stats), 200
+
+
+@api.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Devuelve las métricas de la API en el formato de texto de Prometheus"""
+    in_flight = receipt_tracker.in_flight() if receipt_tracker is not None else 0
+    body = render_metrics(stamp_cache.stats(), signature_cache_stats(), in_flight)
+    return body, 200, {"Content-Type": METRICS_CONTENT_TYPE}
+
+
+@api.route("/health/live", methods=["GET"])
+def get_liveness():
+    """Indica si el proceso está vivo: 503 sólo si la inicialización falló"""
+    if startup_error is not None:
+        return jsonify(status="failed", error=startup_error), 503
+    return jsonify(status="alive"), 200
+
+
+@api.route("/health/ready", methods=["GET"])
+def get_readiness():
+    """Indica si la API puede recibir tráfico: cuenta, contrato y nonce listos"""
+    checks = {
+        "account": private_key is not None,
+        "contract": contract is not None,
+        "nonce": tx_params is not None,
+        "indexSynced": indexer is not None and indexer.synced,
+    }
+    if ready.is_set():
+        return jsonify(status="ready", checks=checks), 200
+    status = "failed" if startup_error is not None else "starting"
+    return jsonify(status=status, checks=checks, error=startup_error), 503
+
+
 if __name__ == "__main__":
-    app.run(host="localhost", port=PORT, debug=True)
+    # Sin el reloader de Werkzeug: el proceso padre y el hijo ejecutarían cada
+    # uno la inicialización (dos índices sobre el mismo SQLite, dos dueños del
+    # nonce de la cuenta y dos reanudaciones de los lotes pendientes)
+    create_app().run(host="localhost", port=PORT, debug=True, use_reloader=False)
@@ -0,0 +1,363 @@
+from quart import Quart, g, jsonify, request
+from web3 import Web3
+import asyncio
+import contextlib
+import logging
+import time
+
+# Variante ASGI de la API (mismos endpoints /stamped y /stamp que app.py) sobre
+# AsyncWeb3: todas las llamadas al nodo se hacen por una única conexión IPC
+# persistente y asíncrona, por lo que un requerimiento que espera al nodo no
+# ocupa un hilo y un solo proceso atiende cientos de consultas simultáneas.
+#
+# Ejecución (desde src/):
+#   hypercorn asgi_app:app --bind 127.0.0.1:5000
+#
+# El índice local de sellos sigue siendo el de app.py (un hilo con su propia
+# conexión síncrona). Lo que bloquea (descifrar el keystore, conectar el índice,
+# leer y escribir en SQLite, que comparte un lock con el indexador) corre en un
+# hilo con asyncio.to_thread, para no detener el event loop.
+
+from config import (
+    PORT,
+    NODE_URI,
+    CONTRACT_PATH,
+    NETWORK_ID,
+    KEYSTORE_DIR,
+    PASSWORD_FILE,
+    STAMP_CACHE_SIZE,
+    STAMP_CACHE_NEGATIVE_TTL,
+    INDEX_DB_PATH,
+    STAMP_MODE,
+)
+from ethereum_utils import (
+    async_connect_to_node,
+    async_send_stamp_transaction,
+    connect_to_node,
+    get_keystore_address,
+    get_local_account,
+    load_contract,
+    is_valid_format_hash,
+    is_valid_signature,
+    stamp_from_contract,
+)
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, observe_request, render as render_metrics
+from receipt_tracker import AsyncReceiptTracker
+from signatures import cache_stats as signature_cache_stats, matches_signer
+from stamp_cache import NOT_FOUND, StampCache
+from stamp_indexer import StampIndexer, get_deployment_block, stamp_signer
+from transaction_params import AsyncTransactionParams
+
+# Esta variante sólo sella en modo sync (los modos async y batch están en
+# app.py): con otro STAMP_MODE no arranca, en lugar de ignorarlo
+if STAMP_MODE != "sync":
+    raise ValueError(f"asgi_app sólo admite STAMP_MODE=sync (configurado: {STAMP_MODE}); usar app.py")
+
+# Tiempo máximo de espera del recibo de una transacción
+RECEIPT_TIMEOUT = 120
+
+# Llamadas stamped(hash) en curso a la vez por la conexión compartida. web3
+# recuerda la información de hasta 500 pedidos en curso por conexión; por
+# encima de eso las respuestas llegan sin decodificar
+MAX_NODE_CALLS = 100
+
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = Quart(__name__)
+
+# Caché de las consultas stamped(hash) al contrato
+stamp_cache = StampCache(STAMP_CACHE_SIZE, STAMP_CACHE_NEGATIVE_TTL)
+node_calls = asyncio.Semaphore(MAX_NODE_CALLS)
+
+# Se inicializan en segundo plano al arrancar el servidor (ver initialize);
+# hasta que ready se activa, la API responde 503 salvo en /health/live,
+# /health/ready y /metrics
+w3 = None
+contract = None
+account_address = None
+private_key = None
+tx_params = None
+receipt_tracker = None
+indexer = None
+
+ready = asyncio.Event()
+startup_error = None
+startup_task = None
+
+UNGATED_ENDPOINTS = {"get_liveness", "get_readiness", "get_metrics"}
+
+
+async def connect_stamper():
+    """
+    Conexión asíncrona, contrato, chainId, gasPrice y nonce de la cuenta, y el
+    seguimiento de recibos. El nonce se pide con la dirección del keystore, sin
+    esperar a descifrar la clave.
+    """
+    node = await async_connect_to_node(NODE_URI)
+    params = AsyncTransactionParams(node, get_keystore_address(KEYSTORE_DIR))
+    await params.start()
+    tracker = AsyncReceiptTracker(node)
+    await tracker.start()
+    return node, load_contract(node, CONTRACT_PATH, NETWORK_ID), params, tracker
+
+
+def connect_indexer():
+    """Índice local de sellos, con su propia conexión síncrona (ver connect_indexer en app.py)"""
+    index_w3 = connect_to_node(NODE_URI)
+    return StampIndexer(
+        index_w3,
+        load_contract(index_w3, CONTRACT_PATH, NETWORK_ID),
+        INDEX_DB_PATH,
+        get_deployment_block(index_w3, CONTRACT_PATH, NETWORK_ID),
+    )
+
+
+async def initialize():
+    """
+    Inicializa la conexión, la cuenta y las tareas de fondo. El descifrado del
+    keystore y la conexión del índice corren en hilos, en paralelo con la
+    conexión asíncrona y la carga del nonce. Si algo falla, la API queda sin
+    atender y /health/live responde 503 para que se reinicie el proceso.
+    """
+    global w3, contract, account_address, private_key, tx_params, receipt_tracker, indexer, startup_error
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        asyncio.to_thread(get_local_account, KEYSTORE_DIR, PASSWORD_FILE),
+        connect_stamper(),
+        asyncio.to_thread(connect_indexer),
+        return_exceptions=True,
+    )
+    account, stamper, index = results
+    # Se guarda lo que sí se inicializó, para que shutdown lo cierre
+    if not isinstance(stamper, BaseException):
+        w3, contract, tx_params, receipt_tracker = stamper
+    if not isinstance(index, BaseException):
+        indexer = index
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        account_address, private_key = account
+        if account_address != tx_params.account_address:
+            raise ValueError("La cuenta descifrada no coincide con la dirección del keystore")
+        indexer.start()
+    except Exception as e:
+        logger.error("Error inicializando la conexión con el nodo: %s", e)
+        startup_error = str(e)
+        return
+
+    ready.set()
+    logger.info("API lista en %.2f s", time.perf_counter() - started)
+
+
+@app.before_serving
+async def startup():
+    """Lanza la inicialización en segundo plano; mientras tanto se atienden los endpoints de estado"""
+    global startup_task
+    startup_task = asyncio.create_task(initialize())
+
+
+@app.before_request
+async def start_timer():
+    g.started = time.perf_counter()
+
+
+@app.before_request
+async def require_ready():
+    """Hasta que la inicialización termina, sólo se atienden los endpoints de estado"""
+    if not ready.is_set() and request.endpoint not in UNGATED_ENDPOINTS:
+        return jsonify(message="Service unavailable"), 503
+
+
+@app.after_request
+async def record_request(response):
+    """Registra la latencia del requerimiento por ruta y código de respuesta"""
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    observe_request(route, request.method, response.status_code, g.started)
+    return response
+
+
+@app.after_serving
+async def shutdown():
+    """Detiene lo que se llegó a inicializar"""
+    if startup_task is not None and not startup_task.done():
+        startup_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await startup_task
+    if indexer is not None:
+        await asyncio.to_thread(indexer.stop)
+    if receipt_tracker is not None:
+        await receipt_tracker.stop()
+    if tx_params is not None:
+        await tx_params.stop()
+    if w3 is not None:
+        await w3.provider.disconnect()
+
+
+async def lookup_stamp(hash_value, use_negative=True):
+    """
+    Devuelve (signer, blockNumber) del hash, o None si no está sellado, pasando
+    por la caché. Como en app.py, con use_negative=False un "no encontrado",
+    cacheado o del índice, se confirma con stamped() en el contrato (ver
+    lookup_stamp en app.py: el índice va detrás de la cabeza y no maneja
+    reorganizaciones).
+    """
+    cached = stamp_cache.get(hash_value)
+    if cached is NOT_FOUND and use_negative:
+        return None
+    if cached is not None and cached is not NOT_FOUND:
+        return cached
+
+    from_index = indexer is not None and indexer.synced
+    stamp = await asyncio.to_thread(indexer.lookup, hash_value) if from_index else None
+    if stamp is None and (not from_index or not use_negative):
+        async with node_calls:
+            stamp = stamp_from_contract(await contract.functions.stamped(hash_value).call())
+
+    stamp_cache.put(hash_value, stamp if stamp is not None else NOT_FOUND)
+    return stamp
+
+
+async def register_stamp(hash_value, signature, block_number):
+    """
+    Registra en el índice un sello hecho por esta API sin esperar al indexador,
+    y descarta el "no encontrado" cacheado en la verificación. La escritura en
+    SQLite (con commit) se hace en un hilo.
+    """
+    if indexer is not None:
+        signer = stamp_signer(
+            "stampSigned" if signature else "stamp",
+            {"hash": Web3.to_bytes(hexstr=hash_value), "signature": signature},
+            account_address,
+        )
+        await asyncio.to_thread(indexer.record, hash_value, signer, block_number)
+    stamp_cache.invalidate(hash_value)
+
+
+@app.route("/stamped/<hash_value>", methods=["GET"])
+async def get_stamped(hash_value):
+    """Devuelve el registro de un hash"""
+
+    if not is_valid_format_hash(hash_value):
+        return jsonify(message="Invalid hash format"), 400
+
+    try:
+        stamp = await lookup_stamp(hash_value)
+        if stamp is not None:
+            return jsonify(signer=stamp[0], blockNumber=stamp[1]), 200
+        return jsonify(message="Hash not found"), 404
+    except Exception as e:
+        logger.error("Error en stamped: %s", e)
+        return jsonify(message="Internal server error"), 500
+
+
+@app.route("/stamp", methods=["POST"])
+async def post_stamp():
+    """Registra un hash en la blockchain"""
+    if request.mimetype != "application/json":
+        return jsonify(message="Invalid Content-Type"), 400
+
+    try:
+        req = await request.get_json()
+        hash_value = req.get("hash")
+        signature = req.get("signature")
+
+        # Validar el hash
+        if not hash_value or not is_valid_format_hash(hash_value):
+            return jsonify(message="Invalid hash format"), 400
+
+        # Validar la firma si está presente
+        if signature is not None:
+            if not is_valid_signature(hash_value, signature):
+                return jsonify(message="Invalid signature format"), 400
+
+            # Si se indica el firmante esperado, la firma debe ser suya
+            signer = req.get("signer")
+            if signer is not None and not matches_signer(hash_value, signature, signer):
+                return jsonify(message="Signature does not match signer"), 400
+
+    except Exception as e:
+        logger.error("Error parsing request: %s", e)
+        return jsonify(message="Invalid request format"), 400
+
+    try:
+        # Verificar si el hash ya está registrado
+        stamp = await lookup_stamp(hash_value, use_negative=False)
+        if stamp is not None:
+            return (
+                jsonify(
+                    message="Hash already stamped",
+                    signer=stamp[0],
+                    blockNumber=stamp[1],
+                ),
+                403,
+            )
+
+        # Construir, firmar y enviar la transacción
+        tx_hash = await async_send_stamp_transaction(
+            w3, contract, tx_params, private_key, hash_value, signature
+        )
+
+        # Esperar el recibo de la transacción
+        tx_receipt = await receipt_tracker.wait(tx_hash, RECEIPT_TIMEOUT)
+
+        if tx_receipt.status != 1:
+            stamp_cache.invalidate(hash_value)
+            return jsonify(message="Transaction failed"), 500
+
+        await register_stamp(hash_value, signature, tx_receipt.blockNumber)
+
+        return (
+            jsonify(transaction=Web3.to_hex(tx_hash), blockNumber=tx_receipt.blockNumber),
+            201,
+        )
+
+    except Exception as e:
+        logger.error("Error in stamp: %s", e)
+        return jsonify(message="Internal server error"), 500
+
+
+@app.route("/cache/stats", methods=["GET"])
+async def get_cache_stats():
+    """Devuelve los contadores de la caché de sellos y de la de firmantes"""
+    stats = stamp_cache.stats()
+    stats["signatures"] = signature_cache_stats()
+    return jsonify(stats), 200
+
+
+@app.route("/metrics", methods=["GET"])
+async def get_metrics():
+    """Devuelve las métricas de la API en el formato de texto de Prometheus"""
+    in_flight = receipt_tracker.in_flight() if receipt_tracker is not None else 0
+    body = render_metrics(stamp_cache.stats(), signature_cache_stats(), in_flight)
+    return body, 200, {"Content-Type": METRICS_CONTENT_TYPE}
+
+
+@app.route("/health/live", methods=["GET"])
+async def get_liveness():
+    """Indica si el proceso está vivo: 503 sólo si la inicialización falló"""
+    if startup_error is not None:
+        return jsonify(status="failed", error=startup_error), 503
+    return jsonify(status="alive"), 200
+
+
+@app.route("/health/ready", methods=["GET"])
+async def get_readiness():
+    """Indica si la API puede recibir tráfico: cuenta, contrato y nonce listos"""
+    checks = {
+        "account": private_key is not None,
+        "contract": contract is not None,
+        "nonce": tx_params is not None,
+        "indexSynced": indexer is not None and indexer.synced,
+    }
+    if ready.is_set():
+        return jsonify(status="ready", checks=checks), 200
+    status = "failed" if startup_error is not None else "starting"
+    return jsonify(status=status, checks=checks, error=startup_error), 503
+
+
+if __name__ == "__main__":
+    app.run(host="localhost", port=PORT)
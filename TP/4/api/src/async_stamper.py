@@ -0,0 +1,145 @@
+import collections
+import logging
+import queue
+import threading
+import time
+
+from web3 import Web3
+
+from ethereum_utils import send_stamp_transaction
+
+# Sellado asíncrono: POST /stamp encola el hash y responde apenas la
+# transacción se envía, sin esperar a que se mine.
+#
+# Un único hilo (submitter) firma y envía las transacciones en orden, con los
+# nonces asignados localmente por TransactionParams. La cola admite hasta
+# MAX_QUEUED sellos, y un requerimiento cuya transacción no sale en
+# SUBMIT_TIMEOUT segundos se retira de la cola: en los dos casos submit no
+# acepta el hash y la API responde 503, en lugar de acumular trabajo sin
+# transacción. La confirmación la hace el ReceiptTracker compartido: cuando la transacción se
+# mina, un callback actualiza el estado del sello y llama a on_mined.
+#
+# Estados: queued (en cola), pending (enviada), mined (minada con éxito) y
+# failed (error al enviar o transacción revertida). Los sellos terminados (mined
+# o failed) se olvidan JOB_RETENTION segundos después; a partir de ahí
+# GET /stamp/status responde con el índice local de sellos, como para los
+# sellos hechos antes de reiniciar la API.
+
+logger = logging.getLogger(__name__)
+
+SUBMIT_TIMEOUT = 10  # Segundos que el requerimiento espera a que se envíe la transacción
+MAX_QUEUED = 1000  # Sellos en cola como máximo
+JOB_RETENTION = 600  # Segundos que se recuerda el estado de un sello terminado
+
+
+class AsyncStamper:
+    """Envía sellos en segundo plano y sigue su confirmación."""
+
+    def __init__(self, w3: Web3, contract, tx_params, private_key: str, tracker, on_mined=None):
+        self.w3 = w3
+        self.contract = contract
+        self.tx_params = tx_params
+        self.private_key = private_key
+        self.tracker = tracker
+        self.on_mined = on_mined
+        self.lock = threading.Lock()
+        self.jobs = {}  # hash -> estado del sello
+        self.finished = collections.deque()  # (momento, hash, estado) en orden de finalización
+        self.queue = queue.Queue(MAX_QUEUED)
+        threading.Thread(target=self._run, name="stamp-submitter", daemon=True).start()
+
+    def submit(self, hash_value: str, signature: str = None) -> tuple:
+        """
+        Encola un hash para sellar y espera a que su transacción se envíe.
+        Devuelve (estado, nuevo); si el hash ya estaba en curso no se encola de
+        nuevo. Devuelve (None, False) si la cola está llena o la transacción no
+        se envió a tiempo: el hash no queda encolado.
+        """
+        key = hash_value.lower()
+        with self.lock:
+            self._evict()
+            job = self.jobs.get(key)
+            if job is not None and job["status"] in ("queued", "pending"):
+                return dict(job), False
+            job = {"hash": hash_value, "status": "queued", "transaction": None, "blockNumber": None}
+            task = {"key": key, "signature": signature, "sent": threading.Event(), "taken": False, "cancelled": False}
+            try:
+                self.queue.put_nowait(task)
+            except queue.Full:
+                return None, False
+            self.jobs[key] = job
+
+        if not task["sent"].wait(SUBMIT_TIMEOUT):
+            with self.lock:
+                if not task["taken"]:
+                    task["cancelled"] = True
+                    if self.jobs.get(key) is job:
+                        del self.jobs[key]
+                    return None, False
+            # El submitter ya lo está enviando; el envío no tarda más que el
+            # timeout del proveedor
+            task["sent"].wait()
+        return self.status(hash_value), True
+
+    def status(self, hash_value: str):
+        """Devuelve el estado de un sello en curso o terminado por este proceso, o None."""
+        with self.lock:
+            job = self.jobs.get(hash_value.lower())
+            return dict(job) if job is not None else None
+
+    def _update(self, key: str, **fields):
+        with self.lock:
+            job = self.jobs[key]
+            job.update(fields)
+            if job["status"] in ("mined", "failed"):
+                self.finished.append((time.monotonic(), key, job))
+
+    def _evict(self):
+        """Descarta los sellos terminados hace más de JOB_RETENTION segundos (con el lock tomado)."""
+        limit = time.monotonic() - JOB_RETENTION
+        while self.finished and self.finished[0][0] < limit:
+            _, key, job = self.finished.popleft()
+            # Si el hash se volvió a enviar después de fallar, su estado es otro
+            if self.jobs.get(key) is job:
+                del self.jobs[key]
+
+    def _run(self):
+        while True:
+            task = self.queue.get()
+            with self.lock:
+                if task["cancelled"]:
+                    continue
+                task["taken"] = True
+                key, signature = task["key"], task["signature"]
+                hash_value = self.jobs[key]["hash"]
+            try:
+                tx_hash = send_stamp_transaction(
+                    self.w3, self.contract, self.tx_params, self.private_key, hash_value, signature
+                )
+                self._update(key, status="pending", transaction=Web3.to_hex(tx_hash))
+                self.tracker.track(tx_hash).add_done_callback(
+                    lambda future, key=key, signature=signature: self._confirmed(key, signature, future)
+                )
+            except Exception as e:
+                logger.error(f"Error al enviar el sello {hash_value}: {e}")
+                self._update(key, status="failed", message=str(e))
+            finally:
+                task["sent"].set()
+
+    def _confirmed(self, key: str, signature: str, future):
+        if future.cancelled() or future.exception() is not None:
+            error = "cancelled" if future.cancelled() else str(future.exception())
+            self._update(key, status="failed", message=error)
+            return
+
+        receipt = future.result()
+        if receipt.status != 1:
+            self._update(key, status="failed", blockNumber=receipt.blockNumber, message="Transaction failed")
+            return
+
+        self._update(key, status="mined", blockNumber=receipt.blockNumber)
+        if self.on_mined is not None:
+            try:
+                self.on_mined(self.jobs[key]["hash"], signature, receipt)
+            except Exception as e:
+                logger.error(f"Error al registrar el sello {key}: {e}")
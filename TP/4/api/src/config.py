@@ -20,3 +20,31 @@ KEYSTORE_DIR = os.getenv("KEYSTORE_DIR")
 
 # Ruta al archivo que contiene la contraseña para el keystore
 PASSWORD_FILE = os.getenv("PASSWORD_FILE")
+
+# Caché de GET /stamped: cantidad máxima de hashes y segundos que se recuerda
+# un hash no sellado (opcionales)
+STAMP_CACHE_SIZE = int(os.getenv("STAMP_CACHE_SIZE", "100000"))
+STAMP_CACHE_NEGATIVE_TTL = float(os.getenv("STAMP_CACHE_NEGATIVE_TTL", "5"))
+
+# Archivo SQLite del índice local de sellos (opcional)
+INDEX_DB_PATH = os.getenv("INDEX_DB_PATH", "stamps.db")
+
+# Modo de POST /stamp (opcional): "sync" espera a que la transacción se mine y
+# responde 201; "async" responde 202 apenas se envía y el estado se consulta en
+# GET /stamp/status/<hash>; "batch" agrupa los hashes sin firma en lotes y sella
+# la raíz de Merkle de cada lote (pruebas en GET /proof/<hash>). Otro valor es
+# un error al cargar la configuración, para no arrancar en un modo inesperado
+STAMP_MODES = ("sync", "async", "batch")
+STAMP_MODE = os.getenv("STAMP_MODE", "sync").strip().lower()
+if STAMP_MODE not in STAMP_MODES:
+    raise ValueError(f"STAMP_MODE inválido '{STAMP_MODE}' (válidos: {', '.join(STAMP_MODES)})")
+
+# Cantidad máxima de hashes por requerimiento en POST /stamped/batch y
+# POST /stamp/batch (opcional)
+BULK_MAX_HASHES = int(os.getenv("BULK_MAX_HASHES", "1000"))
+
+# Modo batch (opcionales): hashes por lote, segundos máximos que un lote queda
+# abierto y archivo SQLite de las pruebas de inclusión
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "256"))
+BATCH_WAIT = float(os.getenv("BATCH_WAIT", "10"))
+PROOF_DB_PATH = os.getenv("PROOF_DB_PATH", "proofs.db")
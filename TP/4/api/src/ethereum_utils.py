@@ -1,12 +1,16 @@
 import re
 import json
 import logging
+from functools import lru_cache
 from pathlib import Path
 
-from web3 import Web3
+from web3 import AsyncIPCProvider, AsyncWeb3, Web3
+from web3.exceptions import Web3RPCError
 from web3.middleware import ExtraDataToPOAMiddleware
 from eth_account import Account
-from eth_account.messages import encode_defunct
+
+from metrics import RPCMetricsMiddleware
+from signatures import recover_signer
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -20,6 +24,16 @@ logger.addHandler(console_handler)
 SIGNATURE_PATTERN = re.compile(r"^0x[a-fA-F0-9]{130}$")
 HASH_PATTERN = re.compile(r"0x[0-9a-fA-F]{64}")
 
+# Límite de gas de stamp/stampSigned. El costo de un sello no depende del hash,
+# por lo que no se estima por transacción (el gas no usado no se cobra)
+STAMP_GAS = 100000
+NONCE_RETRIES = 2  # Reintentos de envío ante un nonce ya usado
+
+# Rechazos del nodo que indican que el nonce local ya se usó: otra transacción
+# de la cuenta (o esta misma, en un envío anterior que falló del lado de la API)
+# ya está en el pool o minada con ese nonce
+STALE_NONCE_ERRORS = ("nonce too low", "already known", "replacement transaction underpriced")
+
 
 # observacion: lo ideal seria
 # una clase stamper que se encarga de inicial el contrato con todas las variables que necesita para usar el contrato como la instancia de w3
@@ -31,6 +45,7 @@ def connect_to_node(uri: str) -> Web3:
 
     w3 = Web3(Web3.IPCProvider(uri))
     w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+    w3.middleware_onion.add(RPCMetricsMiddleware, "rpc_metrics")
 
     if not w3.is_connected():
         logger.error("Error al conectar con el nodo en '%s'", uri)
@@ -39,15 +54,44 @@ def connect_to_node(uri: str) -> Web3:
     return w3
 
 
-def get_local_account(keystore_dir: str, password_file: str) -> tuple:
-    """Obtiene la primera cuenta del keystore"""
+async def async_connect_to_node(uri: str) -> AsyncWeb3:
+    """Conecta a un nodo de Ethereum mediante IPC, con una conexión persistente asíncrona"""
+    if not uri:
+        raise ValueError("La URI del nodo no puede ser vacía")
 
+    try:
+        w3 = await AsyncWeb3(AsyncIPCProvider(uri))
+    except Exception as e:
+        logger.error("Error al conectar con el nodo en '%s': %s", uri, e)
+        raise ConnectionError(f"No se pudo conectar al nodo en {uri}")
+    w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+    w3.middleware_onion.add(RPCMetricsMiddleware, "rpc_metrics")
+    logger.info("Conexión al nodo Ethereum exitosa")
+    return w3
+
+
+def get_keystore_file(keystore_dir: str) -> Path:
+    """Devuelve el primer archivo del keystore"""
     keystore_files = sorted(Path(keystore_dir).glob("*"))
     if not keystore_files:
         logger.error("No se encontraron archivos de keystore")
         raise ValueError("No se encontraron archivos de keystore")
+    return keystore_files[0]
 
-    first_keystore = keystore_files[0]
+
+def get_keystore_address(keystore_dir: str) -> str:
+    """
+    Devuelve la dirección de la primera cuenta del keystore sin descifrar la
+    clave (el campo address del archivo no está cifrado).
+    """
+    with open(get_keystore_file(keystore_dir)) as keyfile:
+        return Web3.to_checksum_address(json.load(keyfile)["address"])
+
+
+def get_local_account(keystore_dir: str, password_file: str) -> tuple:
+    """Obtiene la primera cuenta del keystore"""
+
+    first_keystore = get_keystore_file(keystore_dir)
 
     try:
         with open(password_file, "r") as f:
@@ -76,48 +120,114 @@ def get_local_account(keystore_dir: str, password_file: str) -> tuple:
 # esta funcion depende de este contrato especifico, por lo que no es reutilizable en otro proyectos
 
 def build_and_sign_transaction(
-    w3, contract, account_address, private_key, hash_value, signature=None
-) -> dict:
-    """Construye y firma una transacción para registrar un hash en la blockchain"""
+    contract, tx_params, nonce, private_key, hash_value, signature=None
+):
+    """
+    Construye y firma una transacción para registrar un hash en la blockchain.
+    chainId, gasPrice y nonce salen de tx_params, sin consultar al nodo, por lo
+    que sirve tanto para un contrato de Web3 como de AsyncWeb3.
+    """
 
     if signature:
-        tx = contract.functions.stampSigned(hash_value, signature).build_transaction(
-            {
-                "from": account_address,
-                "gas": 100000,
-                "gasPrice": w3.eth.gas_price,
-                "nonce": w3.eth.get_transaction_count(account_address),
-                "chainId": w3.eth.chain_id,
-            }
-        )
+        data = contract.encode_abi("stampSigned", args=[hash_value, signature])
     else:
-        tx = contract.functions.stamp(hash_value).build_transaction(
-            {
-                "from": account_address,
-                "gas": 100000,
-                "gasPrice": w3.eth.gas_price,
-                "nonce": w3.eth.get_transaction_count(account_address),
-                "chainId": w3.eth.chain_id,
-            }
-        )
-
-    # Calcular gas estimado
-    try:
-        estimated_gas = w3.eth.estimate_gas(tx)
-        tx["gas"] = estimated_gas
-    except Exception as e:
-        logger.warning(f"Error al estimar gas para la transacción: {e}")
-        tx["gas"] = 100000  # defecto si no se puede estimar
+        data = contract.encode_abi("stamp", args=[hash_value])
+    tx = {
+        "to": contract.address,
+        "data": data,
+        "value": 0,
+        "gas": STAMP_GAS,
+        "gasPrice": tx_params.gas_price,
+        "nonce": nonce,
+        "chainId": tx_params.chain_id,
+    }
 
     # Firmar la transacción
-    signed_tx = w3.eth.account.sign_transaction(tx, private_key=private_key)
+    signed_tx = Account.sign_transaction(tx, private_key=private_key)
     return signed_tx
 
 
+def is_stale_nonce(error: Exception) -> bool:
+    """Indica si el nodo rechazó la transacción porque su nonce ya está usado."""
+    message = str(error).lower()
+    return any(text in message for text in STALE_NONCE_ERRORS)
+
+
+def send_stamp_transaction(
+    w3, contract, tx_params, private_key, hash_value, signature=None
+):
+    """
+    Firma y envía la transacción de un sello; devuelve su hash. Si el nodo la
+    rechaza por un nonce ya usado se resincroniza el nonce y se reintenta.
+
+    Si el envío falla sin respuesta del nodo (timeout, conexión caída) no se
+    sabe si la transacción entró al pool: el nonce se resincroniza (cuenta con
+    las pendientes) antes de propagar el error, para no reutilizarlo.
+    """
+    for attempt in range(NONCE_RETRIES + 1):
+        sending = False
+        try:
+            with tx_params.reserve_nonce() as nonce:
+                signed_tx = build_and_sign_transaction(
+                    contract, tx_params, nonce, private_key, hash_value, signature
+                )
+                sending = True
+                return w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        except Exception as e:
+            if not sending:
+                raise
+            if is_stale_nonce(e) and attempt < NONCE_RETRIES:
+                # La cuenta se usó desde otro lado: se vuelve a tomar el nonce del nodo
+                logger.warning(f"Nonce desactualizado, se reintenta el envío: {e}")
+                tx_params.resync()
+                continue
+            if not isinstance(e, Web3RPCError):
+                # Resultado desconocido: el nonce pudo haberse consumido
+                try:
+                    tx_params.resync()
+                except Exception as resync_error:
+                    logger.warning(f"No se pudo resincronizar el nonce: {resync_error}")
+            raise
+
+
+async def async_send_stamp_transaction(
+    w3, contract, tx_params, private_key, hash_value, signature=None
+):
+    """Como send_stamp_transaction, con AsyncWeb3 y AsyncTransactionParams."""
+    for attempt in range(NONCE_RETRIES + 1):
+        sending = False
+        try:
+            async with tx_params.reserve_nonce() as nonce:
+                signed_tx = build_and_sign_transaction(
+                    contract, tx_params, nonce, private_key, hash_value, signature
+                )
+                sending = True
+                return await w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        except Exception as e:
+            if not sending:
+                raise
+            if is_stale_nonce(e) and attempt < NONCE_RETRIES:
+                logger.warning(f"Nonce desactualizado, se reintenta el envío: {e}")
+                await tx_params.resync()
+                continue
+            if not isinstance(e, Web3RPCError):
+                try:
+                    await tx_params.resync()
+                except Exception as resync_error:
+                    logger.warning(f"No se pudo resincronizar el nonce: {resync_error}")
+            raise
+
+
+@lru_cache(maxsize=None)
+def read_contract_file(contract_path):
+    """Lee el JSON del contrato (ABI y direcciones por red) una sola vez por archivo"""
+    with open(contract_path) as f:
+        return json.load(f)
+
+
 def load_contract(w3, contract_path, network_id):
     """Carga el contrato desde un archivo JSON"""
-    with open(contract_path) as f:
-        config = json.load(f)
+    config = read_contract_file(contract_path)
     contract = w3.eth.contract(
         abi=config["abi"], address=config["networks"][network_id]["address"]
     )
@@ -127,6 +237,14 @@ def load_contract(w3, contract_path, network_id):
     return contract
 
 
+def stamp_from_contract(stamped_data):
+    """Convierte el resultado de stamped(hash) en (signer, blockNumber), o None si no está sellado."""
+    # observacion: aca es preferible comparar el bloque, mas eficiente
+    if stamped_data[0] != "0x0000000000000000000000000000000000000000":
+        return (stamped_data[0], stamped_data[1])
+    return None
+
+
 def is_valid_format_hash(string: str) -> bool:
     """Valida que el string sea un hash Ethereum con formato correcto."""
     is_valid = bool(re.match(HASH_PATTERN, string))
@@ -148,8 +266,10 @@ def is_valid_signature(hash_value: str, signature: str) -> bool:
             )
             return False
 
-        message = encode_defunct(hexstr=hash_value)
-        Account.recover_message(message, signature=signature)
+        # La recuperación queda en caché para cuando se necesite el firmante
+        if recover_signer(hash_value, signature) is None:
+            logger.error(f"Error al validar la firma: no se pudo recuperar el firmante de '{signature}'")
+            return False
         return True
     except Exception as e:
         logger.error(f"Error al validar la firma: {e}")
@@ -0,0 +1,53 @@
+from eth_utils import keccak
+
+# Árbol de Merkle de un lote de hashes, cuya raíz se sella en el contrato.
+#
+# - Hoja: keccak256(hash), para que un nodo interno no pueda presentarse como hoja.
+# - Nodo: keccak256(menor || mayor) de sus dos hijos, ordenados como bytes. Al
+#   ordenar los pares la prueba es sólo la lista de hermanos, sin indicar de qué
+#   lado está cada uno.
+# - Si un nivel tiene una cantidad impar de nodos, el último sube sin cambios.
+#
+# Verificación sin conexión: partir de keccak256(hash), combinar con cada hermano
+# de la prueba en orden y comparar con la raíz; luego consultar que la raíz esté
+# sellada (GET /stamped/<raíz>).
+
+
+def leaf_hash(hash_value: bytes) -> bytes:
+    return keccak(hash_value)
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return keccak(min(left, right) + max(left, right))
+
+
+def build_tree(hashes: list) -> tuple:
+    """
+    Construye el árbol de una lista de hashes (bytes) y devuelve
+    (raíz, pruebas), con la prueba de cada hash en el mismo orden.
+    """
+    if not hashes:
+        raise ValueError("No se puede construir un árbol de Merkle vacío")
+
+    level = [leaf_hash(h) for h in hashes]
+    positions = list(range(len(hashes)))  # Posición de cada hash en el nivel actual
+    proofs = [[] for _ in hashes]
+    while len(level) > 1:
+        for i, position in enumerate(positions):
+            sibling = position ^ 1
+            if sibling < len(level):
+                proofs[i].append(level[sibling])
+            positions[i] = position // 2
+        level = [
+            node_hash(level[j], level[j + 1]) if j + 1 < len(level) else level[j]
+            for j in range(0, len(level), 2)
+        ]
+    return level[0], proofs
+
+
+def verify_proof(hash_value: bytes, proof: list, root: bytes) -> bool:
+    """Verifica que hash_value pertenece al árbol de raíz root."""
+    node = leaf_hash(hash_value)
+    for sibling in proof:
+        node = node_hash(node, sibling)
+    return node == root
@@ -0,0 +1,201 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from web3 import Web3
+
+from ethereum_utils import send_stamp_transaction
+from merkle import build_tree
+
+# Sellado por lotes: en lugar de una transacción stamp(hash) por hash, los
+# hashes se acumulan durante una ventana de tiempo (max_wait) o hasta juntar
+# max_size, se arma un árbol de Merkle (merkle.py) y se sella sólo la raíz con
+# la función stamp del contrato.
+#
+# La prueba de inclusión de cada hash se guarda en SQLite junto con el estado
+# del lote (pending, mined o failed), la transacción y el bloque del sello, de
+# modo que sobrevive a un reinicio de la API. Los lotes que quedaron pending al
+# reiniciar se vuelven a sellar, salvo que la raíz ya figure en el contrato.
+#
+# Un único hilo cierra y sella los lotes, y espera la confirmación de cada uno
+# antes de cerrar el siguiente; mientras tanto los hashes nuevos se acumulan.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 256
+DEFAULT_MAX_WAIT = 10.0
+RECEIPT_TIMEOUT = 120
+
+
+class MerkleBatcher:
+    """Agrupa hashes en lotes y sella la raíz de Merkle de cada lote."""
+
+    def __init__(self, w3: Web3, contract, tx_params, private_key: str, tracker, db_path: str,
+                 max_size: int = DEFAULT_MAX_SIZE, max_wait: float = DEFAULT_MAX_WAIT):
+        self.w3 = w3
+        self.contract = contract
+        self.tx_params = tx_params
+        self.private_key = private_key
+        self.tracker = tracker
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.flush_lock = threading.Lock()
+        self.pending = {}  # hash en minúsculas -> hash, del lote abierto en orden de llegada
+        self.opened = None  # Momento en que llegó el primer hash del lote abierto
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS batches "
+            "(root TEXT PRIMARY KEY, size INTEGER, tx TEXT, block INTEGER, status TEXT)"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS proofs (hash TEXT PRIMARY KEY, root TEXT, proof TEXT)")
+        self.db.commit()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="merkle-batcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Detiene el hilo después de sellar el lote abierto."""
+        with self.lock:
+            self.stopped.set()
+            self.wakeup.notify()
+        if self.thread:
+            self.thread.join()
+
+    def add(self, hash_value: str) -> dict:
+        """Agrega un hash al lote abierto (si no está ya en un lote) y devuelve su estado."""
+        key = hash_value.lower()
+        with self.lock:
+            if key not in self.pending and self._batch_status(key) in (None, "failed"):
+                self.pending[key] = hash_value
+                if self.opened is None:
+                    self.opened = time.monotonic()
+                    self.wakeup.notify()  # Empieza a correr la ventana del lote
+                elif len(self.pending) >= self.max_size:
+                    self.wakeup.notify()
+        return self.proof(hash_value)
+
+    def proof(self, hash_value: str):
+        """
+        Devuelve el estado del hash en los lotes: queued si está en el lote
+        abierto, o la raíz, la prueba y el estado del sello de su lote. None si
+        el hash no se agregó.
+        """
+        key = hash_value.lower()
+        with self.lock:
+            if key in self.pending:
+                return {"hash": hash_value, "status": "queued"}
+            row = self.db.execute(
+                "SELECT p.root, p.proof, b.status, b.tx, b.block FROM proofs p "
+                "JOIN batches b ON p.root = b.root WHERE p.hash = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        root, proof, status, tx, block = row
+        return {
+            "hash": hash_value,
+            "root": root,
+            "proof": json.loads(proof),
+            "status": status,
+            "transaction": tx,
+            "blockNumber": block,
+        }
+
+    def flush(self):
+        """Cierra el lote abierto, sella su raíz y espera la confirmación. Devuelve la raíz o None."""
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending:
+                    return None
+                hashes = list(self.pending.values())
+                root, proofs = build_tree([Web3.to_bytes(hexstr=h) for h in hashes])
+                root = Web3.to_hex(root)
+                self.db.execute(
+                    "INSERT OR REPLACE INTO batches VALUES (?, ?, NULL, NULL, 'pending')",
+                    (root, len(hashes)),
+                )
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO proofs VALUES (?, ?, ?)",
+                    [
+                        (h.lower(), root, json.dumps([Web3.to_hex(node) for node in proof]))
+                        for h, proof in zip(hashes, proofs)
+                    ],
+                )
+                self.db.commit()
+                self.pending = {}
+                self.opened = None
+
+            logger.info(f"Sellando lote de {len(hashes)} hashes con raíz {root}")
+            self._anchor(root)
+            return root
+
+    def _batch_status(self, key: str):
+        row = self.db.execute(
+            "SELECT b.status FROM proofs p JOIN batches b ON p.root = b.root WHERE p.hash = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _update(self, root: str, **fields):
+        with self.lock:
+            for column, value in fields.items():
+                self.db.execute(f"UPDATE batches SET {column} = ? WHERE root = ?", (value, root))
+            self.db.commit()
+
+    def _anchor(self, root: str):
+        """Sella la raíz de un lote y registra la transacción y el resultado."""
+        try:
+            tx_hash = send_stamp_transaction(
+                self.w3, self.contract, self.tx_params, self.private_key, root
+            )
+            self._update(root, tx=Web3.to_hex(tx_hash))
+            receipt = self.tracker.wait(tx_hash, RECEIPT_TIMEOUT)
+            if receipt.status == 1:
+                self._update(root, status="mined", block=receipt.blockNumber)
+                return
+        except Exception as e:
+            logger.error(f"Error al sellar el lote {root}: {e}")
+
+        # La raíz pudo quedar sellada igual (p. ej. por un envío anterior al reinicio)
+        try:
+            block = self.contract.functions.stamped(root).call()[1]
+        except Exception:
+            block = 0
+        if block:
+            self._update(root, status="mined", block=block)
+        else:
+            self._update(root, status="failed")
+
+    def _resume(self):
+        """Vuelve a sellar los lotes que quedaron pendientes en una ejecución anterior."""
+        with self.lock:
+            roots = [row[0] for row in self.db.execute("SELECT root FROM batches WHERE status = 'pending'")]
+        for root in roots:
+            block = self.contract.functions.stamped(root).call()[1]
+            if block:
+                self._update(root, status="mined", block=block)
+            else:
+                self._anchor(root)
+
+    def _due(self) -> bool:
+        return bool(self.pending) and (
+            len(self.pending) >= self.max_size or time.monotonic() >= self.opened + self.max_wait
+        )
+
+    def _run(self):
+        try:
+            self._resume()
+        except Exception as e:
+            logger.error(f"Error al retomar los lotes pendientes: {e}")
+        while not self.stopped.is_set():
+            with self.lock:
+                while not self._due() and not self.stopped.is_set():
+                    timeout = None if self.opened is None else self.opened + self.max_wait - time.monotonic()
+                    self.wakeup.wait(timeout)
+            self.flush()
@@ -0,0 +1,269 @@
+import bisect
+import threading
+import time
+
+from web3.middleware import Web3Middleware
+
+# Métricas de la API en el formato de texto de Prometheus (GET /metrics).
+#
+# - Latencia de los requerimientos, por ruta (la regla de Flask/Quart, no la
+#   URL, para no crear una serie por hash), método y código de respuesta.
+# - Llamadas JSON-RPC al nodo, por método: cantidad, errores y latencia. Las
+#   cuenta RPCMetricsMiddleware, que se agrega a todas las conexiones. Un batch
+#   de JSON-RPC es un solo viaje al nodo: se mide como method="batch" y cada
+#   llamada que incluye se cuenta en rpc_requests_total con su método.
+# - Latencia de la recuperación del firmante de una firma (sólo fallos de caché).
+#
+# Registrar una observación es tomar un lock, buscar el bucket con bisect y
+# sumar; el texto se arma recién cuando Prometheus consulta /metrics. Los
+# valores que ya llevan otros componentes (cachés, transacciones en curso) se
+# leen en ese momento y no se duplican acá.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Límites de los buckets en segundos: de 1 ms (caché, índice local) a 2 minutos
+# (POST /stamp esperando que la transacción se mine)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador por combinación de etiquetas."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.lock = threading.Lock()
+        self.values = {}  # etiquetas -> valor
+
+    def inc(self, *labels, amount: float = 1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        with self.lock:
+            values = sorted(self.values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Histograma acumulativo por combinación de etiquetas, como lo espera Prometheus."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.series = {}  # etiquetas -> [cuentas por bucket (+Inf al final), suma]
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> list:
+        with self.lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self.series.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+def render_gauge(name: str, help_text: str, samples: list, label_names: tuple = ()) -> list:
+    """Líneas de un gauge leído al momento: samples es una lista de (etiquetas, valor)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(label_names, labels)} {_number(value)}")
+    return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "stamp_api_request_duration_seconds",
+    "Latencia de los requerimientos HTTP.",
+    ("route", "method", "status"),
+)
+RPC_REQUESTS = Counter(
+    "stamp_api_rpc_requests_total",
+    "Llamadas JSON-RPC al nodo (incluidas las de un batch).",
+    ("method",),
+)
+RPC_ERRORS = Counter(
+    "stamp_api_rpc_errors_total",
+    "Llamadas JSON-RPC al nodo que fallaron o respondieron con error.",
+    ("method",),
+)
+RPC_LATENCY = Histogram(
+    "stamp_api_rpc_duration_seconds",
+    "Latencia de cada viaje JSON-RPC al nodo (un batch cuenta como uno).",
+    ("method",),
+)
+SIGNATURE_RECOVERY = Histogram(
+    "stamp_api_signature_recovery_seconds",
+    "Latencia de la recuperación del firmante de una firma (fallos de caché).",
+)
+
+
+def observe_request(route: str, method: str, status: int, started: float):
+    """Registra un requerimiento HTTP que empezó en started (time.perf_counter())."""
+    REQUEST_LATENCY.observe(time.perf_counter() - started, route, method, str(status))
+
+
+def _observe_rpc(method: str, response, started: float):
+    RPC_LATENCY.observe(time.perf_counter() - started, method)
+    if isinstance(response, dict) and response.get("error") is not None:
+        RPC_ERRORS.inc(method)
+
+
+def _observe_batch(requests_info, response, started: float):
+    RPC_LATENCY.observe(time.perf_counter() - started, "batch")
+    responses = response if isinstance(response, list) else [response] * len(requests_info)
+    for (method, _), item in zip(requests_info, responses):
+        if isinstance(item, dict) and item.get("error") is not None:
+            RPC_ERRORS.inc(method)
+
+
+class RPCMetricsMiddleware(Web3Middleware):
+    """Cuenta y mide las llamadas JSON-RPC por método (Web3 y AsyncWeb3)."""
+
+    def wrap_make_request(self, make_request):
+        def middleware(method, params):
+            RPC_REQUESTS.inc(method)
+            started = time.perf_counter()
+            try:
+                response = make_request(method, params)
+            except Exception:
+                RPC_ERRORS.inc(method)
+                RPC_LATENCY.observe(time.perf_counter() - started, method)
+                raise
+            _observe_rpc(method, response, started)
+            return response
+
+        return middleware
+
+    def wrap_make_batch_request(self, make_batch_request):
+        def middleware(requests_info):
+            for method, _ in requests_info:
+                RPC_REQUESTS.inc(method)
+            started = time.perf_counter()
+            try:
+                response = make_batch_request(requests_info)
+            except Exception:
+                for method, _ in requests_info:
+                    RPC_ERRORS.inc(method)
+                RPC_LATENCY.observe(time.perf_counter() - started, "batch")
+                raise
+            _observe_batch(requests_info, response, started)
+            return response
+
+        return middleware
+
+    async def async_wrap_make_request(self, make_request):
+        async def middleware(method, params):
+            RPC_REQUESTS.inc(method)
+            started = time.perf_counter()
+            try:
+                response = await make_request(method, params)
+            except Exception:
+                RPC_ERRORS.inc(method)
+                RPC_LATENCY.observe(time.perf_counter() - started, method)
+                raise
+            _observe_rpc(method, response, started)
+            return response
+
+        return middleware
+
+    async def async_wrap_make_batch_request(self, make_batch_request):
+        async def middleware(requests_info):
+            for method, _ in requests_info:
+                RPC_REQUESTS.inc(method)
+            started = time.perf_counter()
+            try:
+                response = await make_batch_request(requests_info)
+            except Exception:
+                for method, _ in requests_info:
+                    RPC_ERRORS.inc(method)
+                RPC_LATENCY.observe(time.perf_counter() - started, "batch")
+                raise
+            _observe_batch(requests_info, response, started)
+            return response
+
+        return middleware
+
+
+def _cache_samples(name: str, stats: dict, results: tuple) -> tuple:
+    hits = [((name, result), stats[key]) for result, key in results]
+    total = sum(value for _, value in hits)
+    found = sum(value for (_, result), value in hits if result != "miss")
+    return hits, ((name,), found / total if total else 0.0)
+
+
+def render(stamp_cache_stats: dict, signature_cache_stats: dict, in_flight: int) -> str:
+    """
+    Texto de /metrics: los histogramas y contadores de este módulo, más los
+    contadores de las cachés y la cantidad de transacciones enviadas que
+    todavía no se minaron.
+    """
+    stamp_hits, stamp_ratio = _cache_samples(
+        "stamps", stamp_cache_stats, (("hit", "hits"), ("negative_hit", "negative_hits"), ("miss", "misses"))
+    )
+    signature_hits, signature_ratio = _cache_samples(
+        "signatures", signature_cache_stats, (("hit", "hits"), ("miss", "misses"))
+    )
+
+    lines = []
+    for metric in (REQUEST_LATENCY, RPC_REQUESTS, RPC_ERRORS, RPC_LATENCY, SIGNATURE_RECOVERY):
+        lines += metric.render()
+    lines.append("# HELP stamp_api_cache_lookups_total Consultas a las cachés por resultado.")
+    lines.append("# TYPE stamp_api_cache_lookups_total counter")
+    for labels, value in stamp_hits + signature_hits:
+        lines.append(f"stamp_api_cache_lookups_total{_labels(('cache', 'result'), labels)} {value}")
+    lines += render_gauge(
+        "stamp_api_cache_hit_ratio",
+        "Proporción de consultas a las cachés resueltas sin ir al índice, al nodo o a secp256k1.",
+        [stamp_ratio, signature_ratio],
+        ("cache",),
+    )
+    lines += render_gauge(
+        "stamp_api_cache_entries",
+        "Entradas en las cachés.",
+        [(("stamps",), stamp_cache_stats["entries"]), (("signatures",), signature_cache_stats["entries"])],
+        ("cache",),
+    )
+    lines += render_gauge(
+        "stamp_api_transactions_in_flight",
+        "Transacciones enviadas por la API que todavía no se minaron.",
+        [((), in_flight)],
+    )
+    return "\n".join(lines) + "\n"
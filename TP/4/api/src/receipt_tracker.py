@@ -0,0 +1,240 @@
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import logging
+import threading
+
+from web3 import Web3
+
+# Seguimiento compartido de los recibos de las transacciones enviadas por la API.
+#
+# En lugar de que cada requerimiento consulte el recibo de su transacción por
+# separado (wait_for_transaction_receipt), un único hilo recorre cada bloque
+# nuevo una sola vez y resuelve las transacciones pendientes que aparecen en su
+# lista de transacciones. El costo en llamadas RPC es proporcional a la cantidad
+# de bloques, más un eth_getTransactionReceipt por cada transacción encontrada.
+#
+# Los hashes de los últimos RECENT_BLOCKS bloques se recuerdan, de modo que una
+# transacción minada antes de llamar a track igualmente se resuelve.
+# Si falla la consulta del recibo de una transacción ya minada, se reintenta en
+# la próxima vuelta en lugar de informar el sello como fallido.
+#
+# AsyncReceiptTracker hace lo mismo con una tarea de asyncio, para la API ASGI.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 1.0
+RECENT_BLOCKS = 256
+
+
+def normalize_hash(tx_hash) -> str:
+    """Representa un hash (bytes o str) como texto hexadecimal en minúsculas con 0x."""
+    if isinstance(tx_hash, str):
+        return Web3.to_hex(hexstr=tx_hash).lower()
+    return Web3.to_hex(tx_hash).lower()
+
+
+class ReceiptTracker:
+    """Resuelve las transacciones pendientes recorriendo cada bloque nuevo una sola vez."""
+
+    def __init__(self, w3: Web3, poll_interval: float = DEFAULT_POLL_INTERVAL, from_block: int = None):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.next_block = w3.eth.block_number if from_block is None else from_block
+        self.lock = threading.Lock()
+        self.pending = {}  # hash -> Future
+        self.recent = {}  # hash -> bloque, de los últimos RECENT_BLOCKS bloques
+        self.recent_blocks = collections.deque()  # (bloque, hashes) en orden
+        self.mined = {}  # hash -> Future, minadas cuyo recibo no se pudo obtener (se reintenta)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="receipt-tracker", daemon=True)
+        self.thread.start()
+
+    def track(self, tx_hash) -> concurrent.futures.Future:
+        """Devuelve el future que se resuelve con el recibo de tx_hash."""
+        tx_hash = normalize_hash(tx_hash)
+        with self.lock:
+            future = self.pending.get(tx_hash) or self.mined.get(tx_hash)
+            if future is not None:
+                return future
+            future = concurrent.futures.Future()
+            if tx_hash not in self.recent:
+                self.pending[tx_hash] = future
+                return future
+        # Ya minada en un bloque recorrido
+        self._resolve(tx_hash, future)
+        return future
+
+    def wait(self, tx_hash, timeout: float = None):
+        """Espera el recibo de tx_hash; lanza TimeoutError si no llega a tiempo."""
+        future = self.track(tx_hash)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"La transacción {normalize_hash(tx_hash)} no se confirmó en {timeout}s")
+
+    def in_flight(self) -> int:
+        """Cantidad de transacciones que se esperan y todavía no se minaron."""
+        with self.lock:
+            waiting = list(self.pending.values()) + list(self.mined.values())
+        return sum(1 for future in waiting if not future.cancelled())
+
+    def stop(self):
+        """Detiene el hilo; los futures pendientes quedan sin resolver."""
+        self.stopped.set()
+        self.thread.join()
+
+    def _resolve(self, tx_hash: str, future: concurrent.futures.Future):
+        """
+        Resuelve el future de una transacción ya minada con su recibo. Si la
+        consulta falla (timeout, nodo reiniciándose) la transacción no se da
+        por fallida: queda en self.mined y se reintenta en la próxima vuelta.
+        """
+        if future.cancelled():
+            return
+        try:
+            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+        except Exception as e:
+            logger.warning(f"Error al obtener el recibo de {tx_hash} (se reintenta): {e}")
+            with self.lock:
+                self.mined[tx_hash] = future
+            return
+        if future.set_running_or_notify_cancel():
+            future.set_result(receipt)
+
+    def _retry_receipts(self):
+        with self.lock:
+            mined, self.mined = self.mined, {}
+        for tx_hash, future in mined.items():
+            self._resolve(tx_hash, future)
+
+    def _scan(self, block_number: int):
+        block = self.w3.eth.get_block(block_number)
+        hashes = [normalize_hash(tx_hash) for tx_hash in block["transactions"]]
+
+        found = []
+        with self.lock:
+            for tx_hash in hashes:
+                self.recent[tx_hash] = block_number
+                future = self.pending.pop(tx_hash, None)
+                if future is not None:
+                    found.append((tx_hash, future))
+            self.recent_blocks.append((block_number, hashes))
+            while len(self.recent_blocks) > RECENT_BLOCKS:
+                _, old = self.recent_blocks.popleft()
+                for tx_hash in old:
+                    self.recent.pop(tx_hash, None)
+            # Descartar las transacciones cuyo future se canceló
+            for tx_hash in [h for h, f in self.pending.items() if f.cancelled()]:
+                del self.pending[tx_hash]
+
+        for tx_hash, future in found:
+            self._resolve(tx_hash, future)
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                self._retry_receipts()
+                head = self.w3.eth.block_number
+                while self.next_block <= head and not self.stopped.is_set():
+                    self._scan(self.next_block)
+                    self.next_block += 1
+            except Exception as e:
+                logger.warning(f"Error al recorrer bloques (se reintenta): {e}")
+            self.stopped.wait(self.poll_interval)
+
+
+class AsyncReceiptTracker:
+    """Versión asyncio de ReceiptTracker, para la API ASGI (AsyncWeb3)."""
+
+    def __init__(self, w3, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.next_block = None
+        self.pending = {}  # hash -> asyncio.Future
+        self.recent = {}  # hash -> bloque, de los últimos RECENT_BLOCKS bloques
+        self.recent_blocks = collections.deque()  # (bloque, hashes) en orden
+        self.mined = {}  # hash -> asyncio.Future, minadas cuyo recibo no se pudo obtener (se reintenta)
+        self.task = None
+
+    async def start(self, from_block: int = None):
+        self.next_block = await self.w3.eth.block_number if from_block is None else from_block
+        self.task = asyncio.create_task(self._run())
+
+    def in_flight(self) -> int:
+        """Cantidad de transacciones que se esperan y todavía no se minaron."""
+        return len(self.pending) + len(self.mined)
+
+    async def stop(self):
+        """Detiene la tarea; los futures pendientes quedan sin resolver."""
+        self.task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self.task
+
+    async def wait(self, tx_hash, timeout: float = None):
+        """Espera el recibo de tx_hash; lanza TimeoutError si no llega a tiempo."""
+        tx_hash = normalize_hash(tx_hash)
+        future = self.pending.get(tx_hash) or self.mined.get(tx_hash)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            if tx_hash in self.recent:
+                # Ya minada en un bloque recorrido
+                await self._resolve(tx_hash, future)
+            else:
+                self.pending[tx_hash] = future
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            for waiting in (self.pending, self.mined):
+                if waiting.get(tx_hash) is future:
+                    del waiting[tx_hash]
+            raise TimeoutError(f"La transacción {tx_hash} no se confirmó en {timeout}s")
+
+    async def _scan(self, block_number: int):
+        block = await self.w3.eth.get_block(block_number)
+        hashes = [normalize_hash(tx_hash) for tx_hash in block["transactions"]]
+
+        found = []
+        for tx_hash in hashes:
+            self.recent[tx_hash] = block_number
+            future = self.pending.pop(tx_hash, None)
+            if future is not None:
+                found.append((tx_hash, future))
+        self.recent_blocks.append((block_number, hashes))
+        while len(self.recent_blocks) > RECENT_BLOCKS:
+            _, old = self.recent_blocks.popleft()
+            for tx_hash in old:
+                self.recent.pop(tx_hash, None)
+
+        for tx_hash, future in found:
+            await self._resolve(tx_hash, future)
+
+    async def _resolve(self, tx_hash: str, future: asyncio.Future):
+        """Como ReceiptTracker._resolve: si la consulta del recibo falla, se reintenta."""
+        try:
+            receipt = await self.w3.eth.get_transaction_receipt(tx_hash)
+        except Exception as e:
+            logger.warning(f"Error al obtener el recibo de {tx_hash} (se reintenta): {e}")
+            self.mined[tx_hash] = future
+            return
+        if not future.done():
+            future.set_result(receipt)
+
+    async def _retry_receipts(self):
+        mined, self.mined = self.mined, {}
+        for tx_hash, future in mined.items():
+            await self._resolve(tx_hash, future)
+
+    async def _run(self):
+        while True:
+            try:
+                await self._retry_receipts()
+                head = await self.w3.eth.block_number
+                while self.next_block <= head:
+                    await self._scan(self.next_block)
+                    self.next_block += 1
+            except Exception as e:
+                logger.warning(f"Error al recorrer bloques (se reintenta): {e}")
+            await asyncio.sleep(self.poll_interval)
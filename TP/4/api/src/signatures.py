@@ -0,0 +1,80 @@
+import time
+from functools import lru_cache
+
+from eth_keys import keys
+from eth_utils import keccak, to_checksum_address
+
+from metrics import SIGNATURE_RECOVERY
+
+try:
+    import coincurve
+except ImportError:
+    coincurve = None
+
+# Recuperación del firmante de un hash firmado con eth_sign (el mismo cálculo
+# que hace stampSigned en el contrato), con el backend de secp256k1 más rápido
+# disponible: coincurve (libsecp256k1) si está instalado y, si no, eth_keys.
+#
+# El resultado de cada (hash, firma) se guarda en una caché LRU acotada, de modo
+# que validar la firma en POST /stamp, registrar el sello en el índice y volver
+# a ver la transacción al indexar hacen una sola recuperación.
+
+SIGNER_CACHE_SIZE = 100_000
+MESSAGE_PREFIX = b"\x19Ethereum Signed Message:\n32"
+
+BACKEND = "coincurve" if coincurve is not None else "eth_keys"
+
+
+def _recover_coincurve(message_hash: bytes, signature: bytes) -> str:
+    public_key = coincurve.PublicKey.from_signature_and_message(signature, message_hash, hasher=None)
+    return to_checksum_address(keccak(public_key.format(compressed=False)[1:])[-20:])
+
+
+def _recover_eth_keys(message_hash: bytes, signature: bytes) -> str:
+    return keys.Signature(signature).recover_public_key_from_msg_hash(message_hash).to_checksum_address()
+
+
+_recover = _recover_coincurve if coincurve is not None else _recover_eth_keys
+
+
+@lru_cache(maxsize=SIGNER_CACHE_SIZE)
+def _recover_signer(hash_value: str, signature: str):
+    try:
+        hash_bytes = bytes.fromhex(hash_value[2:])
+        signature_bytes = bytes.fromhex(signature[2:])
+    except ValueError:
+        return None
+    if len(hash_bytes) != 32 or len(signature_bytes) != 65:
+        return None
+
+    # v como lo acepta ecrecover (27/28), o ya normalizado (0/1)
+    v = signature_bytes[64]
+    if v >= 27:
+        v -= 27
+    if v not in (0, 1):
+        return None
+
+    started = time.perf_counter()
+    try:
+        return _recover(keccak(MESSAGE_PREFIX + hash_bytes), signature_bytes[:64] + bytes([v]))
+    except Exception:
+        return None
+    finally:
+        SIGNATURE_RECOVERY.observe(time.perf_counter() - started)
+
+
+def recover_signer(hash_value: str, signature: str):
+    """Devuelve la dirección que firmó el hash, o None si la firma no es válida."""
+    return _recover_signer(hash_value.lower(), signature.lower())
+
+
+def matches_signer(hash_value: str, signature: str, signer: str) -> bool:
+    """Indica si la firma del hash corresponde a la dirección signer."""
+    recovered = recover_signer(hash_value, signature)
+    return recovered is not None and isinstance(signer, str) and recovered.lower() == signer.lower()
+
+
+def cache_stats() -> dict:
+    """Contadores de la caché de firmantes."""
+    info = _recover_signer.cache_info()
+    return {"entries": info.currsize, "hits": info.hits, "misses": info.misses, "backend": BACKEND}
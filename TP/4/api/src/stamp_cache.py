@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Caché LRU de las consultas stamped(hash) al contrato.
+#
+# Un sello nunca cambia una vez registrado, así que los hashes encontrados se
+# guardan sin vencimiento (sólo se descartan por LRU al llenarse la caché). Los
+# hashes no encontrados se guardan por NEGATIVE_TTL segundos, porque pueden
+# sellarse en cualquier momento (desde esta API u otra cuenta).
+
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_NEGATIVE_TTL = 5.0
+
+NOT_FOUND = object()  # Resultado cacheado de un hash no sellado
+
+
+class StampCache:
+    """Caché LRU de sellos: (signer, blockNumber) o NOT_FOUND por hash."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, negative_ttl: float = DEFAULT_NEGATIVE_TTL):
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # hash -> (valor, vencimiento o None)
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def get(self, hash_value: str):
+        """Devuelve el valor cacheado, NOT_FOUND, o None si no está en la caché."""
+        key = hash_value.lower()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self.entries.move_to_end(key)
+                    if value is NOT_FOUND:
+                        self.negative_hits += 1
+                    else:
+                        self.hits += 1
+                    return value
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, hash_value: str, value):
+        """Guarda un sello (signer, blockNumber) o NOT_FOUND."""
+        expires = time.monotonic() + self.negative_ttl if value is NOT_FOUND else None
+        with self.lock:
+            self.entries[hash_value.lower()] = (value, expires)
+            self.entries.move_to_end(hash_value.lower())
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, hash_value: str):
+        """Descarta la entrada de un hash (p. ej. después de sellarlo)."""
+        with self.lock:
+            self.entries.pop(hash_value.lower(), None)
+
+    def stats(self) -> dict:
+        """Contadores de aciertos y fallos de la caché."""
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,152 @@
+import logging
+import sqlite3
+import threading
+
+from web3 import Web3
+
+from ethereum_utils import read_contract_file
+from signatures import recover_signer
+
+# Índice local (SQLite) de los sellos del contrato: hash -> (signer, blockNumber).
+#
+# El contrato Stamper no emite eventos, por lo que el índice se construye
+# recorriendo los bloques desde el despliegue del contrato y decodificando las
+# transacciones dirigidas a él (stamp y stampSigned) que terminaron con éxito.
+# El firmante es el remitente de la transacción en stamp y la cuenta que firmó
+# el hash en stampSigned, igual que en el contrato. Los sellos hechos desde otro
+# contrato (llamadas internas) no se ven en las transacciones y no se indexan.
+#
+# El último bloque procesado se guarda junto con los sellos, por lo que al
+# reiniciar el indexador continúa desde ahí.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 2.0
+BLOCKS_PER_BATCH = 100
+SYNC_LAG = 2  # Bloques de atraso con los que el índice se considera al día
+
+
+def get_deployment_block(w3: Web3, contract_path: str, network_id: str) -> int:
+    """Devuelve el bloque de despliegue del contrato (0 si no se conoce)."""
+    network = read_contract_file(contract_path)["networks"][network_id]
+    tx_hash = network.get("transactionHash")
+    if not tx_hash:
+        return 0
+    return w3.eth.get_transaction_receipt(tx_hash).blockNumber
+
+
+def stamp_signer(function_name: str, params: dict, sender: str) -> str:
+    """Devuelve el firmante que el contrato registra para una llamada a stamp/stampSigned."""
+    if function_name == "stampSigned":
+        signature = params["signature"]
+        if not isinstance(signature, str):
+            signature = Web3.to_hex(signature)
+        signer = recover_signer(Web3.to_hex(params["hash"]), signature)
+        if signer is None:
+            raise ValueError(f"Firma inválida: {signature}")
+        return signer
+    return sender
+
+
+class StampIndexer:
+    """Sigue las transacciones del contrato y mantiene el índice de sellos."""
+
+    def __init__(self, w3: Web3, contract, db_path: str, start_block: int = 0,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.w3 = w3
+        self.contract = contract
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS stamps (hash TEXT PRIMARY KEY, signer TEXT, block INTEGER)"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self.db.commit()
+
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'last_block'").fetchone()
+        self.last_block = row[0] if row else start_block - 1
+        self.head = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    @property
+    def synced(self) -> bool:
+        """Indica si el índice está al día con el nodo."""
+        return self.head is not None and self.last_block >= self.head - SYNC_LAG
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="stamp-indexer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+
+    def lookup(self, hash_value: str):
+        """Devuelve (signer, blockNumber) del hash, o None si no está indexado."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT signer, block FROM stamps WHERE hash = ?", (hash_value.lower(),)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def record(self, hash_value: str, signer: str, block_number: int):
+        """Agrega un sello al índice (p. ej. uno recién hecho por esta API)."""
+        with self.lock:
+            self.db.execute(
+                "INSERT OR IGNORE INTO stamps VALUES (?, ?, ?)",
+                (hash_value.lower(), signer, block_number),
+            )
+            self.db.commit()
+
+    def _stamps_in(self, block) -> list:
+        """Sellos exitosos de un bloque: [(hash, signer, blockNumber)]."""
+        stamps = []
+        for tx in block.transactions:
+            if tx["to"] != self.contract.address:
+                continue
+            try:
+                function, params = self.contract.decode_function_input(tx["input"])
+            except ValueError:
+                continue
+            if function.fn_name not in ("stamp", "stampSigned"):
+                continue
+            if self.w3.eth.get_transaction_receipt(tx["hash"]).status != 1:
+                continue  # Revertida (p. ej. hash ya sellado)
+            try:
+                signer = stamp_signer(function.fn_name, params, tx["from"])
+            except Exception:
+                continue
+            stamps.append((Web3.to_hex(params["hash"]), signer, block.number))
+        return stamps
+
+    def _index(self, first: int, last: int):
+        with self.w3.batch_requests() as batch:
+            for number in range(first, last + 1):
+                batch.add(self.w3.eth.get_block(number, True))
+            blocks = batch.execute()
+
+        stamps = [stamp for block in blocks for stamp in self._stamps_in(block)]
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO stamps VALUES (?, ?, ?)",
+                [(hash_value.lower(), signer, number) for hash_value, signer, number in stamps],
+            )
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('last_block', ?)", (last,))
+            self.db.commit()
+            self.last_block = last
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                self.head = self.w3.eth.block_number
+                while self.last_block < self.head and not self.stopped.is_set():
+                    last = min(self.last_block + BLOCKS_PER_BATCH, self.head)
+                    self._index(self.last_block + 1, last)
+                    if not self.synced:
+                        logger.info(f"Indexando sellos: bloque {self.last_block} de {self.head}")
+            except Exception as e:
+                logger.warning(f"Error al indexar sellos (se reintenta): {e}")
+            self.stopped.wait(self.poll_interval)
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
+from web3 import Web3
+
+# Parámetros de las transacciones de la cuenta de la API, mantenidos localmente
+# para no consultarlos al nodo en cada sellado.
+#
+# - chainId: se consulta una sola vez (no cambia mientras el nodo esté en la misma red).
+# - gasPrice: se refresca en segundo plano cada GAS_PRICE_INTERVAL segundos.
+# - nonce: se consulta al nodo al iniciar y después se lleva localmente. Cada
+#   transacción lo reserva con un lock mientras se firma y se envía, y sólo se
+#   consume si el envío tuvo éxito: dos sellados simultáneos nunca reciben el
+#   mismo nonce, llegan al nodo en orden y un envío rechazado no deja huecos.
+#   Si el envío falla sin respuesta del nodo (la transacción pudo haber entrado
+#   al pool), send_stamp_transaction lo recupera con resync.
+#
+# Asume que la API es la única que envía transacciones con la cuenta; si no, el
+# primer envío con un nonce viejo falla ("nonce too low", "already known",
+# "replacement transaction underpriced") y se recupera con resync.
+#
+# AsyncTransactionParams hace lo mismo con asyncio, para la API ASGI.
+
+logger = logging.getLogger(__name__)
+
+GAS_PRICE_INTERVAL = 30  # Segundos entre consultas del gasPrice
+
+
+class TransactionParams:
+    """chainId, gasPrice y nonce de la cuenta, sin consultar al nodo por transacción."""
+
+    def __init__(self, w3: Web3, account_address: str, gas_price_interval: float = GAS_PRICE_INTERVAL):
+        self.w3 = w3
+        self.account_address = account_address
+        self.gas_price_interval = gas_price_interval
+        self.chain_id = w3.eth.chain_id
+        self.gas_price = w3.eth.gas_price
+        # Reentrante: quien envía varias transacciones puede tomarlo para que sus
+        # nonces sean consecutivos, y cada envío lo vuelve a tomar en reserve_nonce
+        self.lock = threading.RLock()
+        self.nonce = w3.eth.get_transaction_count(account_address, "pending")
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="gas-price", daemon=True)
+        self.thread.start()
+
+    @contextmanager
+    def reserve_nonce(self):
+        """
+        Reserva el próximo nonce mientras dura el bloque with; se consume sólo
+        si el bloque termina sin errores.
+        """
+        with self.lock:
+            yield self.nonce
+            self.nonce += 1
+
+    def resync(self):
+        """Vuelve a tomar el nonce del nodo (transacciones pendientes incluidas)."""
+        with self.lock:
+            self.nonce = self.w3.eth.get_transaction_count(self.account_address, "pending")
+            logger.info(f"Nonce resincronizado con el nodo: {self.nonce}")
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stopped.wait(self.gas_price_interval):
+            try:
+                self.gas_price = self.w3.eth.gas_price
+            except Exception as e:
+                logger.warning(f"Error al actualizar el gasPrice (se mantiene {self.gas_price}): {e}")
+
+
+class AsyncTransactionParams:
+    """Versión asyncio de TransactionParams, para la API ASGI (AsyncWeb3)."""
+
+    def __init__(self, w3, account_address: str, gas_price_interval: float = GAS_PRICE_INTERVAL):
+        self.w3 = w3
+        self.account_address = account_address
+        self.gas_price_interval = gas_price_interval
+        self.chain_id = None
+        self.gas_price = None
+        self.nonce = None
+        self.lock = asyncio.Lock()
+        self.task = None
+
+    async def start(self):
+        self.chain_id = await self.w3.eth.chain_id
+        self.gas_price = await self.w3.eth.gas_price
+        self.nonce = await self.w3.eth.get_transaction_count(self.account_address, "pending")
+        self.task = asyncio.create_task(self._run())
+
+    @asynccontextmanager
+    async def reserve_nonce(self):
+        """
+        Reserva el próximo nonce mientras dura el bloque async with; se consume
+        sólo si el bloque termina sin errores.
+        """
+        async with self.lock:
+            yield self.nonce
+            self.nonce += 1
+
+    async def resync(self):
+        """Vuelve a tomar el nonce del nodo (transacciones pendientes incluidas)."""
+        async with self.lock:
+            self.nonce = await self.w3.eth.get_transaction_count(self.account_address, "pending")
+            logger.info(f"Nonce resincronizado con el nodo: {self.nonce}")
+
+    async def stop(self):
+        self.task.cancel()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.gas_price_interval)
+            try:
+                self.gas_price = await self.w3.eth.gas_price
+            except Exception as e:
+                logger.warning(f"Error al actualizar el gasPrice (se mantiene {self.gas_price}): {e}")
@@ -0,0 +1,275 @@
+"""
+Generador de carga de la API de sellado, con los mismos requerimientos que
+test_apiserver.py (hashes aleatorios y sellos firmados con encode_defunct).
+
+Ejecuta una mezcla configurable de operaciones:
+- stamped: GET /stamped/<hash>, con un hash ya sellado en la corrida (--known) o uno aleatorio.
+- stamp: POST /stamp sin firma.
+- stamp_signed: POST /stamp con la firma de una cuenta aleatoria.
+
+Con --concurrency, N hilos envían requerimientos uno tras otro (carga cerrada).
+Con --rate, se inicia un requerimiento cada 1/rate segundos, sin esperar a que
+terminen los anteriores (carga abierta); la latencia se mide desde el momento
+en que debía salir el requerimiento, para que una API lenta no se esconda
+enviando menos.
+
+Informa en JSON el throughput, la latencia (p50/p90/p99/máx) y la tasa de
+error de cada operación y del total. Son errores los códigos distintos de los
+esperados (stamped: 200 y 404; stamp: 201 y 202) y los requerimientos que no
+obtienen respuesta. Con --max-error-rate o --max-p99-ms termina con código 1
+si se superan, para usarlo antes de desplegar.
+
+POST /stamp envía transacciones: correrlo contra la API conectada a una cadena
+local de desarrollo (p. ej. geth --dev), no contra la red compartida.
+
+Parámetros:
+- --server: URL de la API (por defecto http://127.0.0.1:5000).
+- --mix: Proporción de cada operación (por defecto stamped=80,stamp=15,stamp_signed=5).
+- --concurrency, -c: Hilos de carga cerrada (por defecto 8).
+- --rate, -r: Requerimientos por segundo de carga abierta (reemplaza a --concurrency).
+- --duration, -d: Segundos de carga (por defecto 30).
+- --requests, -n: Cantidad de requerimientos (reemplaza a --duration).
+- --known: Proporción de GET /stamped de hashes sellados en la corrida (por defecto 0.5).
+- --timeout: Segundos de espera de cada requerimiento (por defecto 30).
+- --max-error-rate, --max-p99-ms: Umbrales que hacen fallar la corrida.
+- --output, -o: Archivo donde guardar el JSON (además de imprimirlo).
+
+Ejemplo de uso:
+    python load_apiserver.py --mix stamped=90,stamp=10 -c 32 -d 60 --max-error-rate 0.01
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os import urandom
+
+import requests
+from eth_account import Account
+
+from test_apiserver import random_hash, sign_hash
+
+DEFAULT_SERVER = "http://127.0.0.1:5000"
+DEFAULT_MIX = "stamped=80,stamp=15,stamp_signed=5"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DURATION = 30
+DEFAULT_KNOWN = 0.5
+DEFAULT_TIMEOUT = 30
+
+OPERATIONS = ("stamped", "stamp", "stamp_signed")
+EXPECTED_STATUS = {"stamped": (200, 404), "stamp": (201, 202), "stamp_signed": (201, 202)}
+
+
+def parse_mix(mix: str) -> dict:
+    """Convierte "stamped=80,stamp=20" en {"stamped": 80.0, "stamp": 20.0}."""
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Operación desconocida '{name}' (válidas: {', '.join(OPERATIONS)})")
+        weights[name] = float(weight)
+    if sum(weights.values()) <= 0:
+        raise ValueError("La mezcla debe tener al menos una operación con peso positivo")
+    return weights
+
+
+def percentile(values: list, p: float) -> float:
+    """Percentil p (0-100) por rango más cercano de una lista ordenada."""
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1, round(p / 100 * len(values)) - 1))]
+
+
+class LoadTest:
+    """Ejecuta los requerimientos y acumula sus resultados por operación."""
+
+    def __init__(self, server: str, weights: dict, known: float, timeout: float):
+        self.server = server.rstrip("/")
+        self.operations = list(weights)
+        self.weights = list(weights.values())
+        self.known = known
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.stamped_hashes = []  # Hashes sellados durante la corrida
+        self.results = {name: [] for name in weights}  # operación -> [(latencia, código o None)]
+        self.local = threading.local()
+
+    def session(self) -> requests.Session:
+        # Una sesión por hilo, para reutilizar las conexiones HTTP
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def request(self, operation: str):
+        if operation == "stamped":
+            with self.lock:
+                known = self.stamped_hashes and random.random() < self.known
+                hash_value = random.choice(self.stamped_hashes) if known else random_hash()
+            return self.session().get(f"{self.server}/stamped/{hash_value}", timeout=self.timeout), None
+
+        hash_value = random_hash()
+        body = {"hash": hash_value}
+        if operation == "stamp_signed":
+            body["signature"] = sign_hash(Account.create(urandom(16)), hash_value)
+        return self.session().post(f"{self.server}/stamp", json=body, timeout=self.timeout), hash_value
+
+    def run_one(self, scheduled: float = None):
+        """Ejecuta una operación al azar según la mezcla; la latencia se cuenta desde scheduled."""
+        operation = random.choices(self.operations, self.weights)[0]
+        started = time.perf_counter() if scheduled is None else scheduled
+        try:
+            response, hash_value = self.request(operation)
+            status = response.status_code
+        except requests.RequestException:
+            status, hash_value = None, None
+        latency = time.perf_counter() - started
+
+        with self.lock:
+            self.results[operation].append((latency, status))
+            if hash_value is not None and status in (201, 202):
+                self.stamped_hashes.append(hash_value)
+
+    def run_closed(self, concurrency: int, deadline: float, total: int):
+        remaining = [total]
+
+        def worker():
+            while time.perf_counter() < deadline:
+                if total is not None:
+                    with self.lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                self.run_one()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_open(self, rate: float, deadline: float, total: int):
+        interval = 1 / rate
+        start = time.perf_counter()
+        # Hilos de sobra para que un requerimiento lento no demore la salida de los siguientes
+        with ThreadPoolExecutor(max_workers=max(32, int(rate * 2))) as executor:
+            i = 0
+            while total is None or i < total:
+                scheduled = start + i * interval
+                if scheduled >= deadline:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self.run_one, scheduled)
+                i += 1
+
+    def summary(self, results: list, elapsed: float) -> dict:
+        latencies = sorted(latency * 1000 for latency, _ in results)
+        statuses = {}
+        for _, status in results:
+            key = str(status) if status is not None else "no_response"
+            statuses[key] = statuses.get(key, 0) + 1
+        return {
+            "requests": len(results),
+            "throughput_per_s": len(results) / elapsed if elapsed else 0.0,
+            "statuses": statuses,
+            "latency_ms": {
+                "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1] if latencies else 0.0,
+            },
+        }
+
+    def report(self, elapsed: float) -> dict:
+        operations = {}
+        errors_total = 0
+        for name, results in self.results.items():
+            summary = self.summary(results, elapsed)
+            errors = sum(1 for _, status in results if status not in EXPECTED_STATUS[name])
+            summary["errors"] = errors
+            summary["error_rate"] = errors / len(results) if results else 0.0
+            operations[name] = summary
+            errors_total += errors
+
+        total = self.summary([r for results in self.results.values() for r in results], elapsed)
+        total["errors"] = errors_total
+        total["error_rate"] = errors_total / total["requests"] if total["requests"] else 0.0
+        return {"elapsed_s": elapsed, "total": total, "operations": operations}
+
+
+def run(server, weights, concurrency, rate, duration, total, known, timeout) -> dict:
+    load = LoadTest(server, weights, known, timeout)
+    start = time.perf_counter()
+    deadline = start + duration if total is None else float("inf")
+    if rate:
+        load.run_open(rate, deadline, total)
+    else:
+        load.run_closed(concurrency, deadline, total)
+    report = load.report(time.perf_counter() - start)
+    report["config"] = {
+        "server": server,
+        "mix": weights,
+        "concurrency": None if rate else concurrency,
+        "rate": rate,
+        "duration_s": duration if total is None else None,
+        "requests": total,
+    }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera carga sobre la API de sellado e informa latencias")
+    parser.add_argument("--server", help="URL de la API", default=DEFAULT_SERVER)
+    parser.add_argument("--mix", help="Proporción de cada operación", default=DEFAULT_MIX)
+    parser.add_argument(
+        "--concurrency", "-c", help="Hilos de carga cerrada", type=int, default=DEFAULT_CONCURRENCY
+    )
+    parser.add_argument("--rate", "-r", help="Requerimientos por segundo (carga abierta)", type=float)
+    parser.add_argument("--duration", "-d", help="Segundos de carga", type=float, default=DEFAULT_DURATION)
+    parser.add_argument("--requests", "-n", help="Cantidad de requerimientos", type=int)
+    parser.add_argument(
+        "--known", help="Proporción de GET /stamped de hashes ya sellados", type=float, default=DEFAULT_KNOWN
+    )
+    parser.add_argument(
+        "--timeout", help="Segundos de espera por requerimiento", type=float, default=DEFAULT_TIMEOUT
+    )
+    parser.add_argument("--max-error-rate", help="Tasa de error máxima aceptada", type=float)
+    parser.add_argument("--max-p99-ms", help="Latencia p99 máxima aceptada (ms)", type=float)
+    parser.add_argument("--output", "-o", help="Archivo donde guardar el JSON")
+    args = parser.parse_args()
+
+    try:
+        weights = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    if args.rate is not None and args.rate <= 0 or args.concurrency <= 0:
+        print("Error: --rate y --concurrency deben ser positivos", file=sys.stderr)
+        sys.exit(1)
+
+    report = run(
+        args.server, weights, args.concurrency, args.rate, args.duration, args.requests, args.known, args.timeout
+    )
+
+    failed = []
+    if args.max_error_rate is not None and report["total"]["error_rate"] > args.max_error_rate:
+        failed.append(f"tasa de error {report['total']['error_rate']:.4f} > {args.max_error_rate}")
+    if args.max_p99_ms is not None and report["total"]["latency_ms"]["p99"] > args.max_p99_ms:
+        failed.append(f"p99 {report['total']['latency_ms']['p99']:.1f} ms > {args.max_p99_ms} ms")
+    report["passed"] = not failed
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    if failed:
+        print(f"Error: {'; '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
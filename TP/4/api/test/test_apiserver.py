@@ -86,6 +86,12 @@ def random_hash():
     return f"0x{urandom(32).hex()}"
 
 
+def sign_hash(acct, hash_value: str) -> str:
+    """Firma un hash con la cuenta (eth_sign), como lo verifica stampSigned"""
+    signed = acct.sign_message(encode_defunct(hexstr=hash_value))
+    return f"0x{signed.signature.hex()}"
+
+
 def random_invalid_hash_and_signature() -> Tuple[bytes, str]:
     """Devuelve un hash y una firma inválidos"""
     hsh = random_hash()
@@ -179,9 +185,7 @@ def test_stamp_signed():
     """Prueba que el servidor responde correctamente a solicitudes de sellado firmadas"""
     acct = Account.create(urandom(16))
     hash_value = random_hash()
-    msg = encode_defunct(hexstr=hash_value)
-    signed = acct.sign_message(msg)
-    signature = f"0x{signed.signature.hex()}"
+    signature = sign_hash(acct, hash_value)
     response = requests.post(
         stamp,
         json={"hash": hash_value, "signature": signature},
@@ -0,0 +1,171 @@
+"""
+Pruebas del sellado por lotes (merkle.py y merkle_batcher.py) contra una
+cadena en memoria (eth-tester), sin nodo ni servidor:
+
+-   test_merkle_proofs: Las pruebas de inclusión verifican contra la raíz, y no verifican otros hashes.
+-   test_batch_flush: Un lote se sella con una sola transacción stamp(raíz) y cada hash tiene su prueba.
+-   test_batch_size: El lote se cierra al llegar a max_size.
+-   test_batch_window: El lote se cierra al vencer max_wait.
+-   test_batch_duplicate: Un hash ya sellado en un lote no se vuelve a agregar.
+-   test_batch_resume: Un lote que quedó pendiente se sella al reiniciar.
+"""
+
+import json
+import sys
+import time
+from os import urandom
+from pathlib import Path
+
+import pytest
+from eth_account import Account
+from web3 import EthereumTesterProvider, Web3
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from merkle import build_tree, verify_proof  # noqa: E402
+from merkle_batcher import MerkleBatcher  # noqa: E402
+from receipt_tracker import ReceiptTracker  # noqa: E402
+from transaction_params import TransactionParams  # noqa: E402
+
+# Bytecode de un contrato compatible con el ABI de Stamper.json (stamped, stamp
+# y stampSigned), para desplegarlo en la cadena en memoria
+STAMPER_BYTECODE = (
+    "0x6100d361000f6000396100d36000f360003560e01c806383bac4731461002c578063dd89581f1461004157"
+    "8063107e9df11461005c575b600080fd5b60043580546000526001015460205260406000f35b3361004756"
+    "5b60043580600101546100275743816001015555005b7f19457468657265756d205369676e6564204d6573"
+    "736167653a0a333200000000600052600435601c52603c600020608052602435600401806020013560c052"
+    "806040013560e0526060013560001a60a052600061010052602061010060806080600060015af150610100"
+    "5180156100275761004756"
+)
+
+
+def random_hash() -> str:
+    return "0x" + urandom(32).hex()
+
+
+@pytest.fixture
+def chain(tmp_path):
+    """Cadena en memoria con el contrato desplegado y una cuenta con fondos."""
+    w3 = Web3(EthereumTesterProvider())
+    with open(SRC / "Stamper.json") as f:
+        abi = json.load(f)["abi"]
+    tx_hash = w3.eth.contract(abi=abi, bytecode=STAMPER_BYTECODE).constructor().transact(
+        {"from": w3.eth.accounts[0]}
+    )
+    contract = w3.eth.contract(abi=abi, address=w3.eth.get_transaction_receipt(tx_hash).contractAddress)
+
+    account = Account.create()
+    w3.eth.send_transaction(
+        {"from": w3.eth.accounts[0], "to": account.address, "value": Web3.to_wei(10, "ether")}
+    )
+
+    tracker = ReceiptTracker(w3, poll_interval=0.05)
+    tx_params = TransactionParams(w3, account.address)
+
+    def new_batcher(**kwargs):
+        return MerkleBatcher(
+            w3, contract, tx_params, account.key.hex(), tracker, str(tmp_path / "proofs.db"), **kwargs
+        )
+
+    yield w3, contract, account, new_batcher
+    tracker.stop()
+
+
+def wait_status(batcher, hash_value, status, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        proof = batcher.proof(hash_value)
+        if proof is not None and proof["status"] == status:
+            return proof
+        time.sleep(0.05)
+    raise AssertionError(f"{hash_value} no llegó a {status}: {batcher.proof(hash_value)}")
+
+
+def test_merkle_proofs():
+    for size in (1, 2, 3, 5, 8, 13):
+        hashes = [urandom(32) for _ in range(size)]
+        root, proofs = build_tree(hashes)
+        for hash_value, proof in zip(hashes, proofs):
+            assert verify_proof(hash_value, proof, root)
+            assert not verify_proof(urandom(32), proof, root)
+
+
+def test_batch_flush(chain):
+    w3, contract, account, new_batcher = chain
+    batcher = new_batcher()
+    hashes = [random_hash() for _ in range(5)]
+    for hash_value in hashes:
+        assert batcher.add(hash_value)["status"] == "queued"
+
+    block_before = w3.eth.block_number
+    root = batcher.flush()
+
+    # Una sola transacción, que sella la raíz desde la cuenta de la API
+    assert w3.eth.block_number == block_before + 1
+    signer, block = contract.functions.stamped(root).call()
+    assert signer == account.address
+
+    for hash_value in hashes:
+        proof = batcher.proof(hash_value)
+        assert proof["status"] == "mined"
+        assert proof["root"] == root
+        assert proof["blockNumber"] == block
+        assert verify_proof(
+            Web3.to_bytes(hexstr=hash_value),
+            [Web3.to_bytes(hexstr=node) for node in proof["proof"]],
+            Web3.to_bytes(hexstr=root),
+        )
+
+
+def test_batch_size(chain):
+    _, _, _, new_batcher = chain
+    batcher = new_batcher(max_size=3, max_wait=60)
+    batcher.start()
+    hashes = [random_hash() for _ in range(3)]
+    for hash_value in hashes:
+        batcher.add(hash_value)
+    roots = {wait_status(batcher, hash_value, "mined")["root"] for hash_value in hashes}
+    assert len(roots) == 1
+    batcher.stop()
+
+
+def test_batch_window(chain):
+    _, _, _, new_batcher = chain
+    batcher = new_batcher(max_size=100, max_wait=0.2)
+    batcher.start()
+    hash_value = random_hash()
+    batcher.add(hash_value)
+    assert batcher.proof(hash_value)["status"] == "queued"
+    wait_status(batcher, hash_value, "mined")
+    batcher.stop()
+
+
+def test_batch_duplicate(chain):
+    _, _, _, new_batcher = chain
+    batcher = new_batcher()
+    hash_value = random_hash()
+    batcher.add(hash_value)
+    root = batcher.flush()
+
+    assert batcher.add(hash_value)["root"] == root
+    assert batcher.flush() is None
+
+
+def test_batch_resume(chain):
+    _, contract, _, new_batcher = chain
+    hash_value = random_hash()
+
+    # Lote cerrado pero sin sellar (como si la API se detuviera antes de enviarlo)
+    batcher = new_batcher()
+    batcher.add(hash_value)
+    batcher._anchor = lambda root: None
+    root = batcher.flush()
+    assert batcher.proof(hash_value)["status"] == "pending"
+
+    batcher = new_batcher()
+    batcher.start()
+    proof = wait_status(batcher, hash_value, "mined")
+    assert proof["root"] == root
+    assert contract.functions.stamped(root).call()[1] == proof["blockNumber"]
+    batcher.stop()